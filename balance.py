@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo balance simulator for Pirate Latitudes skill checks.
+
+Plays the storm encounter (combat + a roll of 0..STORM_ROLL against
+STORM_DIFFICULTY, STORM_DAMAGE health lost on failure) for every legal
+10-point skill allocation, drawing all rolls in NumPy batches, and reports
+the success rate, expected health loss and death probability of each.
+Needs NumPy.
+
+Usage:
+    python3 balance.py                         # 1,000,000 storms per allocation
+    python3 balance.py --trials 5000000 --encounters 3 --health 40
+    python3 balance.py --difficulty 7 --damage 20 --by-combat
+    python3 balance.py --compare               # also time the per-roll random version
+"""
+
+import argparse
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("balance.py needs NumPy: pip install numpy")
+
+import pirates
+
+SKILL_POINTS = 10  # what character creation asks the player to allocate
+CHUNK = 1 << 20  # trials drawn per batch, to keep memory flat for huge runs
+ROLL_DTYPE = np.int32  # wide enough that no --roll the parser accepts can wrap
+
+def allocations(points=SKILL_POINTS):
+    """Every (combat, negotiation, puzzle) of non-negative skills summing to points."""
+    return [(combat, negotiation, points - combat - negotiation)
+            for combat in range(points + 1)
+            for negotiation in range(points - combat + 1)]
+
+def exact_success(combat, difficulty, roll):
+    """The storm check's true success chance, for checking the simulation."""
+    return sum(combat + r > difficulty for r in range(roll + 1)) / (roll + 1)
+
+def simulate_storms(combat, trials, encounters, health, difficulty, roll, damage, rng):
+    """
+    Play trials captains with the given combat skill through encounters
+    storms each. A captain who dies stops sailing, so later storms neither
+    count nor hurt. Returns (success rate, mean health lost, death probability).
+    """
+    fatal = -(-health // damage) if damage > 0 else encounters + 1  # failures that kill
+    successes = sailed = lost = deaths = 0
+    for start in range(0, trials, CHUNK):
+        n = min(CHUNK, trials - start)
+        rolls = rng.integers(0, roll + 1, size=(n, encounters), dtype=ROLL_DTYPE)
+        failed = rolls <= difficulty - combat  # no array addition, so nothing to overflow
+        failed_before = np.cumsum(failed, axis=1, dtype=np.int32) - failed
+        alive = failed_before < fatal
+        failures = np.minimum(failed_before[:, -1] + failed[:, -1], fatal)
+        successes += int(np.count_nonzero(alive & ~failed))
+        sailed += int(np.count_nonzero(alive))
+        lost += int(failures.sum()) * damage
+        deaths += int(np.count_nonzero(failures == fatal)) if damage > 0 else 0
+    return successes / sailed, lost / trials, deaths / trials
+
+def simulate_storms_per_roll(combat, trials, encounters, health, difficulty, roll, damage, rng):
+    """The same simulation with one random.randint call per roll, as the game does."""
+    successes = sailed = lost = deaths = 0
+    for _ in range(trials):
+        hp = health
+        for _ in range(encounters):
+            sailed += 1
+            if combat + rng.randint(0, roll) > difficulty:
+                successes += 1
+                continue
+            hp -= damage
+            lost += damage
+            if hp <= 0:
+                deaths += 1
+                break
+    return successes / sailed, lost / trials, deaths / trials
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trials", type=int, default=1_000_000,
+                        help="simulated captains per allocation")
+    parser.add_argument("--encounters", type=int, default=1,
+                        help="storms each captain sails through")
+    parser.add_argument("--health", type=int, default=pirates.new_game_state()["health"],
+                        help="health when the first storm hits")
+    parser.add_argument("--difficulty", type=int, default=pirates.STORM_DIFFICULTY)
+    parser.add_argument("--roll", type=int, default=pirates.STORM_ROLL,
+                        help="the roll is 0..ROLL inclusive")
+    parser.add_argument("--damage", type=int, default=pirates.STORM_DAMAGE)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--by-combat", action="store_true",
+                        help="one row per combat value instead of per allocation")
+    parser.add_argument("--compare", action="store_true",
+                        help="also time a per-roll random.randint run of the same size")
+    args = parser.parse_args(argv)
+    if args.trials < 1 or args.encounters < 1 or args.health < 1 or args.roll < 0:
+        parser.error("--trials, --encounters and --health must be positive, --roll non-negative")
+    if args.roll >= np.iinfo(ROLL_DTYPE).max:
+        parser.error(f"--roll must be under {np.iinfo(ROLL_DTYPE).max}")
+
+    rng = np.random.default_rng(args.seed)
+    settings = (args.trials, args.encounters, args.health, args.difficulty, args.roll, args.damage)
+    combats = sorted({combat for combat, _, _ in allocations()})
+    start = time.perf_counter()
+    results = {combat: simulate_storms(combat, *settings, rng) for combat in combats}
+    elapsed = time.perf_counter() - start
+
+    print(f"storm: combat + 0..{args.roll} > {args.difficulty}, {args.damage} damage on failure; "
+          f"{args.encounters} storm(s) from {args.health} health, {args.trials:,} captains each")
+    print(f"{'allocation':<12} {'success':>8} {'exact':>8} {'health lost':>12} {'death':>8}")
+    rows = ([(f"combat {combat}", combat) for combat in combats] if args.by_combat
+            else [(" ".join(map(str, skills)), skills[0]) for skills in allocations()])
+    for label, combat in rows:
+        success, loss, death = results[combat]
+        exact = exact_success(combat, args.difficulty, args.roll)
+        print(f"{label:<12} {success:8.2%} {exact:8.2%} {loss:12.2f} {death:8.2%}")
+    rolls = args.trials * args.encounters * len(combats)
+    print(f"{rolls:,} rolls in {elapsed:.2f}s ({rolls / elapsed:,.0f} rolls/s)")
+
+    if args.compare:
+        trials = max(1, args.trials // 100)
+        per_roll = random.Random(args.seed)
+        start = time.perf_counter()
+        for combat in combats:
+            simulate_storms_per_roll(combat, trials, *settings[1:], per_roll)
+        slow = (time.perf_counter() - start) / (trials * args.encounters * len(combats))
+        print(f"per-roll random.randint: {1 / slow:,.0f} rolls/s "
+              f"({rolls / elapsed * slow:.0f}x slower, timed on {trials:,} captains)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for Pirate Latitudes hot paths.
+
+Usage:
+    python3 benchmarks.py            # run every benchmark
+    python3 benchmarks.py parse      # run only the named benchmarks
+    python3 benchmarks.py replay --update-baseline   # store new replay baselines
+"""
+
+import curses
+import glob
+import json
+import os
+import pty
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pirates
+
+# Inputs shaped like the offline transcript corpora: mostly short commands,
+# some chatty sentences, and a fair share of words that match nothing.
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECORDINGS = os.path.join(HERE, "recordings")
+BASELINE = os.path.join(HERE, "benchmarks_baseline.json")
+REGRESSION = 1.25  # flag replay timings this much slower than the baseline
+UPDATE_BASELINE = False  # set by --update-baseline
+
+SAMPLE_INPUTS = [
+    "look around", "examine the map", "sail north", "set course for the island",
+    "board the ship", "enter cabin", "search for clues", "read journal",
+    "read map", "take map", "fight them", "attack enemy", "negotiate peace",
+    "talk to captain", "unlock door", "open chest", "help", "quit", "save game",
+    "load game", "journal", "codex entries", "foobar test", "Arr, speak up, matey!",
+    "I want to see the map", "we should probably parley with the crew before dawn",
+    "hoist the colours and ready the cannons", "",
+]
+
+############################
+# Reference Implementations
+############################
+
+def legacy_parse_command(user_input):
+    """The per-synonym re.search parser that parse_command replaced."""
+    user_input = user_input.lower().strip()
+    if not user_input:
+        return ""
+    if re.search(r'\b(read|take)\s+map\b', user_input):
+        return "map"
+    for command, synonyms in pirates.ORDERED_COMMANDS:
+        for synonym in synonyms:
+            pattern = r'\b' + re.escape(synonym) + r'\b'
+            if re.search(pattern, user_input):
+                return command
+    parts = user_input.split()
+    return parts[0] if parts else ""
+
+def legacy_save_game(state, path):
+    """The full-rewrite json.dump save that the snapshot journal replaced."""
+    with open(path, "w") as f:
+        json.dump(dict(state), f)
+
+def legacy_load_game(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def legacy_game_state():
+    """The plain-dict game state that GameState replaced."""
+    return {
+        "current_scene": "intro",
+        "name": "Captain Anonymous",
+        "inventory": [],
+        "health": 100,
+        "skills": {"combat": 5, "negotiation": 3, "puzzle": 4},
+        "reputation": 0,
+        "achievements": [],
+        "story_log": [],
+    }
+
+############################
+# Helpers
+############################
+
+def long_campaign_state(events):
+    """A game state whose story_log holds the given number of events."""
+    state = pirates.new_game_state()
+    scenes = ["Arrived at the Ship's Deck.", "Exploring Below Deck.",
+              "Sailing on the Open Sea.", "Endured the Storm at Sea."]
+    state["story_log"] = [scenes[i % len(scenes)] for i in range(events)]
+    return state
+
+def time_calls(func, inputs, repeat=5):
+    """Return the best wall time (seconds) of calling func over inputs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def report(label, seconds, calls):
+    per_call_us = seconds / calls * 1e6
+    print(f"  {label:<22} {per_call_us:8.2f} us/call  {calls / seconds:12,.0f} calls/s")
+
+class PtyCursesIO(pirates.CursesIO):
+    """
+    The curses UI on a real terminal, answering prompts from a recording
+    and animating narration on ScreenIO's frame schedule. Typed lines are
+    redrawn a key at a time, as a remote curses session echoes them.
+    """
+
+    def __init__(self, stdscr, state, inputs):
+        super().__init__(stdscr, state, track_resize=False)
+        self.inputs = iter(inputs)
+        self.frame_times = []
+
+    def frame(self, draw=None):
+        start = time.perf_counter()
+        if draw is not None:
+            draw()
+        self.main_win.noutrefresh()
+        self.panels.render()
+        curses.doupdate()
+        self.frame_times.append(time.perf_counter() - start)
+
+    def slow_print(self, text, delay=0.05):
+        text += "\n"
+        step = max(1, round(pirates.FRAME_TIME / delay)) if delay > 0 else len(text)
+        for i in range(0, len(text), step):
+            self.frame(lambda: pirates._add_text(self.main_win, text[i:i + step]))
+
+    def show_help(self):
+        pirates.GameIO.show_help(self)
+
+    def show_journal(self, events, query=None):
+        pirates.GameIO.show_journal(self, events, query)
+
+    def read_line(self, prompt=">> "):
+        self.keys.prompt = prompt
+        self.frame(self.keys.draw)
+        line = next(self.inputs, None)
+        for ch in line or "":
+            self.keys.buffer.append(ch)
+            self.frame(self.keys.draw)
+        self.keys.buffer = []
+        return line
+
+def curses_over_pty(recording, rows, cols):
+    """Play recording through curses on a pseudo-terminal; return (bytes it wrote, frame times)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = os.path.join(tmpdir, "frames.json")
+        pid, fd = pty.fork()
+        if pid == 0:
+            try:
+                os.environ.update(TERM="xterm", LINES=str(rows), COLUMNS=str(cols))
+
+                def play(stdscr):
+                    state = pirates.new_game_state()
+                    io = PtyCursesIO(stdscr, state, recording["inputs"])
+                    session = pirates.Session(io, state, random.Random(recording["seed"]), save_file=None)
+                    pirates.drive(session, pirates.new_game_flow(session))
+                    return io.frame_times
+
+                frame_times = curses.wrapper(play)
+                with open(result, "w") as f:
+                    json.dump(frame_times, f)
+            finally:
+                os._exit(0)
+        written = 0
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except OSError:  # the child has gone and closed the terminal
+                break
+            if not chunk:
+                break
+            written += len(chunk)
+        os.waitpid(pid, 0)
+        os.close(fd)
+        with open(result, "r") as f:
+            return written, json.load(f)
+
+class CountingWriter:
+    """A StreamWriter stand-in for ScreenIO that only counts bytes and never backs up."""
+
+    transport = None
+
+    def __init__(self):
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+
+def screen_stream(recording, rows, cols):
+    """Play recording through ScreenIO; return (bytes it sent, frame times)."""
+    state = pirates.new_game_state()
+    writer = CountingWriter()
+    io = pirates.ScreenIO(writer, state, size=(rows, cols))
+    session = pirates.Session(io, state, random.Random(recording["seed"]), save_file=None)
+    flow = pirates.new_game_flow(session)
+    inputs = iter(recording["inputs"])
+    frame_times = []
+
+    def timed(send):
+        start = time.perf_counter()
+        send()
+        frame_times.append(time.perf_counter() - start)
+
+    try:
+        prompt = next(flow)
+        while True:
+            for _ in io.animation():
+                timed(io.send_frame)
+            timed(lambda: io.draw_prompt(prompt))
+            prompt = flow.send(next(inputs, None))
+    except StopIteration:
+        for _ in io.animation():
+            timed(io.send_frame)
+    return writer.written, frame_times
+
+############################
+# Benchmarks
+############################
+
+def bench_parse(n=50000):
+    """Compare parse_command against the legacy per-synonym regex parser."""
+    rng = random.Random(81)
+    corpus = [rng.choice(SAMPLE_INPUTS) for _ in range(n)]
+    mismatches = [s for s in SAMPLE_INPUTS
+                  if pirates.parse_command(s) != legacy_parse_command(s)]
+    if mismatches:
+        print(f"  WARNING: results differ for {mismatches!r}")
+    legacy = time_calls(legacy_parse_command, corpus)
+    current = time_calls(pirates.parse_command, corpus)
+    print(f"parse_command over {n} inputs:")
+    report("legacy", legacy, n)
+    report("precompiled", current, n)
+    print(f"  speedup: {legacy / current:.1f}x")
+
+def bench_fuzzy(vocabulary=5000, queries=2000):
+    """Typo lookups in a deletion index versus scanning the vocabulary, plus parse and suggestion costs."""
+    rng = random.Random(81)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = list({"".join(rng.choice(letters) for _ in range(rng.randint(4, 12)))
+                  for _ in range(vocabulary)})
+    typos = []
+    for _ in range(queries):
+        word = list(rng.choice(words))
+        i = rng.randrange(len(word))
+        word[i] = rng.choice(letters)
+        typos.append("".join(word))
+    start = time.perf_counter()
+    index = pirates.FuzzyIndex(words)
+    build = time.perf_counter() - start
+
+    def scan(query):
+        limit = pirates.typo_limit(query)
+        return sorted((d, w) for w in words if (d := pirates.edit_distance(query, w, limit)) <= limit)
+
+    print(f"fuzzy lookup, {len(words)} words ({build * 1000:.0f} ms to index), {queries} typos:")
+    report("scan every word", time_calls(scan, typos[:queries // 10], repeat=1), queries // 10)
+    report("deletion index", time_calls(lambda q: index.lookup(q, pirates.typo_limit(q)), typos), queries)
+    print("parse_command, and suggest_command for what it does not recognize:")
+    report("exact synonym", time_calls(pirates.parse_command, ["sail north"] * queries), queries)
+    report("no match", time_calls(pirates.parse_command, ["foobar test"] * queries), queries)
+    report("suggest for a typo", time_calls(pirates.suggest_command, ["please sial north"] * queries), queries)
+    report("suggest, no match", time_calls(pirates.suggest_command, ["foobar test"] * queries), queries)
+
+SCRIPTED_SESSION = ["Anne", "4 3 3", "look", "board", "search", "sail",
+                    "sail", "negotiate", "look", "quit"]
+
+def bench_headless(n=5000):
+    """Run complete scripted sessions through the in-memory backend."""
+    initial = dict(pirates.game_state)
+    start = time.perf_counter()
+    for _ in range(n):
+        pirates.game_state.clear()
+        pirates.game_state.update(pirates.new_game_state())
+        pirates.headless_main(pirates.MemoryIO(SCRIPTED_SESSION))
+    elapsed = time.perf_counter() - start
+    pirates.game_state.clear()
+    pirates.game_state.update(initial)
+    print(f"headless sessions ({len(SCRIPTED_SESSION)} inputs each):")
+    report("MemoryIO session", elapsed, n)
+
+def bench_metrics(n=200, rounds=30):
+    """
+    Scripted sessions, and parse_command alone, with metrics off (the
+    default) and on, best of interleaved rounds. The whole-session
+    difference drowns in this machine's noise, so the overhead is worked
+    out from the cost per timed call and the timed calls a session makes.
+    """
+    def sessions():
+        start = time.perf_counter()
+        for _ in range(n):
+            session = pirates.Session(pirates.MemoryIO(SCRIPTED_SESSION), pirates.new_game_state(),
+                                      save_file=None)
+            pirates.drive(session, pirates.new_game_flow(session))
+        return time.perf_counter() - start
+
+    def parses():
+        return time_calls(pirates.parse_command, SAMPLE_INPUTS * 5, repeat=10)
+
+    print(f"metrics overhead over {n} sessions, best of {rounds} rounds:")
+    off, on = [float("inf")] * 2, [float("inf")] * 2
+    pirates.METRICS.histograms.clear()
+    for _ in range(rounds):
+        off = [min(off[0], sessions()), min(off[1], parses())]
+        pirates.METRICS.enable()
+        try:
+            on = [min(on[0], sessions()), min(on[1], parses())]
+        finally:
+            pirates.METRICS.disable()
+    report("metrics off", off[0], n)
+    report("metrics on", on[0], n)
+    per_call = (on[1] - off[1]) / (len(SAMPLE_INPUTS) * 5)
+    timed = sum(sum(h.counts) for h in pirates.METRICS.histograms.values()) - rounds * 10 * len(SAMPLE_INPUTS) * 5
+    per_session = timed / (rounds * n)
+    print(f"  overhead when on: {per_call * 1e9:+.0f} ns per timed call, {per_session:.1f} timed calls "
+          f"per session: {per_call * per_session / (off[0] / n):+.1%} per session")
+    pirates.METRICS.histograms.clear()
+    pirates.METRICS.commands.clear()
+
+def bench_save(events=20000, saves=200):
+    """Save a long campaign repeatedly, one new event between saves."""
+    print(f"save/load with {events} logged events, {saves} saves of one new event each:")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = long_campaign_state(events)
+        legacy_path = os.path.join(tmpdir, "legacy.json")
+        start = time.perf_counter()
+        for i in range(saves):
+            state["story_log"].append(f"Event {i}")
+            legacy_save_game(state, legacy_path)
+        report("legacy save", time.perf_counter() - start, saves)
+
+        state = long_campaign_state(events)
+        path = os.path.join(tmpdir, "journal.sav")
+        pirates.save_game(state, path)
+        start = time.perf_counter()
+        for i in range(saves):
+            state["story_log"].append(f"Event {i}")
+            pirates.save_game(state, path)
+        report("journal save", time.perf_counter() - start, saves)
+
+        start = time.perf_counter()
+        legacy_load_game(legacy_path)
+        report("legacy load", time.perf_counter() - start, 1)
+        pirates._save_journals.clear()
+        start = time.perf_counter()
+        pirates.load_game({}, path)
+        report("journal load", time.perf_counter() - start, 1)
+        pirates._save_journals.clear()
+
+def bench_autosave(events=20000, commands=200):
+    """Game-thread cost per command of saving synchronously versus noting for autosave."""
+    print(f"per-command save cost with {events} logged events, {commands} commands:")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state = long_campaign_state(events)
+        path = os.path.join(tmpdir, "save.sav")
+        pirates.save_game(state, path)
+        start = time.perf_counter()
+        for i in range(commands):
+            state["story_log"].append(f"Event {i}")
+            state["health"] -= 1
+            pirates.save_game(state, path)
+        report("save_game", time.perf_counter() - start, commands)
+
+        state = long_campaign_state(events)
+        autosaver = pirates.Autosaver(os.path.join(tmpdir, "autosave.sav"))
+        autosaver.note(state)
+        autosaver.flush()
+        start = time.perf_counter()
+        for i in range(commands):
+            state["story_log"].append(f"Event {i}")
+            state["health"] -= 1
+            autosaver.note(state)
+        report("Autosaver.note", time.perf_counter() - start, commands)
+        start = time.perf_counter()
+        autosaver.stop()
+        print(f"  coalesced into {autosaver.writes - 1} write(s), "
+              f"final flush {(time.perf_counter() - start) * 1000:.2f} ms")
+        pirates._save_journals.clear()
+
+def bench_slots(slots=2000):
+    """List thousands of save slots from the index versus reading every save's header."""
+    print(f"load menu listing with {slots} save slots:")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        saves = pirates.SaveSlots(tmpdir)
+        state = pirates.new_game_state()
+        for n in range(slots):
+            state.name, state.health = f"Captain {n}", n % 100 + 1
+            saves.save(state, state.name)
+        pirates._save_journals.clear()
+
+        start = time.perf_counter()
+        entries = pirates.SaveSlots(tmpdir).list()
+        report("index (cold)", time.perf_counter() - start, 1)
+        start = time.perf_counter()
+        headers = [pirates.read_save_header(os.path.join(tmpdir, name))
+                   for name in os.listdir(tmpdir) if name.endswith(pirates.SLOT_SUFFIX)]
+        report("read every header", time.perf_counter() - start, 1)
+        assert len(entries) == len(headers) == slots
+        saves.save(state, "One more")
+        start = time.perf_counter()
+        saves.list()
+        report("index (one new save)", time.perf_counter() - start, 1)
+        pirates._save_journals.clear()
+
+def bench_catalog(entries=50000, languages=("en", "es", "fr"), lookups=1000):
+    """A large multi-language story catalog: first use, lookups and memory, versus a dict of it all."""
+    print(f"story catalog with {entries} texts in each of {len(languages)} languages:")
+    rng = random.Random(81)
+    keys = [f"scene_{n // 20}.message_{n % 20}" for n in range(entries)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for code in languages:
+            paths.append(os.path.join(tmpdir, code + ".txt"))
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                for key in keys:
+                    f.write(f"@@ {key}\n{code}: " + " ".join(rng.choice(SAMPLE_INPUTS) for _ in range(12)) + "\n")
+        out_path = os.path.join(tmpdir, "story.plt")
+        pirates.compile_text(*paths, out_path)
+        print(f"  catalog file: {os.path.getsize(out_path) / 1e6:.1f} MB")
+        wanted = [rng.choice(keys) for _ in range(lookups)]
+
+        start = time.perf_counter()
+        catalog = pirates.TextCatalog(out_path, "es")
+        catalog.get(wanted[0])
+        report("open + first text", time.perf_counter() - start, 1)
+        start = time.perf_counter()
+        for key in wanted:
+            catalog.get(key)
+        report("first use of a text", time.perf_counter() - start, lookups)
+        report("cached text", time_calls(catalog.get, wanted), lookups)
+        catalog._map.close()
+
+        tracemalloc.start()
+        catalog = pirates.TextCatalog(out_path, "es")
+        for key in wanted:
+            catalog.get(key)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        everything = {code: pirates.read_text_source(path) for code, path in zip(languages, paths)}
+        elapsed = time.perf_counter() - start
+        eager = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        report("load it all eagerly", elapsed, 1)
+        print(f"  python memory: catalog {memory / 1e6:.2f} MB after {lookups} lookups, "
+              f"all texts in dicts {eager / 1e6:.1f} MB")
+        catalog._map.close()
+        del everything
+
+def bench_format(events=20000, repeat=20):
+    """Compare the binary snapshot format with plain JSON saves."""
+    state = long_campaign_state(events)
+    generation = "00" * 8
+    print(f"save format with {events} logged events:")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_path = os.path.join(tmpdir, "save.json")
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy_save_game(state, json_path)
+        report("json save", time.perf_counter() - start, repeat)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy_load_game(json_path)
+        report("json load", time.perf_counter() - start, repeat)
+
+        bin_path = os.path.join(tmpdir, "save.bin")
+        start = time.perf_counter()
+        for _ in range(repeat):
+            with open(bin_path, "wb") as f:
+                f.write(pirates.encode_save(state, generation))
+        report("binary save", time.perf_counter() - start, repeat)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            with open(bin_path, "rb") as f:
+                pirates.decode_save(f.read())
+        report("binary load (lazy)", time.perf_counter() - start, repeat)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            with open(bin_path, "rb") as f:
+                pirates.decode_save(f.read())[0]["story_log"][0]
+        report("binary load + decode", time.perf_counter() - start, repeat)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            pirates.read_save_header(bin_path)
+        report("binary header only", time.perf_counter() - start, repeat)
+        json_size, bin_size = os.path.getsize(json_path), os.path.getsize(bin_path)
+        print(f"  size: json {json_size:,} bytes, binary {bin_size:,} bytes "
+              f"({json_size / bin_size:.0f}x smaller)")
+
+def session_bytes(build, sessions):
+    """Average traced allocation per object built by build()."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build() for _ in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return used / sessions
+
+def bench_memory(sessions=1000, events=400):
+    """Per-session memory of dict states with string logs against GameState with interned ids."""
+    state = long_campaign_state(events)
+    state["story_log"][0] = "Character created: Anne with skills {'combat': 4}"
+    document = json.dumps(dict(state))  # each session loads its own copy, as from a save
+
+    def legacy():
+        loaded = legacy_game_state()
+        loaded.update(json.loads(document))
+        return loaded
+
+    def slotted():
+        fields = json.loads(document)
+        fields["story_log"] = pirates.StoryLog(fields["story_log"])
+        return pirates.GameState(fields)
+
+    print(f"memory per session with {events} logged events ({sessions} sessions):")
+    legacy_bytes = session_bytes(legacy, sessions)
+    slotted_bytes = session_bytes(slotted, sessions)
+    print(f"  {'dict + string list':<22} {legacy_bytes:10,.0f} bytes")
+    print(f"  {'GameState + event ids':<22} {slotted_bytes:10,.0f} bytes")
+    print(f"  reduction: {legacy_bytes / slotted_bytes:.1f}x")
+
+    legacy_state, slotted_state = legacy(), slotted()
+    n = 1_000_000
+    start = time.perf_counter()
+    for _ in range(n):
+        legacy_state["health"]
+    report("dict field read", time.perf_counter() - start, n)
+    start = time.perf_counter()
+    for _ in range(n):
+        slotted_state.health
+    report("slot field read", time.perf_counter() - start, n)
+
+def bench_journal(sizes=(1000, 10000, 100000), repeat=200):
+    """Fetch the journal's last and first pages from logs of growing length."""
+    print(f"journal page fetch ({pirates.JOURNAL_PAGE} events):")
+    for size in sizes:
+        log = pirates.StoryLog(f"Event {i}" for i in range(size))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            log.page(len(log) - pirates.JOURNAL_PAGE, pirates.JOURNAL_PAGE)
+        report(f"last page of {size}", time.perf_counter() - start, repeat)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            log.page(0, pirates.JOURNAL_PAGE)
+        report(f"first page of {size}", time.perf_counter() - start, repeat)
+
+def bench_search(sizes=(1000, 10000, 100000), repeat=50):
+    """Journal searches answered from the index versus scanning every event."""
+    logged = [("ship_deck", "Arrived at the Ship's Deck."), ("below_deck", "Exploring Below Deck."),
+              ("below_deck", "Learned about secret island."), ("open_sea", "Sailing on the Open Sea."),
+              ("storm_at_sea", "Endured the Storm at Sea."), ("island_approach", "Approaching the Secret Island.")]
+    queries = ["journal secret", "journal in:storm", "journal secret island in:below", "journal kraken"]
+    print("journal search (indexed vs linear scan):")
+    for size in sizes:
+        log = pirates.StoryLog()
+        for i in range(size):
+            scene, text = logged[i % len(logged)]
+            log.append(text, scene=scene)
+        pirates.search_journal(log, pirates.journal_query(queries[0]))  # files the words once
+        for text in queries:
+            query = pirates.journal_query(text)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                matches = pirates.search_journal(log, query)
+                matches.page(len(matches) - pirates.JOURNAL_PAGE, pirates.JOURNAL_PAGE)
+            report(f"{text!r} in {size}", time.perf_counter() - start, repeat)
+        terms = pirates.journal_query(queries[0]).terms
+        start = time.perf_counter()
+        for _ in range(max(repeat // 10, 1)):
+            [event for event in log if all(term in event.lower() for term in terms)]
+        report(f"linear scan of {size}", time.perf_counter() - start, max(repeat // 10, 1))
+
+def bench_checkpoints(events=20000, checkpoints=500, repeat=200):
+    """Checkpoint memory and rewind cost against JSON snapshots of the whole state."""
+    state = long_campaign_state(events)
+    state["story_log"] = pirates.StoryLog(state["story_log"])
+    scenes = list(pirates.SCENES)
+    print(f"{checkpoints} checkpoints over a campaign of {events} logged events:")
+    taken = pirates.Checkpoints(limit=checkpoints)
+    tracemalloc.start()
+    shared = 0
+    for i in range(checkpoints):
+        before = tracemalloc.get_traced_memory()[0]
+        taken.take(state, scenes[i % len(scenes)])
+        shared += tracemalloc.get_traced_memory()[0] - before
+        pirates.add_event("Arrived at the Ship's Deck.", state=state)
+        if i % 50 == 0:
+            state["inventory"].append(f"trinket {i}")
+    before = tracemalloc.get_traced_memory()[0]
+    log_copy = list(state["story_log"])
+    one_copy = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del log_copy
+    print(f"  {'checkpoints':<22} {shared:12,} bytes ({shared / checkpoints:,.0f} per checkpoint)")
+    print(f"  {'one story_log copy':<22} {one_copy:12,} bytes")
+
+    def rewind():
+        pirates.add_event("Sailing on the Open Sea.", state=state)
+        taken.take(state, "open_sea")
+        return taken.restore(state, 1)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rewind()
+    report("take + rewind", time.perf_counter() - start, repeat)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        snapshot = json.dumps(dict(state, story_log=list(state["story_log"])))
+        pirates.GameState(json.loads(snapshot))
+    report("json snapshot + restore", time.perf_counter() - start, repeat)
+
+def calibrate(rounds=3):
+    """
+    Best time (us) of a fixed pure-Python workload. Replay timings are kept
+    relative to it, so a baseline recorded on one machine can gate another.
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        counts = {}
+        for i in range(2000):
+            word = SAMPLE_INPUTS[i % len(SAMPLE_INPUTS)].lower().split()
+            key = word[0] if word else ""
+            counts[key] = counts.get(key, 0) + len(word)
+        sorted(counts.items())
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+def bench_replay(repeat=30):
+    """
+    Replay every recording in recordings/ through the virtual curses UI and
+    report median per-command latency, scene-transition cost and save/load
+    cost against the baselines in benchmarks_baseline.json, scaled by the
+    calibration loop to this machine's speed.
+    """
+    paths = sorted(glob.glob(os.path.join(RECORDINGS, "*.json")))
+    samples = {}
+    final_states = []
+    # Every sample is kept in units of a calibration taken just before it,
+    # so it is measured against the machine as loaded at that moment.
+    calibrations = []
+    for path in paths:
+        recording = pirates.load_recording(path)
+        for _ in range(repeat):
+            calibrations.append(calibrate() / 1e6)
+            io = pirates.replay(recording)
+            for command, before, after, seconds in io.timings:
+                samples.setdefault(f"command {command}", []).append(seconds / calibrations[-1])
+                if before != after and before != "intro":
+                    samples.setdefault(f"transition {before} -> {after}", []).append(seconds / calibrations[-1])
+        final_states.append(io.state)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n, state in enumerate(final_states):
+            path = os.path.join(tmpdir, f"save{n}.sav")
+            pirates.save_game(state, path)
+            for i in range(repeat):
+                calibrations.append(calibrate() / 1e6)
+                pirates.add_event(f"Benchmark event {i}", state=state)
+                start = time.perf_counter()
+                pirates.save_game(state, path)
+                samples.setdefault("save", []).append((time.perf_counter() - start) / calibrations[-1])
+                pirates._save_journals.clear()
+                start = time.perf_counter()
+                pirates.load_game({}, path)
+                samples.setdefault("load", []).append((time.perf_counter() - start) / calibrations[-1])
+        pirates._save_journals.clear()
+    calibration = statistics.median(calibrations) * 1e6
+
+    results = {label: statistics.median(values) * calibration for label, values in samples.items()}
+    try:
+        with open(BASELINE, "r") as f:
+            recorded = json.load(f)
+        baseline, scale = recorded["timings"], calibration / recorded["calibration"]
+    except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError):
+        baseline, scale = {}, 1.0
+    print(f"replay of {len(paths)} recordings x {repeat} (median us; calibration loop {calibration:.1f} us, "
+          f"baselines scaled {scale:.2f}x to match):")
+    regressions = 0
+    for label in sorted(results):
+        line = f"  {label:<44} {results[label]:10.1f}"
+        if label in baseline:
+            expected = baseline[label] * scale
+            ratio = results[label] / expected
+            line += f"  baseline {expected:10.1f}  {ratio:5.2f}x"
+            if ratio > REGRESSION:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+    if UPDATE_BASELINE:
+        with open(BASELINE, "w") as f:
+            json.dump({"calibration": round(calibration, 1),
+                       "timings": {label: round(value, 1) for label, value in sorted(results.items())}},
+                      f, indent=1)
+        print(f"  baseline written to {os.path.basename(BASELINE)}")
+    elif regressions:
+        print(f"  {regressions} timings regressed more than {REGRESSION:.2f}x")
+
+def bench_stream(rows=24, cols=80, link_bits=1e6):
+    """
+    Stream a recorded game to a remote terminal: curses on a pseudo-terminal
+    (the bytes SSH would carry) versus ScreenIO's cell deltas, both animating
+    narration on the same frame schedule.
+    """
+    path = os.path.join(RECORDINGS, "voyage.json")
+    recording = pirates.load_recording(path)
+    print(f"streaming {os.path.basename(path)} to a {rows}x{cols} terminal "
+          f"(latency adds the transfer time on a {link_bits / 1e6:g} Mbit/s link):")
+    for label, play in (("curses over a pty", curses_over_pty), ("ScreenIO cell deltas", screen_stream)):
+        written, frame_times = play(recording, rows, cols)
+        frames = len(frame_times)
+        per_frame = written / frames
+        median = statistics.median(frame_times)
+        print(f"  {label:<22} {frames:5} frames {written:8,} bytes {per_frame:7.1f} bytes/frame  "
+              f"frame {median * 1e6:6.1f} us  latency {(median + per_frame * 8 / link_bits) * 1000:6.2f} ms")
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "fuzzy": bench_fuzzy,
+    "headless": bench_headless,
+    "metrics": bench_metrics,
+    "save": bench_save,
+    "autosave": bench_autosave,
+    "slots": bench_slots,
+    "catalog": bench_catalog,
+    "format": bench_format,
+    "journal": bench_journal,
+    "search": bench_search,
+    "checkpoints": bench_checkpoints,
+    "memory": bench_memory,
+    "replay": bench_replay,
+    "stream": bench_stream,
+}
+
+def main(argv):
+    global UPDATE_BASELINE
+    UPDATE_BASELINE = "--update-baseline" in argv
+    names = [arg for arg in argv if not arg.startswith("--")] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+            return 1
+        BENCHMARKS[name]()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Reachable-state explorer for the Pirate Latitudes scene graph.
+
+Runs a breadth-first search over (scene, health bucket, key flags) states,
+driving the real scene generators: each state is entered, sent every known
+command, and whatever scene it returns (under every outcome of the random
+rolls made on the way) becomes a new state. States are memoized on their
+key, so each is expanded once. Reports reachable scenes, dead ends,
+commands that are advertised but not handled, and cycles.
+
+Usage:
+    python3 explore.py                     # from the ship's deck, default captain
+    python3 explore.py --combat 7 --bucket 25
+    python3 explore.py --start open_sea --health 30
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+
+import pirates
+
+QUIT = "quit"
+SENTINEL = "xyzzy"  # matches no command; shows what a scene says to unknown input
+
+class ScriptedRandom:
+    """
+    Stands in for session.rng and plays back a fixed list of choices
+    (0-based indexes into each call's options), taking the first option once
+    the list runs out. Every call is recorded so the caller can go back and
+    try the other options.
+    """
+
+    def __init__(self, choices):
+        self.choices = choices
+        self.calls = []  # number of options offered by each call, in order
+
+    def _pick(self, options):
+        index = self.choices[len(self.calls)] if len(self.calls) < len(self.choices) else 0
+        self.calls.append(options)
+        return index
+
+    def randint(self, low, high):
+        return low + self._pick(high - low + 1)
+
+    def choice(self, seq):
+        return seq[self._pick(len(seq))]
+
+def flags_of(state):
+    """The progress a state carries besides its scene and health."""
+    return (tuple(sorted(state["inventory"])), tuple(sorted(state["achievements"])))
+
+class Explorer:
+    """
+    Breadth-first search over the states a scene table can reach. A state is
+    (scene id, health bucket, flags); the health and flags of the first
+    captain to reach a state stand in for the whole bucket.
+    """
+
+    def __init__(self, scenes=None, commands=None, bucket=10, skills=None):
+        self.scenes = pirates.SCENES if scenes is None else scenes
+        self.commands = ([command for command, _ in pirates.ORDERED_COMMANDS]
+                         if commands is None else commands)
+        self.bucket = bucket
+        self.skills = dict(skills or pirates.new_game_state()["skills"])
+        self.states = {}  # key -> (health, flags) of its representative
+        self.edges = {}  # key -> {command: set of next keys, None for the game ending}
+        self.handled = {}  # scene id -> commands it responds to
+        self.missing = set()  # scene ids returned but not in the table
+
+    def key(self, scene_id, state):
+        health = state["health"]
+        return (scene_id, health // self.bucket if health > 0 else None, flags_of(state))
+
+    def _fresh_state(self, health, flags):
+        state = pirates.new_game_state()
+        state["skills"] = dict(self.skills)
+        state["health"] = health
+        state["inventory"], state["achievements"] = list(flags[0]), list(flags[1])
+        return state
+
+    def _step(self, scene_id, health, flags, command, choices):
+        """Enter the scene, send one command; return (result, state, output, rng)."""
+        state = self._fresh_state(health, flags)
+        io = pirates.MemoryIO()
+        rng = ScriptedRandom(choices)
+        flow = self.scenes[scene_id](pirates.Session(io, state, rng=rng, save_file=None))
+        try:
+            next(flow)
+            io.output.clear()  # entering the scene is the same for every command
+            flow.send(command)
+        except StopIteration as stop:
+            return ("exit", stop.value), state, io.output, rng
+        flow.close()
+        return ("stay", None), state, io.output, rng
+
+    def _outcomes(self, scene_id, health, flags, command):
+        """Yield the step results for every combination of random choices."""
+        pending = [[]]
+        while pending:
+            choices = pending.pop()
+            result = self._step(scene_id, health, flags, command, choices)
+            calls = result[3].calls
+            for depth in range(len(choices), len(calls)):
+                for option in range(1, calls[depth]):
+                    pending.append(choices + [0] * (depth - len(choices)) + [option])
+            yield result
+
+    def expand(self, key):
+        """Fill in the edges out of key; return the states seen for the first time."""
+        scene_id = key[0]
+        discovered = []
+        health, flags = self.states[key]
+        edges = self.edges[key] = {}
+        fallback = self._step(scene_id, health, flags, SENTINEL, [])[2]
+        for command in self.commands:
+            targets = edges.setdefault(command, set())
+            for (kind, next_id), state, output, _ in self._outcomes(scene_id, health, flags, command):
+                if kind == "exit" and next_id is None:
+                    targets.add(None)
+                elif kind == "exit":
+                    if next_id not in self.scenes:
+                        self.missing.add(next_id)
+                        continue
+                    target = self.key(next_id, state)
+                    targets.add(target)
+                    if target not in self.states:
+                        self.states[target] = (state["health"], flags_of(state))
+                        discovered.append(target)
+                elif output != fallback or state["health"] != health or flags_of(state) != flags:
+                    targets.add(key)
+                if kind == "exit" or output != fallback:
+                    self.handled.setdefault(scene_id, set()).add(command)
+            if not targets:
+                del edges[command]
+        return discovered
+
+    def run(self, start, health):
+        state = self._fresh_state(health, ((), ()))
+        first = self.key(start, state)
+        self.states[first] = (health, flags_of(state))
+        queue = deque([first])
+        while queue:
+            queue.extend(self.expand(queue.popleft()))
+        return self
+
+    ############################
+    # Reports
+    ############################
+
+    def reachable_scenes(self):
+        order = {scene_id: n for n, scene_id in enumerate(self.scenes)}
+        return sorted({key[0] for key in self.states}, key=order.__getitem__)
+
+    def dead_ends(self):
+        """States whose only ways out are ending the game or staying put."""
+        return [key for key, edges in self.edges.items()
+                if all(target in (None, key) for targets in edges.values() for target in targets)]
+
+    def endings(self):
+        """(scene id, command) pairs that end the game, other than quitting."""
+        return sorted({(key[0], command) for key, edges in self.edges.items()
+                       for command, targets in edges.items()
+                       if None in targets and command != QUIT})
+
+    def unhandled(self):
+        """command -> scenes (among those reached) that ignore it."""
+        missing = {}
+        for scene_id in self.reachable_scenes():
+            for command in self.commands:
+                if command not in self.handled.get(scene_id, ()):
+                    missing.setdefault(command, []).append(scene_id)
+        return missing
+
+    def scene_graph(self):
+        graph = {scene_id: set() for scene_id in self.reachable_scenes()}
+        for key, edges in self.edges.items():
+            for targets in edges.values():
+                graph[key[0]].update(t[0] for t in targets if t is not None and t[0] != key[0])
+        return graph
+
+    def cycles(self):
+        """Strongly connected groups of scenes that can be revisited, via Tarjan's algorithm."""
+        graph = self.scene_graph()
+        index, low, on_stack, stack, groups = {}, {}, set(), [], []
+        for root in graph:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(graph[root])))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(graph[child]))))
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == index[node]:
+                    group = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        group.append(member)
+                        if member == node:
+                            break
+                    if len(group) > 1:
+                        groups.append(sorted(group, key=index.__getitem__))
+        return groups
+
+def describe(key):
+    scene_id, bucket, flags = key
+    health = "dead" if bucket is None else f"health bucket {bucket}"
+    items = ", ".join(flags[0] + flags[1])
+    return f"{scene_id} ({health}{', ' + items if items else ''})"
+
+def main(argv=None):
+    defaults = pirates.new_game_state()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--start", default="ship_deck", choices=list(pirates.SCENES))
+    parser.add_argument("--health", type=int, default=defaults["health"])
+    parser.add_argument("--combat", type=int, default=defaults["skills"]["combat"])
+    parser.add_argument("--bucket", type=int, default=10, help="health points per bucket")
+    args = parser.parse_args(argv)
+    if args.bucket < 1:
+        parser.error("--bucket must be positive")
+
+    skills = dict(defaults["skills"], combat=args.combat)
+    start = time.perf_counter()
+    explorer = Explorer(bucket=args.bucket, skills=skills).run(args.start, args.health)
+    elapsed = time.perf_counter() - start
+
+    transitions = sum(len(targets) for edges in explorer.edges.values() for targets in edges.values())
+    print(f"explored {len(explorer.states)} states, {transitions} transitions in {elapsed:.2f}s")
+    reachable = explorer.reachable_scenes()
+    print(f"reachable scenes: {', '.join(reachable)}")
+    unreachable = [scene_id for scene_id in explorer.scenes if scene_id not in reachable]
+    if unreachable:
+        print(f"unreachable scenes: {', '.join(unreachable)}")
+    if explorer.missing:
+        print(f"scene ids returned but not defined: {', '.join(sorted(explorer.missing))}")
+    endings = explorer.endings()
+    print("endings other than quit: "
+          + (", ".join(f"{command} in {scene_id}" for scene_id, command in endings) or "none"))
+    dead_ends = explorer.dead_ends()
+    print("dead ends: " + (", ".join(describe(key) for key in dead_ends) or "none"))
+    print("unhandled commands:")
+    for command, scene_ids in explorer.unhandled().items():
+        where = "anywhere" if len(scene_ids) == len(reachable) else "in " + ", ".join(scene_ids)
+        print(f"  {command:<10} not handled {where}")
+    print("cycles (scenes that can all be reached from one another):")
+    for group in explorer.cycles() or [["none"]]:
+        print("  " + ", ".join(group))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Pirate Latitudes multi-session server.
+
+Opens many concurrent telnet-style sessions, plays a scripted loop of
+commands in each, and reports command latency (time from sending a line to
+receiving the next ">> " prompt) as p50/p90/p99.
+
+Usage:
+    python3 pirates.py --server --fast &        # in one terminal
+    python3 loadgen.py --sessions 300           # in another
+    python3 loadgen.py --spawn --sessions 300   # or start a local server itself
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pirates
+
+GAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pirates.py")
+PROMPT = b">> "
+SCRIPT = ["look", "board", "look", "search", "map", "help"]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+async def run_session(host, port, number, commands, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await reader.readuntil(b": ")
+        writer.write(f"Loadgen {number}\r\n".encode())
+        await reader.readuntil(b": ")
+        writer.write(b"4 3 3\r\n")
+        await reader.readuntil(PROMPT)
+        for i in range(commands):
+            start = time.perf_counter()
+            writer.write((SCRIPT[i % len(SCRIPT)] + "\r\n").encode())
+            await writer.drain()
+            await reader.readuntil(PROMPT)
+            latencies.append(time.perf_counter() - start)
+        writer.write(b"quit\r\n")
+        await reader.read()
+    finally:
+        writer.close()
+
+async def run_load(host, port, sessions, commands):
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_session(host, port, n, commands, latencies) for n in range(sessions)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = [r for r in results if isinstance(r, BaseException)]
+    return latencies, elapsed, failures
+
+async def wait_for_server(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default=pirates.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=pirates.SERVER_PORT)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--commands", type=int, default=50, help="commands per session")
+    parser.add_argument("--spawn", action="store_true",
+                        help="start 'pirates.py --server --fast' for the run")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(
+            [sys.executable, GAME, "--server", "--fast",
+             "--host", args.host, "--port", str(args.port)],
+            stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        latencies, elapsed, failures = asyncio.run(
+            run_load(args.host, args.port, args.sessions, args.commands))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"{args.sessions} sessions x {args.commands} commands in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} commands/s, {len(failures)} failed sessions)")
+    for label, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99)):
+        print(f"  {label}: {percentile(latencies, fraction) * 1000:8.2f} ms")
+    if latencies:
+        print(f"  max: {latencies[-1] * 1000:8.2f} ms")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,43 +5,695 @@ Inspired by *Pirate Latitudes* by Michael Crichton.
 All rights to the original text and story belong to Michael Crichton and his estate.
 
 This version uses curses to provide:
-  - A full-screen ASCII intro movie.
+  - A full-screen ASCII intro movie (skippable; played on the first run only).
   - A full-screen main menu using stdscr.
   - A multi-panel UI (header, main, sidebar, input, footer) for gameplay.
   - A cancellable ASCII ending movie.
   - Auto-complete of dialog animations if any key is pressed.
   
-It also includes a unit test suite that verifies (for example) that the command parser
+Its unit test suite (test_pirates.py) verifies, for example, that the command parser
 and journal functions work as expected.
 
 Usage:
     python3 pirates.py        # to run the game
     python3 pirates.py test   # to run the unit tests
+    python3 pirates.py --headless   # to play on plain stdin/stdout, no curses
+    python3 pirates.py --server     # to host many players over telnet (port 8081)
 """
 
+import atexit
+import bisect
+import contextlib
+import copy
 import curses
+import functools
+import itertools
 import time
 import json
+import mmap
 import os
 import random
 import re
 import sys
 import signal
-import unittest
-
-SAVE_FILE = "pirate_latitudes_save.json"
-
-# Global game state
-game_state = {
-    "current_scene": "intro",
-    "name": "Captain Anonymous",
-    "inventory": [],
-    "health": 100,
-    "skills": {"combat": 5, "negotiation": 3, "puzzle": 4},
-    "reputation": 0,
-    "achievements": [],
-    "story_log": []
-}
+import struct
+import threading
+import zlib
+from array import array
+from collections import deque
+
+SAVE_SUFFIX = ".sav"
+SAVE_FILE = "pirate_latitudes_save" + SAVE_SUFFIX
+LEGACY_SAVE_SUFFIX = ".json"  # what saves were named before the binary format
+
+############################
+# Story Log
+############################
+
+RECENT_EVENTS = 256  # story_log events kept in memory; older ones spill to disk
+EVENT_TABLE_LIMIT = 4096  # distinct event texts interned before new ones are stored whole
+RAW_EVENT = 0  # id of the "{}" template that carries uninterned text as its parameter
+
+class EventTable:
+    """
+    Interns story events: every distinct text (or template) gets a small
+    id, shared by all sessions, so a story_log stores ids rather than
+    strings. Once the table holds EVENT_TABLE_LIMIT texts it stops growing
+    and new texts are logged whole as the parameter of RAW_EVENT.
+    """
+
+    def __init__(self, limit=EVENT_TABLE_LIMIT):
+        self.limit = limit
+        self.texts = []
+        self.lines = []  # each text as StoryLog writes it to its spill file
+        self.ids = {}
+        self._lock = threading.Lock()  # the server loads saves on a worker thread
+        self.intern("{}")
+
+    def intern(self, text):
+        """Return the id of text, or None if it is new and the table is full."""
+        event_id = self.ids.get(text)
+        if event_id is not None:
+            return event_id
+        with self._lock:
+            event_id = self.ids.get(text)
+            if event_id is None and len(self.texts) < self.limit:
+                self.texts.append(text)
+                self.lines.append(spill_line(text))
+                event_id = self.ids[text] = len(self.texts) - 1
+        return event_id
+
+def spill_line(text):
+    return text.encode("unicode_escape") + b"\n"  # one event per line
+
+EVENTS = EventTable()
+
+class StoryLog:
+    """
+    The append-only story_log. Events are held as EventTable ids, with the
+    parameters of templated events kept aside by index. Only the newest
+    RECENT_EVENTS events are held in memory; older ones are spilled in
+    batches to an unnamed temporary file and read back by offset. A log
+    decoded from a binary save keeps its compressed blob until something
+    reads an event, so loading and appending stay cheap. The log keeps its
+    JournalIndex, search_index, up to date as events are logged; one that
+    fell behind (a log from an older save) is caught up by indexed().
+    Truncations are remembered in cuts, so savers can tell that events they
+    already wrote out have been replaced (see first_change).
+    """
+
+    def __init__(self, events=(), blob=None, count=0, index=None):
+        self._recent = array("I")  # event ids of the in-memory events
+        self._params = {}  # log index -> parameters of a templated in-memory event
+        self._offsets = array("Q")  # start of each spilled event in the spill file
+        self._spill = None
+        self._blob = blob
+        self._blob_count = count if blob is not None else 0
+        self.search_index = JournalIndex() if index is None else index
+        self.cuts = []  # the length the log was cut back to by each truncation
+        self.extend(events)
+
+    def __len__(self):
+        return self._blob_count + len(self._offsets) + len(self._recent)
+
+    def encoded(self):
+        """Return (blob, count) while the log is exactly what was loaded, else None."""
+        if self._blob is not None and not self._recent:
+            return self._blob, self._blob_count
+        return None
+
+    def _decode(self):
+        events = json.loads(zlib.decompress(self._blob)) + self._recent_events(0, len(self._recent))
+        self._blob, self._blob_count = None, 0
+        self._recent, self._params = array("I"), {}
+        self._extend(events)
+
+    def _push(self, event, params):
+        event_id = EVENTS.intern(event)
+        if event_id is None:
+            event_id, params = RAW_EVENT, (event.format(*params) if params else event,)
+        if params:
+            self._params[len(self)] = params
+        self._recent.append(event_id)
+
+    def append(self, event, *params, scene=None):
+        """
+        Log event; with params it is a str.format template filled in when
+        read. scene is the scene it happened in, for journal searches.
+        """
+        if len(self.search_index) == len(self):
+            self.search_index.add(event.format(*params) if params else event, scene)
+        if self._blob is not None and len(self._recent) >= 2 * RECENT_EVENTS:
+            self._decode()
+        self._push(event, params)
+        if self._blob is None and len(self._recent) >= 2 * RECENT_EVENTS:
+            self._spill_oldest(len(self._recent) - RECENT_EVENTS)
+
+    def extend(self, events, scenes=None):
+        """Log every event in events, with the scene of each if scenes is given."""
+        events = events if isinstance(events, list) else list(events)
+        if len(self.search_index) == len(self):
+            self.search_index.extend(events, scenes)
+        self._extend(events)
+
+    def _extend(self, events):
+        if self._blob is not None:
+            for event in events:
+                self._push(event, ())
+            if len(self._recent) >= 2 * RECENT_EVENTS:
+                self._decode()
+            return
+        ids = EVENTS.ids
+        found = [ids.get(event) for event in events]
+        if None not in found:
+            self._recent.extend(found)  # the usual case: every text already interned
+        else:
+            for event in events:
+                self._push(event, ())
+        if len(self._recent) >= 2 * RECENT_EVENTS:
+            self._spill_oldest(len(self._recent) - RECENT_EVENTS)
+
+    def _recent_events(self, start, stop):
+        """Return the in-memory events at positions start..stop as text."""
+        texts = EVENTS.texts
+        if not self._params:
+            return [texts[event_id] for event_id in self._recent[start:stop]]
+        base = self._blob_count + len(self._offsets)
+        events = []
+        for index, event_id in enumerate(self._recent[start:stop], base + start):
+            params = self._params.get(index)
+            events.append(texts[event_id] if params is None else texts[event_id].format(*params))
+        return events
+
+    def _drop_params(self, start):
+        """Forget the parameters of events from log index start on."""
+        if self._params:
+            self._params = {index: params for index, params in self._params.items() if index < start}
+
+    def _spill_oldest(self, n):
+        if self._spill is None:
+            import tempfile
+            self._spill = tempfile.TemporaryFile()
+        self._spill.seek(0, os.SEEK_END)
+        pos = self._spill.tell()
+        cached, lines = EVENTS.lines, []
+        for index, event_id in enumerate(self._recent[:n], len(self._offsets)):
+            params = self._params.get(index) if self._params else None
+            line = (cached[event_id] if params is None
+                    else spill_line(EVENTS.texts[event_id].format(*params)))
+            self._offsets.append(pos)
+            pos += len(line)
+            lines.append(line)
+        self._spill.write(b"".join(lines))
+        del self._recent[:n]
+        if self._params:
+            spilled = len(self._offsets)
+            self._params = {index: params for index, params in self._params.items() if index >= spilled}
+
+    def _read_spilled(self, start, stop):
+        if start >= stop:
+            return []
+        self._spill.seek(self._offsets[start])
+        end = self._offsets[stop] if stop < len(self._offsets) else None
+        data = self._spill.read() if end is None else self._spill.read(end - self._offsets[start])
+        return [line.decode("unicode_escape") for line in data.splitlines()]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            return self.page(start, stop - start)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("story_log index out of range")
+        return self.page(index, 1)[0]
+
+    def page(self, start, count):
+        """Return up to count events starting at start, touching only that range."""
+        stop = min(len(self), start + max(count, 0))
+        start = max(start, 0)
+        if start >= stop:
+            return []
+        if self._blob is not None:
+            if start >= self._blob_count:
+                return self._recent_events(start - self._blob_count, stop - self._blob_count)
+            self._decode()
+        spilled = len(self._offsets)
+        events = self._read_spilled(start, min(stop, spilled))
+        return events + self._recent_events(max(start - spilled, 0), max(stop - spilled, 0))
+
+    def __iter__(self):
+        if self._blob is not None:
+            self._decode()
+        for start in range(0, len(self._offsets), RECENT_EVENTS):
+            yield from self._read_spilled(start, min(start + RECENT_EVENTS, len(self._offsets)))
+        yield from self._recent_events(0, len(self._recent))
+
+    def __delitem__(self, index):
+        if not (isinstance(index, slice) and index.stop is None and index.step is None):
+            raise TypeError("story_log only supports truncation: del log[n:]")
+        self.truncate(index.indices(len(self))[0])
+
+    def truncate(self, n):
+        """Drop every event from index n on."""
+        if n >= len(self):
+            return
+        self.cuts.append(n)
+        self.search_index.truncate(n)
+        if self._blob is not None:
+            self._decode()
+        self._drop_params(n)
+        spilled = len(self._offsets)
+        if n >= spilled:
+            del self._recent[n - spilled:]
+            return
+        self._spill.truncate(self._offsets[n])
+        del self._offsets[n:]
+        self._recent = array("I")
+
+    def indexed(self):
+        """Return the JournalIndex, first indexing any events it is missing (without scenes)."""
+        for start in range(len(self.search_index), len(self), RECENT_EVENTS):
+            self.search_index.extend(self.page(start, RECENT_EVENTS))
+        return self.search_index
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"StoryLog({len(self)} events)"
+
+def first_change(log, length, cuts_seen):
+    """
+    The first position of log that may differ from when it held length
+    events and len(log.cuts) was cuts_seen: later events, or a truncation.
+    """
+    return min([length, len(log), *getattr(log, "cuts", ())[cuts_seen:]])
+
+# Words too common to search for; they are neither indexed nor looked up.
+JOURNAL_STOPWORDS = frozenset(
+    "a an and are as at be by did do for from had has have how i in is it its me my of on or "
+    "our show that the their there this to was we were what when where which who with you your".split())
+_JOURNAL_WORD = re.compile(r"[a-z0-9]+")
+_JOURNAL_INDEX = struct.Struct("<II")  # events, metadata length
+_JOURNAL_SCENES = struct.Struct("<I")  # length of the scene runs ahead of the saved postings
+
+@functools.lru_cache(maxsize=EVENT_TABLE_LIMIT)
+def journal_words(text):
+    """The searchable words of an event, each once (most events repeat, so this is cached)."""
+    words = dict.fromkeys(word for word in _JOURNAL_WORD.findall(text.lower())
+                          if len(word) > 1 and word not in JOURNAL_STOPWORDS)
+    return tuple(words)
+
+def _little_endian(items):
+    if sys.byteorder == "big":
+        items.byteswap()
+    return items
+
+def _varints(values):
+    """Encode unsigned ints as LEB128 varints: 7 bits a byte, low bits first."""
+    if max(values, default=0) < 0x80:
+        return bytes(values)
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append(value & 0x7F | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+def _read_varints(data):
+    """Decode _varints into an array("I")."""
+    if data.isascii():
+        return array("I", array("B", data))  # every value fits in one byte
+    values, value, shift = array("I"), 0, 0
+    append = values.append
+    for byte in data:
+        if byte < 0x80:
+            append(value | byte << shift)
+            value = shift = 0
+        else:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+    return values
+
+class JournalIndex:
+    """
+    Inverted index over a story_log for journal searches. Events repeat a
+    few texts, so it keeps, for each distinct text and scene it was logged
+    in, the positions of those events, and files each such entry under the
+    words of its text. A query looks its words and scenes up among the
+    entries and leaves the positions where they are (see JournalMatches),
+    so searches cost the same however long the log is. The words of new
+    entries are filed by the next search and matched by prefix through a
+    sorted vocabulary. The scene of every event is also kept, as runs of
+    events logged in one scene. A save holds the runs and the postings,
+    each position list as varint gaps. An index decoded from a save keeps
+    the postings compressed until the first search; events logged
+    meanwhile are filed on their own and put behind the saved positions.
+    """
+
+    __slots__ = ("count", "postings", "words", "vocabulary", "scene_names", "scene_codes",
+                 "runs", "_unfiled", "_filed", "_texts", "_blob", "_saved")
+
+    def __init__(self, blob=None, count=0):
+        self.count = 0
+        self.postings = {}  # (text, scene code) -> array of the positions it was logged at
+        self.words = {}  # word -> set of the postings keys whose text contains it
+        self.vocabulary = []  # the words, sorted; None until a search after a new word
+        self.scene_names = [None]  # scene code -> scene id; 0 is "not known"
+        self.scene_codes = {None: 0}
+        self.runs = array("I")  # scene code, event count, ... for each run of events in one scene
+        self._unfiled = []  # postings keys whose words are not filed yet
+        self._filed = 0  # events in postings; later ones are in the runs only (see _file_events)
+        self._texts = None  # texts(start, stop) -> the text of those events
+        self._blob = None  # the saved postings, compressed until first needed
+        self._saved = None  # (blob, count) as decoded, reused by encoded() while nothing changed
+        if blob is not None:
+            scenes_len, = _JOURNAL_SCENES.unpack_from(blob)
+            start = _JOURNAL_SCENES.size
+            self._read_runs(blob[start:start + scenes_len], count)
+            self._blob = blob[start + scenes_len:]
+            self._filed = count
+            self._saved = blob, count
+
+    def _read_runs(self, blob, count):
+        data = zlib.decompress(blob)
+        saved, meta_len = _JOURNAL_INDEX.unpack_from(data)
+        pos = _JOURNAL_INDEX.size
+        self.scene_names = json.loads(data[pos:pos + meta_len])
+        self.scene_codes = {name: code for code, name in enumerate(self.scene_names)}
+        self.runs = _little_endian(array("I", data[pos + meta_len:]))
+        if saved != count or sum(self.runs[1::2]) != count:
+            raise ValueError("Journal index does not match its events")
+        self.count = count
+
+    @classmethod
+    def from_runs(cls, blob, count, texts):
+        """
+        Decode the scene runs a version 3 save held; the events are filed
+        at the first search, reading them back through texts(start, stop).
+        """
+        index = cls()
+        index._read_runs(blob, count)
+        index._texts = texts
+        return index
+
+    @classmethod
+    def from_postings(cls, blob):
+        """Decode the postings a version 2 save held, scene runs rebuilt from them."""
+        index = cls()
+        data = zlib.decompress(blob)
+        count, meta_len = _JOURNAL_INDEX.unpack_from(data)
+        pos = _JOURNAL_INDEX.size
+        index.scene_names, keys = json.loads(data[pos:pos + meta_len])
+        pos += meta_len
+        sizes = _little_endian(array("I", data[pos:pos + 4 * len(keys)]))
+        positions = _little_endian(array("I", data[pos + 4 * len(keys):]))
+        index.scene_codes = {name: code for code, name in enumerate(index.scene_names)}
+        codes, start = array("I", bytes(4 * count)), 0
+        for (text, code), size in zip(keys, sizes):
+            index.postings[text, code] = positions[start:start + size]
+            for position in index.postings[text, code]:
+                codes[position] = code
+            start += size
+        for code in codes:
+            index._add_to_runs(code)
+        index.count = index._filed = count
+        index._unfiled = list(index.postings)
+        return index
+
+    def __len__(self):
+        return self.count
+
+    def _add_to_runs(self, code):
+        runs = self.runs
+        if runs and runs[-2] == code:
+            runs[-1] += 1
+        else:
+            runs.append(code)
+            runs.append(1)
+
+    def _file(self, text, code, position):
+        positions = self.postings.get((text, code))
+        if positions is None:
+            positions = self.postings[text, code] = array("I")
+            self._unfiled.append((text, code))
+        positions.append(position)
+
+    def add(self, text, scene=None):
+        code = self.scene_codes.get(scene)
+        if code is None:
+            code = self.scene_codes[scene] = len(self.scene_names)
+            self.scene_names.append(scene)
+        self._add_to_runs(code)
+        if self._filed == self.count:
+            self._file(text, code, self.count)
+            self._filed += 1
+        self.count += 1
+
+    def extend(self, texts, scenes=None):
+        for text, scene in zip(texts, scenes or [None] * len(texts)):
+            self.add(text, scene)
+
+    def _file_events(self):
+        """File the events known only by their runs (as from a save) under their texts."""
+        if self._filed == self.count:
+            return
+        start = self._filed
+        for position, text, code in zip(range(start, self.count), self._texts(start, self.count),
+                                        self._codes(start, self.count)):
+            self._file(text, code, position)
+        self._filed = self.count
+
+    def _load(self):
+        """Decode the saved postings, ahead of the positions filed since."""
+        if self._blob is None:
+            return
+        data = zlib.decompress(self._blob)
+        self._blob = None
+        count, meta_len = _JOURNAL_INDEX.unpack_from(data)
+        pos = _JOURNAL_INDEX.size
+        keys = json.loads(data[pos:pos + meta_len])
+        values, i = _read_varints(data[pos + meta_len:]), 0
+        for text, code in keys:
+            size = values[i]
+            positions = array("I", itertools.accumulate(values[i + 1:i + 1 + size]))
+            i += 1 + size
+            later = self.postings.get((text, code))
+            if later is None:
+                self._unfiled.append((text, code))
+            else:
+                positions.extend(later)
+            self.postings[text, code] = positions
+
+    def _file_words(self):
+        for key in self._unfiled:
+            for word in journal_words(key[0]):
+                keys = self.words.get(word)
+                if keys is None:
+                    keys = self.words[word] = set()
+                    self.vocabulary = None
+                keys.add(key)
+        self._unfiled = []
+
+    def encoded(self):
+        """Return (blob, count) for a save, reusing the decoded blob while nothing was added."""
+        if self._blob is not None and self._saved[1] == self.count:
+            return self._saved
+        self._load()
+        self._file_events()
+        meta = json.dumps(self.scene_names).encode("utf-8")
+        runs = _little_endian(array("I", self.runs)).tobytes()
+        scenes = zlib.compress(_JOURNAL_INDEX.pack(self.count, len(meta)) + meta + runs)
+        keys = list(self.postings)
+        values = []
+        for key in keys:
+            positions = self.postings[key]
+            values.append(len(positions))
+            values.append(positions[0])
+            values.extend(map(int.__sub__, positions[1:], positions))
+        meta = json.dumps(keys).encode("utf-8")
+        postings = zlib.compress(_JOURNAL_INDEX.pack(self.count, len(meta)) + meta + _varints(values))
+        return _JOURNAL_SCENES.pack(len(scenes)) + scenes + postings, self.count
+
+    def truncate(self, n):
+        """Forget the events from position n on (the log was cut back)."""
+        if n >= self.count:
+            return
+        self._load()
+        if n < self._filed:
+            for key, positions in list(self.postings.items()):
+                del positions[bisect.bisect_left(positions, n):]
+                if positions:
+                    continue
+                del self.postings[key]
+                for word in journal_words(key[0]):
+                    keys = self.words.get(word)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del self.words[word]
+                            self.vocabulary = None
+            self._unfiled = [key for key in self._unfiled if key in self.postings]
+            self._filed = n
+        runs, excess = self.runs, self.count - n
+        while excess:
+            if runs[-1] <= excess:
+                excess -= runs[-1]
+                del runs[-2:]
+            else:
+                runs[-1] -= excess
+                excess = 0
+        self.count = n
+
+    def _codes(self, start, stop):
+        """The scene codes of the events at positions start..stop, read off the runs from the end."""
+        runs, found, end = self.runs, [], self.count
+        for i in range(len(runs) - 2, -1, -2):
+            if end <= start:
+                break
+            begin = end - runs[i + 1]
+            if begin < stop:
+                found.append((runs[i], min(end, stop) - max(begin, start)))
+            end = begin
+        return [code for code, n in reversed(found) for _ in range(n)]
+
+    def scenes_of(self, start, stop):
+        """The scene ids of the events at positions start..stop (None where not known)."""
+        names = self.scene_names
+        return [names[code] for code in self._codes(start, min(stop, self.count))]
+
+    def matching_scenes(self, name):
+        """Codes of the scenes logged so far whose id contains name ('storm', 'deck', ...)."""
+        name = name.lower().replace(" ", "_")
+        return [code for code, scene in enumerate(self.scene_names) if scene and name in scene]
+
+    def _keys_with(self, term):
+        """The postings keys whose text has a word starting with term."""
+        if self._unfiled:
+            self._file_words()
+        if self.vocabulary is None:
+            self.vocabulary = sorted(self.words)
+        vocabulary = self.vocabulary
+        start = bisect.bisect_left(vocabulary, term)
+        stop = bisect.bisect_left(vocabulary, term + "￿", start)
+        return set().union(*(self.words[word] for word in vocabulary[start:stop]))
+
+    def search(self, terms, scenes=None):
+        """
+        Return [(scene id, positions)] for the events whose text contains
+        every term (as a word prefix) and that were logged in one of the
+        scene codes given (any scene if scenes is None). If no event has
+        every term, those with the most of them are returned instead.
+        """
+        self._load()
+        self._file_events()
+        if not terms:
+            keys = [key for key in self.postings if scenes is not None and key[1] in scenes]
+        else:
+            counts = {}
+            for term in terms:
+                for key in self._keys_with(term):
+                    if scenes is None or key[1] in scenes:
+                        counts[key] = counts.get(key, 0) + 1
+            best = max(counts.values(), default=0)
+            keys = [key for key, n in counts.items() if n == best]
+        return [(self.scene_names[key[1]], self.postings[key]) for key in keys]
+
+############################
+# Game State
+############################
+
+class GameState:
+    """
+    One captain's state. The fields are slots, read and set as attributes
+    in the game code. It still behaves as the mapping the save formats and
+    older callers expect (state["health"], items(), update(), ...), and
+    keys outside the fields, e.g. from a newer save, are kept in extra and
+    written back out.
+    """
+
+    __slots__ = ("current_scene", "name", "inventory", "health", "skills",
+                 "reputation", "achievements", "story_log", "extra")
+    FIELDS = __slots__[:-1]
+    _FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, fields=(), **more):
+        self.clear()
+        self.update(fields, **more)
+
+    def clear(self):
+        """Reset to a new captain (unlike dict.clear, the fields stay)."""
+        self.current_scene = "intro"
+        self.name = "Captain Anonymous"
+        self.inventory = []
+        self.health = 100
+        self.skills = {"combat": 5, "negotiation": 3, "puzzle": 4}
+        self.reputation = 0
+        self.achievements = []
+        self.story_log = StoryLog()
+        self.extra = {}
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in self._FIELD_SET or key in self.extra
+
+    def keys(self):
+        return list(self.FIELDS) + list(self.extra)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.FIELDS) + len(self.extra)
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def update(self, fields=(), **more):
+        pairs = fields.items() if hasattr(fields, "items") else fields
+        for key, value in pairs:
+            self[key] = value
+        for key, value in more.items():
+            self[key] = value
+
+    def __eq__(self, other):
+        try:
+            return dict(self.items()) == dict(other.items())
+        except AttributeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"GameState({self.name!r}, {self.current_scene!r}, health={self.health})"
+
+def new_game_state():
+    """Return a fresh game state for a new captain."""
+    return GameState()
+
+# Global game state (the single local player; server sessions get their own)
+game_state = new_game_state()
 
 # Random pirate phrases for empty input
 PIRATE_EMPTY_MESSAGES = [
@@ -51,6 +703,286 @@ PIRATE_EMPTY_MESSAGES = [
     "Yo-ho-ho, say something, ye scallywag!"
 ]
 
+############################
+# Metrics
+############################
+
+# Functions timed while metrics are enabled. Enabling swaps timing wrappers
+# into this module's namespace and disabling puts the originals back, so
+# with metrics off the hot paths run exactly as written, at no cost.
+INSTRUMENTED = ("parse_command", "curses_slow_print", "update_header", "update_footer",
+                "update_sidebar", "save_game", "load_game")
+METRICS_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+_BUCKET_NS = tuple(round(bound * 1e9) for bound in METRICS_BUCKETS)
+
+class Histogram:
+    """Latency histogram over METRICS_BUCKETS (upper bounds in seconds), kept in nanoseconds."""
+
+    __slots__ = ("counts", "total_ns")
+
+    def __init__(self):
+        self.counts = [0] * (len(METRICS_BUCKETS) + 1)  # the last one is +Inf
+        self.total_ns = 0
+
+    @property
+    def total(self):
+        return self.total_ns / 1e9
+
+    def observe(self, seconds):
+        self.observe_ns(round(seconds * 1e9))
+
+    def observe_ns(self, ns):
+        self.counts[bisect.bisect_left(_BUCKET_NS, ns)] += 1
+        self.total_ns += ns
+
+    def cumulative(self):
+        """(upper bound label, calls at or under it) pairs, as Prometheus buckets count."""
+        running, pairs = 0, []
+        for bound, count in zip(METRICS_BUCKETS + (float("inf"),), self.counts):
+            running += count
+            pairs.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return pairs
+
+class Metrics:
+    """Call latency histograms for INSTRUMENTED plus a count of each command parsed."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.commands = {}
+        self.originals = {}
+
+    @property
+    def enabled(self):
+        return bool(self.originals)
+
+    def enable(self):
+        namespace = globals()
+        for name in INSTRUMENTED:
+            if name not in self.originals:
+                self.originals[name] = namespace[name]
+                namespace[name] = self._timed(name, namespace[name])
+
+    def disable(self):
+        globals().update(self.originals)
+        self.originals = {}
+
+    def _timed(self, name, func):
+        # Called on every command, so the wrapper does as little as it can:
+        # integer nanoseconds, one bisect over integer bounds, no method calls.
+        histogram = self.histograms.setdefault(name, Histogram())
+        counts, bounds, clock, find = histogram.counts, _BUCKET_NS, time.perf_counter_ns, bisect.bisect_left
+
+        if name == "parse_command":
+            commands = self.commands
+
+            @functools.wraps(func)
+            def timed(user_input):
+                start = clock()
+                result = func(user_input)
+                ns = clock() - start
+                counts[find(bounds, ns)] += 1
+                histogram.total_ns += ns
+                commands[result] = commands.get(result, 0) + 1
+                return result
+            return timed
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                ns = clock() - start
+                counts[find(bounds, ns)] += 1
+                histogram.total_ns += ns
+        return timed
+
+    def to_prometheus(self):
+        lines = ["# HELP pirates_call_seconds Latency of instrumented game functions.",
+                 "# TYPE pirates_call_seconds histogram"]
+        for name, histogram in sorted(self.histograms.items()):
+            for bound, count in histogram.cumulative():
+                lines.append(f'pirates_call_seconds_bucket{{function="{name}",le="{bound}"}} {count}')
+            lines.append(f'pirates_call_seconds_sum{{function="{name}"}} {histogram.total!r}')
+            lines.append(f'pirates_call_seconds_count{{function="{name}"}} {sum(histogram.counts)}')
+        lines += ["# HELP pirates_commands_total Commands parsed, by result.",
+                  "# TYPE pirates_commands_total counter"]
+        for command, count in sorted(self.commands.items()):
+            label = json.dumps(command)  # quotes and escapes like a Prometheus label value
+            lines.append(f"pirates_commands_total{{command={label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        return json.dumps({
+            "functions": {name: {"count": sum(h.counts), "sum": h.total, "buckets": dict(h.cumulative())}
+                          for name, h in sorted(self.histograms.items())},
+            "commands": dict(sorted(self.commands.items())),
+        }, indent=1)
+
+    def write(self, path):
+        """Write the metrics to path: JSON for a .json path, Prometheus text otherwise."""
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+METRICS = Metrics()
+
+def start_metrics(path):
+    """Enable metrics, written to path at exit and whenever the process gets SIGUSR1."""
+    METRICS.enable()
+    atexit.register(METRICS.write, path)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: METRICS.write(path))
+
+############################
+# Story Text Catalog
+############################
+
+# Story text lives in one catalog file per game (text/story.plt), compiled
+# from one source per language (text/<language>.txt, see --compile-text).
+# The catalog is memory-mapped on first use and each text is decoded the
+# first time it is shown, so neither import time nor memory grows with the
+# story, and only the pages of the language in use are ever read.
+# Catalog layout (little-endian), version 1:
+#   prefix     magic "PLTX", version u16, language count u16
+#   languages  per language: code 8s, entry count u32, index offset u32
+#   index      per language, sorted by key: key offset u32, key length u16,
+#              text offset u32, text length u32
+#   strings    the UTF-8 keys and texts the index points at
+CATALOG_MAGIC = b"PLTX"
+CATALOG_VERSION = 1
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "text", "story.plt")
+DEFAULT_LANGUAGE = "en"  # also where keys missing from another language come from
+_CATALOG_PREFIX = struct.Struct("<4sHH")
+_CATALOG_LANGUAGE = struct.Struct("<8sII")
+_CATALOG_ENTRY = struct.Struct("<IHII")
+
+def read_text_source(path):
+    """Return {key: text} from a catalog source: '@@ <key>' lines, each followed by its text."""
+    entries, key, lines = {}, None, []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("@@"):
+                if key is not None:
+                    entries[key] = "\n".join(lines).rstrip("\n")
+                key, lines = line[2:].strip(), []
+            elif key is not None:
+                lines.append(line)
+    if key is not None:
+        entries[key] = "\n".join(lines).rstrip("\n")
+    return entries
+
+def compile_text(*paths):
+    """Compile text/<language>.txt sources (the last path is the output) into one catalog."""
+    *sources, out_path = paths
+    languages = [(os.path.splitext(os.path.basename(source))[0], read_text_source(source))
+                 for source in sources]
+    strings = bytearray()
+    tables = []
+    start = _CATALOG_PREFIX.size + _CATALOG_LANGUAGE.size * len(languages)
+    index_size = sum(_CATALOG_ENTRY.size * len(entries) for _, entries in languages)
+    for _, entries in languages:
+        table = []
+        for key in sorted(entries, key=lambda key: key.encode("utf-8")):
+            key_bytes, text_bytes = key.encode("utf-8"), entries[key].encode("utf-8")
+            key_offset = start + index_size + len(strings)
+            strings += key_bytes
+            table.append(_CATALOG_ENTRY.pack(key_offset, len(key_bytes),
+                                             start + index_size + len(strings), len(text_bytes)))
+            strings += text_bytes
+        tables.append(table)
+    header = bytearray(_CATALOG_PREFIX.pack(CATALOG_MAGIC, CATALOG_VERSION, len(languages)))
+    offset = start
+    for (code, entries), table in zip(languages, tables):
+        header += _CATALOG_LANGUAGE.pack(code.encode("ascii"), len(table), offset)
+        offset += _CATALOG_ENTRY.size * len(table)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header + b"".join(b"".join(table) for table in tables) + strings)
+    os.replace(tmp_path, out_path)
+    counts = ", ".join(f"{len(entries)} {code}" for code, entries in languages)
+    return f"Compiled {counts} texts into {out_path}."
+
+class TextCatalog:
+    """Lazily opened, memory-mapped story text in one or more languages."""
+
+    def __init__(self, path=CATALOG_FILE, language=DEFAULT_LANGUAGE):
+        self.path = path
+        self.language = language
+        self._map = None
+        self._languages = None  # code -> (entry count, index offset)
+        self._texts = {}        # key -> decoded text in self.language
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _CATALOG_PREFIX.unpack_from(self._map)
+        if magic != CATALOG_MAGIC or version != CATALOG_VERSION:
+            raise ValueError(f"{self.path} is not a version {CATALOG_VERSION} story catalog")
+        self._languages = {}
+        for n in range(count):
+            code, entries, offset = _CATALOG_LANGUAGE.unpack_from(
+                self._map, _CATALOG_PREFIX.size + n * _CATALOG_LANGUAGE.size)
+            self._languages[code.rstrip(b"\0").decode("ascii")] = (entries, offset)
+
+    def languages(self):
+        if self._languages is None:
+            self._open()
+        return list(self._languages)
+
+    def set_language(self, language):
+        if language not in self.languages():
+            raise ValueError(f"No '{language}' text in {self.path}")
+        self.language = language
+        self._texts = {}
+
+    def get(self, key):
+        text = self._texts.get(key)
+        if text is None:
+            text = self._find(self.language, key)
+            if text is None and self.language != DEFAULT_LANGUAGE:
+                text = self._find(DEFAULT_LANGUAGE, key)
+            if text is None:
+                raise KeyError(f"No story text for '{key}'")
+            self._texts[key] = text
+        return text
+
+    def _find(self, language, key):
+        """Binary-search the language's index in the mapped file; decode only the match."""
+        if self._languages is None:
+            self._open()
+        if language not in self._languages:
+            return None
+        target, data = key.encode("utf-8"), self._map
+        count, offset = self._languages[language]
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_len, text_offset, text_len = _CATALOG_ENTRY.unpack_from(
+                data, offset + middle * _CATALOG_ENTRY.size)
+            probe = data[key_offset:key_offset + key_len]
+            if probe == target:
+                return data[text_offset:text_offset + text_len].decode("utf-8")
+            if probe < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+CATALOG = TextCatalog()
+
+def story_text(key, **fields):
+    """The catalog text for key ("<scene>.<message id>"), with any {fields} filled in."""
+    text = CATALOG.get(key)
+    return text.format(**fields) if fields else text
+
+def help_screen_text():
+    """The help text as the full-screen help shows it, with its way back."""
+    return story_text("help.commands") + "\n\n" + story_text("help.return")
+
 ############################
 # Curses UI Layout Setup
 ############################
@@ -66,277 +998,1318 @@ def init_windows(stdscr):
     main_height = height - header_height - input_height - footer_height
     main_width = width - sidebar_width
 
-    header_win = curses.newwin(header_height, width, 0, 0)
-    main_win = curses.newwin(main_height, main_width, header_height, 0)
-    sidebar_win = curses.newwin(main_height, sidebar_width, header_height, main_width)
-    input_win = curses.newwin(input_height, width, header_height + main_height, 0)
-    footer_win = curses.newwin(footer_height, width, height - footer_height, 0)
+    newwin = getattr(stdscr, "newwin", curses.newwin)  # a Screen hands out its own windows
+    header_win = newwin(header_height, width, 0, 0)
+    main_win = newwin(main_height, main_width, header_height, 0)
+    sidebar_win = newwin(main_height, sidebar_width, header_height, main_width)
+    input_win = newwin(input_height, width, header_height + main_height, 0)
+    footer_win = newwin(footer_height, width, height - footer_height, 0)
 
     main_win.scrollok(True)
     return header_win, main_win, sidebar_win, input_win, footer_win
 
-def update_header(header_win):
+# The panel drawing functions below only stage their window with
+# noutrefresh(); PanelRenderer (or the caller) flushes with curses.doupdate().
+
+def update_header(header_win, state=None):
     """Update the header bar with game title and status info."""
-    header_win.clear()
+    if state is None:
+        state = game_state
+    header_win.erase()
     title = "Pirate Latitudes: Ultimate Epic Adventure"
-    status = f"Health: {game_state['health']}  Reputation: {game_state['reputation']}"
+    status = f"Health: {state.health}  Reputation: {state.reputation}"
     header_win.addstr(0, 2, title, curses.A_BOLD)
     header_win.addstr(1, 2, status)
-    header_win.hline(2, 0, curses.ACS_HLINE, header_win.getmaxyx()[1])
-    header_win.refresh()
+    # ACS_HLINE only exists once curses owns a terminal; a Screen draws "-".
+    header_win.hline(2, 0, getattr(curses, "ACS_HLINE", ord("-")), header_win.getmaxyx()[1])
+    header_win.noutrefresh()
 
 def update_footer(footer_win):
     """Update the footer bar (for hints or extra info)."""
-    footer_win.clear()
+    footer_win.erase()
     footer_win.addstr(0, 2, "Type 'help' for commands.")
-    footer_win.refresh()
+    footer_win.noutrefresh()
 
 def update_sidebar(sidebar_win):
     """Display an ASCII map in the sidebar window."""
-    sidebar_win.clear()
-    ascii_map = (
-        " ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~\n"
-        " |         SEA OF MYSTERY        |\n"
-        " |   [Ship Deck] --- [Open Sea]    |\n"
-        " |         |                     |\n"
-        " |   [Below Deck] --- [Crew Qtrs]  |\n"
-        " |                             |\n"
-        " |  [Island Approach] --- [Jungle]|\n"
-        " |                             |\n"
-        " |   [Fortress] --- [Treasure]   |\n"
-        " ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~ ~\n"
-    )
-    sidebar_win.addstr(0, 0, ascii_map)
+    sidebar_win.erase()
+    sidebar_win.addstr(0, 0, story_text("map.sidebar"))
     sidebar_win.box()
-    sidebar_win.refresh()
+    sidebar_win.noutrefresh()
+
+class PanelRenderer:
+    """
+    Owns the init_windows layout and redraws the header, sidebar and footer
+    only when what they show has changed: the header when health or
+    reputation moves, the static sidebar map and footer only after the
+    layout is (re)built. Each frame stages the dirty windows and sends them
+    to the terminal with a single doupdate. A changed terminal size rebuilds
+    the layout.
+    """
+
+    def __init__(self, stdscr, state=None, track_resize=True):
+        self.stdscr = stdscr
+        self.state = game_state if state is None else state
+        self.track_resize = track_resize
+        self.layout()
+
+    def layout(self):
+        self.size = self.stdscr.getmaxyx()
+        self.windows = init_windows(self.stdscr)
+        self.header_status = None
+        self.static_dirty = True
+
+    def check_resize(self):
+        """Rebuild the layout if the terminal no longer matches it; True if it did."""
+        if not self.track_resize:
+            return False
+        try:
+            columns, lines = os.get_terminal_size()
+        except OSError:
+            return False
+        if (lines, columns) == self.size:
+            return False
+        curses.resizeterm(lines, columns)
+        self.stdscr.erase()
+        self.stdscr.noutrefresh()
+        self.layout()
+        return True
+
+    def render(self):
+        """Stage whatever is dirty and flush the frame; return how many panels were drawn."""
+        self.check_resize()
+        header_win, _, sidebar_win, _, footer_win = self.windows
+        drawn = 0
+        status = (self.state.health, self.state.reputation)
+        if status != self.header_status:
+            update_header(header_win, self.state)
+            self.header_status = status
+            drawn += 1
+        if self.static_dirty:
+            update_sidebar(sidebar_win)
+            update_footer(footer_win)
+            self.static_dirty = False
+            drawn += 2
+        if drawn:
+            self.flush()
+        return drawn
+
+    def flush(self):
+        """Send the staged windows to the terminal."""
+        curses.doupdate()
 
 ############################
 # Enhanced Slow Print with Auto-Complete
 ############################
 
-def curses_slow_print(win, text, delay=0.05):
+ANIMATION_FPS = 30
+TEXT_SPEED = 1.0  # scales every per-character delay; 0 prints text instantly
+
+def _add_text(win, text):
+    try:
+        win.addstr(text)
+    except curses.error:
+        pass
+
+class TextAnimator:
     """
-    Print text slowly (character-by-character) in the given window.
-    If any key is pressed during printing, auto-complete the rest of the text immediately.
+    Reveals text in one or more windows at once on a fixed frame schedule.
+    Each frame works out from the elapsed time how many characters every
+    animation should be showing by now, writes them in one addstr per window
+    and flushes everything with a single doupdate. Texts queued for the same
+    window play one after the other; different windows animate together.
+    A keypress completes every animation immediately. Given an InputLoop,
+    the animator waits through it, so keys typed meanwhile are kept as
+    type-ahead rather than thrown away, and text queued while complete
+    commands are waiting is shown at once.
     """
-    # Set window to non-blocking mode
-    win.nodelay(True)
-    for i, ch in enumerate(text):
+
+    def __init__(self, fps=ANIMATION_FPS, speed=None, clock=time.monotonic, sleep=time.sleep, keys=None):
+        self.frame_time = 1.0 / fps
+        self.speed = TEXT_SPEED if speed is None else speed
+        self.clock = clock
+        self.sleep = sleep if keys is None else keys.wait
+        self.keys = keys
+        self.queues = {}  # window -> list of [text, seconds per character]
+
+    def add(self, win, text, delay=0.05):
+        self.queues.setdefault(win, []).append([text, delay * self.speed])
+
+    def run(self):
+        """Play every queued text to the end; return the number of frames drawn."""
+        if not self.queues:
+            return 0
+        windows = list(self.queues)
+        key_win = windows[0]
+        key_win.nodelay(True)
+        keypresses = self.keys.keypresses if self.keys is not None else 0
         try:
-            win.addstr(ch)
-        except curses.error:
-            pass
-        win.refresh()
-        # Check if a key was pressed; if so, print the remainder instantly.
-        if win.getch() != -1:
-            remaining = text[i+1:]
-            try:
-                win.addstr(remaining)
-            except curses.error:
-                pass
-            win.refresh()
-            break
-        time.sleep(delay)
-    win.addstr("\n")
-    win.refresh()
-    win.nodelay(False)
+            frames = 0
+            start = self.clock()
+            # Per window: index of the current text, characters shown, its start time.
+            progress = {win: [0, 0, start] for win in windows}
+            while progress:
+                now = self.clock()
+                if self.keys is not None:
+                    self.keys.poll()
+                    # Commands already typed ahead fast-forward the narration too.
+                    skip = self.keys.keypresses != keypresses or bool(self.keys.lines)
+                else:
+                    skip = key_win.getch() != -1
+                for win in list(progress):
+                    self._advance(win, progress, now, skip)
+                    win.noutrefresh()
+                curses.doupdate()
+                frames += 1
+                if progress:
+                    self.sleep(max(0.0, start + frames * self.frame_time - self.clock()))
+            return frames
+        finally:
+            key_win.nodelay(False)
+            self.queues = {}
 
-def curses_get_input(win, prompt=">> "):
+    def _advance(self, win, progress, now, skip):
+        queue = self.queues[win]
+        index, shown, began = progress[win]
+        while index < len(queue):
+            text, delay = queue[index]
+            due = len(text) if skip or delay <= 0 else int((now - began) / delay)
+            if due < len(text):
+                _add_text(win, text[shown:due])
+                progress[win] = [index, max(shown, due), began]
+                return
+            _add_text(win, text[shown:])
+            began = began + len(text) * delay if not skip else now
+            index, shown = index + 1, 0
+        del progress[win]
+
+def curses_slow_print(win, text, delay=0.05, keys=None):
     """
-    Clear the input window, display a prompt, and get user input.
-    If the user presses Enter with no input, return a random pirate phrase.
+    Print text slowly in the given window, a frame's worth of characters at
+    a time. If any key is pressed during printing, auto-complete the rest of
+    the text immediately (keeping the key as type-ahead when keys, an
+    InputLoop, is given).
     """
-    win.clear()
-    win.addstr(0, 0, prompt)
-    win.refresh()
-    curses.echo()
-    inp = win.getstr().decode("utf-8").strip()
-    curses.noecho()
-    if not inp:
-        return random.choice(PIRATE_EMPTY_MESSAGES)
-    return inp
-
-############################
-# ASCII Intro Movie
-############################
-
-def ascii_intro_movie(stdscr):
-    """Display a series of ASCII art frames as an intro movie."""
-    frames = [
-r"""
-   _____  _           _        _      _ 
-  |  __ \| |         | |      | |    | |
-  | |__) | |__   __ _| |_ __ _| | ___| |
-  |  ___/| '_ \ / _` | __/ _` | |/ _ \ |
-  | |    | | | | (_| | || (_| | |  __/_|
-  |_|    |_| |_|\__,_|\__\__,_|_|\___(_)
-
-         ~  ~  ~  ~  ~  ~  ~  ~  ~  ~ 
-       ~       PIRATE LATITUDES        ~
-         ~  ~  ~  ~  ~  ~  ~  ~  ~  ~ 
-""",
-r"""
-         _________
-        /         \
-       /  PIRATE   \
-      |  LATITUDES  |
-       \           /
-        \_________/
-    
-         ~  ~  ~  ~  ~  ~ 
-       ~  Welcome Aboard  ~
-         ~  ~  ~  ~  ~  ~ 
-""",
-r"""
-              |    |    |
-             )_)  )_)  )_)
-            )___))___))___)\
-           )____)____)_____)\\
-         _____|____|____|____\\\__
----------\                   /---------
-  ^^^^^ ^^^^^^^^^^^^^^^^^^^^^
-"""
-    ]
-    stdscr.clear()
-    height, width = stdscr.getmaxyx()
-    for frame in frames:
-        stdscr.clear()
-        lines = frame.splitlines()
-        start_y = (height - len(lines)) // 2
-        for i, line in enumerate(lines):
-            x = max((width - len(line)) // 2, 0)
-            try:
-                stdscr.addstr(start_y + i, x, line)
-            except curses.error:
-                pass
-        stdscr.refresh()
-        time.sleep(2)
-    stdscr.clear()
-    stdscr.refresh()
+    animator = TextAnimator(keys=keys)
+    animator.add(win, text + "\n", delay)
+    animator.run()
 
 ############################
-# ASCII Ending Movie (Cancellable)
+# Event-Loop Keyboard Input
 ############################
 
-def ascii_ending_movie(stdscr):
+ENTER_KEYS = ("\n", "\r", curses.KEY_ENTER)
+BACKSPACE_KEYS = ("\b", "\x7f", curses.KEY_BACKSPACE)
+
+class InputLoop:
     """
-    Display a series of ASCII art frames as an ending movie.
-    If any key is pressed during the animation, end the movie early.
+    The one place gameplay reads the keyboard. Whenever the game waits, for
+    a command, an animation frame or a movie, it waits here, and every key
+    that arrives goes into a line editor drawn in the input window.
+    Completed lines queue up, so commands typed while text is still
+    animating run next instead of being lost.
     """
-    frames = [
-r"""
-          _______
-         /       \
-        |  THE    |
-        |  END    |
-         \_______/
-""",
-r"""
-        ~~~~~~~~~~~~~~~~~~~~
-       ~   Farewell, brave   ~
-       ~       pirate!       ~
-        ~~~~~~~~~~~~~~~~~~~~
-""",
-r"""
-        ~  ~  ~  ~  ~  ~  ~  ~
-     ~                       ~
-   ~  THE JOURNEY LIVES ON!    ~
-     ~                       ~
-        ~  ~  ~  ~  ~  ~  ~  ~
-"""
-    ]
-    stdscr.nodelay(True)  # Enable non-blocking input
-    stdscr.clear()
-    height, width = stdscr.getmaxyx()
-    for frame in frames:
-        stdscr.clear()
-        lines = frame.splitlines()
-        start_y = (height - len(lines)) // 2
-        for i, line in enumerate(lines):
-            x = max((width - len(line)) // 2, 0)
-            try:
-                stdscr.addstr(start_y + i, x, line)
-            except curses.error:
-                pass
-        stdscr.refresh()
-        # Wait for 2 seconds or break early if any key is pressed.
-        for _ in range(20):
-            if stdscr.getch() != -1:
-                stdscr.nodelay(False)
+
+    def __init__(self, window_source, poll_interval=0.05):
+        self.window_source = window_source  # returns the current input window
+        self.poll_interval = poll_interval
+        self.prompt = ">> "
+        self.buffer = []
+        self.lines = deque()
+        self.keypresses = 0  # total keys seen; animations watch it to skip ahead
+        self._keypad_win = None
+
+    def _window(self):
+        win = self.window_source()
+        if win is not self._keypad_win:
+            win.keypad(True)
+            self._keypad_win = win
+        return win
+
+    def poll(self, timeout=0.0):
+        """Take every key available (waiting up to timeout for the first); return how many."""
+        win = self._window()
+        win.timeout(max(int(timeout * 1000), 0))
+        count = 0
+        try:
+            while True:
+                try:
+                    key = win.get_wch()
+                except curses.error:
+                    break
+                count += 1
+                self.handle_key(key)
+                win.timeout(0)
+        finally:
+            win.timeout(-1)
+        if count:
+            self.keypresses += count
+            self.draw()
+        return count
+
+    def handle_key(self, key):
+        if key in ENTER_KEYS:
+            self.lines.append("".join(self.buffer).strip())
+            self.buffer = []
+        elif key in BACKSPACE_KEYS:
+            if self.buffer:
+                self.buffer.pop()
+        elif isinstance(key, str) and key.isprintable():
+            self.buffer.append(key)
+
+    def draw(self):
+        win = self.window_source()
+        win.erase()
+        try:
+            win.addstr(0, 0, self.prompt + "".join(self.buffer))
+        except curses.error:
+            pass
+        win.noutrefresh()
+        curses.doupdate()
+
+    def wait(self, seconds):
+        """Sleep for seconds while still collecting keys."""
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 return
-            time.sleep(0.1)
-    stdscr.nodelay(False)
-    stdscr.clear()
+            self.poll(min(remaining, self.poll_interval))
+
+    def read_line(self, prompt=">> "):
+        """Return the next complete line, typed ahead or typed now."""
+        self.prompt = prompt
+        self.draw()
+        while not self.lines:
+            self.poll(self.poll_interval)
+        line = self.lines.popleft()
+        self.draw()
+        return line
+
+    def read_key(self):
+        """
+        Block for the next key and return it, for screens that scroll with
+        special keys (the journal). Text keys still go to the line editor,
+        so what the player types there stays queued in order; a bare Enter
+        only dismisses.
+        """
+        win = self._window()
+        win.timeout(int(self.poll_interval * 1000))
+        try:
+            while True:
+                try:
+                    key = win.get_wch()
+                    break
+                except curses.error:
+                    continue
+        finally:
+            win.timeout(-1)
+        self.keypresses += 1
+        if key not in ENTER_KEYS or self.buffer:
+            self.handle_key(key)
+            self.draw()
+        return key
+
+    def wait_key(self):
+        """Block until a key is pressed; keys already typed ahead count."""
+        if self.lines or self.buffer:
+            return
+        keypresses = self.keypresses
+        while self.keypresses == keypresses:
+            self.poll(self.poll_interval)
+        # "Press any key" should not leave that key behind as type-ahead.
+        if self.buffer and self.keypresses == keypresses + 1:
+            self.buffer.pop()
+            self.draw()
+
+############################
+# Streamed ASCII Movies
+############################
+
+# Movie files (.plm) are line-oriented UTF-8 text so they can be streamed:
+#   PLMOVIE <version> <width> <height>
+#   F <seconds on screen>             starts a frame
+#   <row> <col> <JSON string>         a run of cells that differ from the
+#                                     previous frame (spaces erase)
+# Frames are laid out on a fixed canvas with every line centered, and the
+# player centers the canvas once, so each frame costs only its changed runs.
+# Sources are plain text, one '%% <seconds>' line before each frame; compile
+# them with --compile-movie.
+MOVIE_MAGIC = "PLMOVIE"
+MOVIE_VERSION = 1
+MOVIE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "movies")
+INTRO_MOVIE = os.path.join(MOVIE_DIR, "intro.plm")
+INTRO_SEEN_FILE = "intro_seen"  # marks the intro as watched, in the save directory
+ENDING_MOVIE = os.path.join(MOVIE_DIR, "ending.plm")
+MOVIE_RUN_GAP = 3  # merge changed runs separated by fewer unchanged cells
+
+def read_movie_source(path):
+    """Yield (seconds, lines) for each frame of a '%%'-separated movie source."""
+    frame = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("%%"):
+                if frame is not None:
+                    yield frame
+                frame = (float(line[2:]), [])
+            elif frame is not None:
+                frame[1].append(line)
+    if frame is not None:
+        yield frame
+
+def _changed_runs(old, new):
+    """Return (col, text) runs where row string new differs from old (same length)."""
+    runs = []
+    col, width = 0, len(new)
+    while col < width:
+        if old[col] == new[col]:
+            col += 1
+            continue
+        start = end = col
+        while col < width:
+            if old[col] != new[col]:
+                end = col = col + 1
+            elif col - end >= MOVIE_RUN_GAP:
+                break
+            else:
+                col += 1
+        runs.append((start, new[start:end]))
+    return runs
+
+def movie_from_source(source_path):
+    """
+    Lay a movie source out on a fixed canvas: return (width, height, frames)
+    as read_movie does, each frame holding only the runs it changes.
+    """
+    frames = [(seconds, [line.rstrip() for line in lines]) for seconds, lines in read_movie_source(source_path)]
+    for _, lines in frames:
+        while lines and not lines[-1]:
+            lines.pop()
+    width = max((len(line) for _, lines in frames for line in lines), default=0)
+    height = max((len(lines) for _, lines in frames), default=0)
+
+    def deltas():
+        canvas = [" " * width] * height
+        for seconds, lines in frames:
+            top = (height - len(lines)) // 2
+            rows = [" " * width] * height
+            for i, line in enumerate(lines):
+                left = (width - len(line)) // 2
+                rows[top + i] = (" " * left + line).ljust(width)
+            yield seconds, [(row, col, text) for row, (old, new) in enumerate(zip(canvas, rows))
+                            for col, text in _changed_runs(old, new)]
+            canvas = rows
+
+    return width, height, deltas()
+
+def compile_movie(source_path, out_path):
+    """Compile a movie source into a delta-encoded .plm file."""
+    width, height, frames = movie_from_source(source_path)
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        out.write(f"{MOVIE_MAGIC} {MOVIE_VERSION} {width} {height}\n")
+        for seconds, runs in frames:
+            out.write(f"F {seconds:g}\n")
+            for row, col, text in runs:
+                out.write(f"{row} {col} {json.dumps(text)}\n")
+            count += 1
+    return f"Compiled {count} frames ({width}x{height}) into {out_path}."
+
+def read_movie(f):
+    """
+    Stream a .plm file: return (width, height, frames) where frames yields
+    (seconds, runs) one frame at a time, so memory stays constant however
+    long the movie is. A damaged file raises ValueError, from here or from
+    the frame it is found in.
+    """
+    magic, version, width, height = f.readline().split()
+    if magic != MOVIE_MAGIC or int(version) != MOVIE_VERSION:
+        raise ValueError("Unsupported movie file")
+
+    def frames():
+        seconds, runs = None, []
+        for line in f:
+            if line.startswith("F "):
+                if seconds is not None:
+                    yield seconds, runs
+                seconds, runs = float(line[2:]), []
+            else:
+                row, col, text = line.split(" ", 2)
+                runs.append((int(row), int(col), json.loads(text)))
+        if seconds is not None:
+            yield seconds, runs
+
+    return int(width), int(height), frames()
+
+def play_movie(stdscr, path, cancellable=False, keys=None):
+    """
+    Play a movie file full-screen, drawing only the cells each frame
+    changes. If cancellable, any key ends it early; with an InputLoop as
+    keys, it waits through the loop so the key is not thrown away. A .plm
+    that is missing or unreadable is played from its .txt source instead;
+    one damaged part way through ends where the damage starts. Returns
+    False if the movie was cut short (or could not be read), True otherwise.
+    """
+    with contextlib.ExitStack() as stack:
+        try:
+            movie = read_movie(stack.enter_context(open(path, encoding="utf-8")))
+        except (OSError, ValueError):
+            try:
+                movie = movie_from_source(os.path.splitext(path)[0] + ".txt")
+            except (OSError, ValueError):
+                return False
+        return _play_frames(stdscr, movie, cancellable, keys)
+
+def _play_frames(stdscr, movie, cancellable, keys):
+    width, height, frames = movie
+    screen_height, screen_width = stdscr.getmaxyx()
+    top = max((screen_height - height) // 2, 0)
+    left = max((screen_width - width) // 2, 0)
+    stdscr.erase()
+    if cancellable:
+        stdscr.nodelay(True)
     try:
-        stdscr.addstr(height//2, (width-20)//2, "Thank you for playing!")
-    except curses.error:
+        for seconds, runs in frames:
+            for row, col, text in runs:
+                try:
+                    stdscr.addstr(top + row, left + col, text)
+                except curses.error:
+                    pass
+            stdscr.refresh()
+            if not cancellable:
+                time.sleep(seconds)
+                continue
+            if keys is not None:
+                keypresses = keys.keypresses
+                deadline = time.monotonic() + seconds
+                while keys.keypresses == keypresses and time.monotonic() < deadline:
+                    keys.poll(0.1)
+                if keys.keypresses != keypresses:
+                    return False
+                continue
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                if stdscr.getch() != -1:
+                    return False
+                time.sleep(0.1)
+    except ValueError:  # truncated or damaged part way through
+        return False
+    finally:
+        stdscr.nodelay(False)
+    return True
+
+def ascii_intro_movie(stdscr, intro="auto", save_dir=None):
+    """
+    Play the intro movie; any key skips it. intro is "always", "never", or
+    "auto" to play it only on the first run, as marked in save_dir (by
+    default SAVE_DIR) beside the save slots.
+    """
+    seen = os.path.join(save_dir or SAVE_DIR, INTRO_SEEN_FILE)
+    if intro == "never" or (intro == "auto" and os.path.exists(seen)):
+        return
+    play_movie(stdscr, INTRO_MOVIE, cancellable=True)
+    try:
+        os.makedirs(os.path.dirname(seen) or ".", exist_ok=True)
+        open(seen, "w").close()
+    except OSError:
         pass
+    stdscr.erase()
     stdscr.refresh()
-    time.sleep(3)
+
+def ascii_ending_movie(stdscr, keys=None):
+    """
+    Play the ending movie (closing on "Thank you for playing!").
+    If any key is pressed during the animation, end the movie early.
+    """
+    play_movie(stdscr, ENDING_MOVIE, cancellable=True, keys=keys)
 
 ############################
 # Save/Load Functions
 ############################
 
-def save_game():
+# Binary snapshot layout (little-endian), version 4:
+#   prefix  magic "PLSV", version u16, header length u32, header crc32 u32
+#   header  generation 8s, health i32, reputation i32, combat/negotiation/
+#           puzzle i16, name length u16, scene length u16, then the name,
+#           the scene and a JSON object with every remaining field
+#   events  count u32, length u32, crc32 u32, then the zlib-compressed JSON
+#           list of story_log events
+#   index   count u32, length u32, crc32 u32, then the JournalIndex of those
+#           events: scenes length u32, the zlib-compressed scene runs, then
+#           the zlib-compressed postings (see JournalIndex.encoded)
+# The header can be read on its own (e.g. to list saves) and the event
+# section and the postings are only decompressed when first needed.
+# Older saves are still read: version 3 held only the scene runs, so its
+# index is filed from the events on the first search; version 2 held the
+# postings as fixed-width arrays; version 1 ends after the events.
+SAVE_MAGIC = b"PLSV"
+SAVE_VERSION = 4
+_SAVE_VERSIONS = (1, 2, 3, 4)
+_SAVE_PREFIX = struct.Struct("<4sHII")
+_SAVE_HEADER = struct.Struct("<8siihhhHH")
+_SAVE_EVENTS = struct.Struct("<III")
+_FIXED_FIELDS = ("name", "health", "reputation", "skills", "current_scene", "story_log")
+_FIXED_SKILLS = ("combat", "negotiation", "puzzle")
+
+def encode_save(state, generation):
+    """Encode state as a version 4 binary snapshot."""
+    skills = state["skills"]
+    extra = {key: value for key, value in state.items() if key not in _FIXED_FIELDS}
+    if sorted(skills) != sorted(_FIXED_SKILLS):
+        extra["skills"] = skills
+    name = state["name"].encode("utf-8")
+    scene = state["current_scene"].encode("utf-8")
+    header = (_SAVE_HEADER.pack(bytes.fromhex(generation), state["health"], state["reputation"],
+                                *(skills.get(skill, 0) for skill in _FIXED_SKILLS),
+                                len(name), len(scene))
+              + name + scene + json.dumps(extra).encode("utf-8"))
+    log = state["story_log"]
+    encoded = log.encoded() if isinstance(log, StoryLog) else None
+    if encoded is None:
+        encoded = zlib.compress(json.dumps(list(log)).encode("utf-8")), len(log)
+    blob, count = encoded
+    index, indexed = journal_index(log).encoded()
+    return b"".join([
+        _SAVE_PREFIX.pack(SAVE_MAGIC, SAVE_VERSION, len(header), zlib.crc32(header)),
+        header,
+        _SAVE_EVENTS.pack(count, len(blob), zlib.crc32(blob)),
+        blob,
+        _SAVE_EVENTS.pack(indexed, len(index), zlib.crc32(index)),
+        index,
+    ])
+
+def _decode_save_header(data):
+    """Return (fields without story_log, generation, offset of the events section)."""
+    magic, version, header_len, header_crc = _SAVE_PREFIX.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise ValueError("Not a Pirate Latitudes save file")
+    if version not in _SAVE_VERSIONS:
+        raise ValueError(f"Unsupported save version {version}")
+    start = _SAVE_PREFIX.size
+    header = data[start:start + header_len]
+    if len(header) != header_len or zlib.crc32(header) != header_crc:
+        raise ValueError("Save header is corrupt")
+    (generation, health, reputation, combat, negotiation, puzzle,
+     name_len, scene_len) = _SAVE_HEADER.unpack_from(header)
+    pos = _SAVE_HEADER.size
+    name = header[pos:pos + name_len].decode("utf-8")
+    pos += name_len
+    scene = header[pos:pos + scene_len].decode("utf-8")
+    fields = {
+        "current_scene": scene,
+        "name": name,
+        "health": health,
+        "skills": {"combat": combat, "negotiation": negotiation, "puzzle": puzzle},
+        "reputation": reputation,
+    }
+    fields.update(json.loads(header[pos + scene_len:]))
+    return fields, generation.hex(), start + header_len
+
+def decode_save(data):
+    """Decode a binary snapshot into (state, generation); the story_log stays compressed."""
+    state, generation, pos = _decode_save_header(data)
+    count, length, crc = _SAVE_EVENTS.unpack_from(data, pos)
+    pos += _SAVE_EVENTS.size
+    blob = data[pos:pos + length]
+    if len(blob) != length or zlib.crc32(blob) != crc:
+        raise ValueError("Save events are corrupt")
+    log = state["story_log"] = StoryLog(blob=blob, count=count)
+    version = _SAVE_PREFIX.unpack_from(data)[1]
+    if version >= 2:
+        pos += length
+        indexed, length, crc = _SAVE_EVENTS.unpack_from(data, pos)
+        index_blob = data[pos + _SAVE_EVENTS.size:pos + _SAVE_EVENTS.size + length]
+        if len(index_blob) != length or zlib.crc32(index_blob) != crc:
+            raise ValueError("Save journal index is corrupt")
+        if indexed == count and version == 2:
+            log.search_index = JournalIndex.from_postings(index_blob)
+        elif indexed == count and version == 3:
+            log.search_index = JournalIndex.from_runs(index_blob, count,
+                                                      lambda start, stop: log.page(start, stop - start))
+        elif indexed == count:
+            log.search_index = JournalIndex(blob=index_blob, count=count)
+    return state, generation
+
+def journal_index(log):
+    """
+    Return the JournalIndex to save with log. A plain list carries none, so
+    an empty one is saved and the index is rebuilt on the first search.
+    """
+    if isinstance(log, StoryLog):
+        return log.indexed()
+    index = getattr(log, "search_index", None)
+    return JournalIndex() if index is None else index
+
+def event_scenes(log, start):
+    """The scenes of the events in log from start on, or None if no scene is known."""
+    index = getattr(log, "search_index", None)
+    scenes = index.scenes_of(start, len(log)) if index is not None else []
+    return scenes if any(scenes) else None
+
+def read_save_header(path):
+    """
+    Read just the header fields (name, scene, health, ...) of a binary save,
+    without touching the event section. Journal deltas are not applied.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(_SAVE_PREFIX.size)
+        header_len = _SAVE_PREFIX.unpack(prefix)[2] if len(prefix) == _SAVE_PREFIX.size else 0
+        fields, _, _ = _decode_save_header(prefix + f.read(header_len))
+    return fields
+
+# A save is a snapshot file plus an append-only journal of deltas next to it
+# ("<save>.journal", one JSON record per line). Saving appends only what
+# changed since the previous save; every COMPACT_EVERY records the journal is
+# folded into a fresh binary snapshot written to a temp file and renamed
+# into place.
+# Each snapshot gets a new generation id and only journal records carrying
+# that id are replayed, so leftovers from an interrupted compaction are inert.
+COMPACT_EVERY = 64
+SNAPSHOT_FORMAT = "pirate-latitudes-snapshot"  # JSON snapshots before the binary format
+
+class SaveJournal:
+    """Snapshot + delta journal persistence for one save path."""
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.state = None       # the state dict the baseline below describes
+        self.generation = None  # id of the snapshot the journal extends
+        self.fields = {}        # last persisted value of every field but story_log
+        self.log = None         # the story_log persisted, its length then and its cuts seen
+        self.log_len = 0
+        self.cuts_seen = 0
+        self.records = 0        # journal records since the last snapshot
+
+    def save(self, state):
+        log = state["story_log"]
+        if (state is not self.state or self.generation is None
+                or not os.path.exists(self.path) or log is not self.log):
+            self.compact(state)
+            return
+        record = {}
+        changed = {key: value for key, value in state.items()
+                   if key != "story_log" and self.fields.get(key) != value}
+        if changed:
+            record["set"] = changed
+        start = first_change(log, self.log_len, self.cuts_seen)
+        if len(log) > start or start < self.log_len:  # new events, or some were rewound
+            record["at"] = start
+            record["events"] = list(log[start:])
+            scenes = event_scenes(log, start)
+            if scenes:
+                record["scenes"] = scenes
+        if not record:
+            return
+        record["gen"] = self.generation
+        with open(self.journal_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += 1
+        self.remember(state)
+        if self.records >= COMPACT_EVERY:
+            self.compact(state)
+
+    def compact(self, state):
+        """Write the whole state as a new snapshot and start an empty journal."""
+        generation = os.urandom(8).hex()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode_save(state, generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        with open(self.journal_path, "w"):
+            pass
+        self.generation = generation
+        self.records = 0
+        self.remember(state)
+
+    def load(self, state):
+        """
+        Replace state with the snapshot plus the journal records that extend
+        it. A record whose events start past the end of the log means the
+        snapshot lost events; that raises ValueError, as a bad checksum does.
+        """
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if data.startswith(SAVE_MAGIC):
+            loaded, generation = decode_save(data)
+        else:
+            snapshot = json.loads(data)
+            if snapshot.get("format") == SNAPSHOT_FORMAT:
+                loaded, generation = snapshot["state"], snapshot["generation"]
+            else:
+                loaded, generation = snapshot, None  # plain JSON save from older versions
+            loaded["story_log"] = StoryLog(loaded["story_log"])
+        records = 0
+        if generation is not None and os.path.exists(self.journal_path):
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn write at the tail from a crash
+                    if record.get("gen") != generation:
+                        continue
+                    loaded.update(record.get("set", {}))
+                    if "events" in record:
+                        log = loaded["story_log"]
+                        if not 0 <= record["at"] <= len(log):
+                            raise ValueError(f"Save journal is corrupt: events at {record['at']} "
+                                             f"but the log holds {len(log)}")
+                        if record["at"] != len(log):
+                            del log[record["at"]:]
+                        log.extend(record["events"], record.get("scenes"))
+                    records += 1
+        state.clear()
+        state.update(loaded)
+        self.generation = generation
+        self.records = records
+        self.remember(state)
+
+    def remember(self, state):
+        self.state = state
+        self.fields = {key: copy.deepcopy(value) for key, value in state.items()
+                       if key != "story_log"}
+        self.log = state["story_log"]
+        self.log_len = len(self.log)
+        self.cuts_seen = len(getattr(self.log, "cuts", ()))
+
+_save_journals = {}
+
+def save_journal(path):
+    """Return the SaveJournal tracking path, creating it on first use."""
+    key = os.path.abspath(path)
+    if key not in _save_journals:
+        _save_journals[key] = SaveJournal(path)
+    return _save_journals[key]
+
+def legacy_save_path(path):
+    """Where versions before the binary format kept the save now at path."""
+    return os.path.splitext(path)[0] + LEGACY_SAVE_SUFFIX
+
+def convert_save(path):
+    """
+    Write a JSON save (plus any journal) at path as a binary snapshot beside
+    it, named .sav; the JSON save is left as it was.
+    """
+    state = {}
+    save_journal(path).load(state)
+    target = os.path.splitext(path)[0] + SAVE_SUFFIX
+    save_journal(target).compact(state)
+    return f"Converted {path} to {target} (save format version {SAVE_VERSION})."
+
+SAVED = "Game saved successfully!"
+
+def save_game(state=None, path=SAVE_FILE):
+    if state is None:
+        state = game_state
+    if path is None:
+        return "Saving is not available in this session."
     try:
-        with open(SAVE_FILE, "w") as f:
-            json.dump(game_state, f)
-        return "Game saved successfully!"
+        save_journal(path).save(state)
+        return SAVED
     except Exception as e:
         return f"Failed to save game: {e}"
 
-def load_game():
-    global game_state
-    if os.path.exists(SAVE_FILE):
+def load_game(state=None, path=SAVE_FILE):
+    """
+    Load a save into state in place, so every holder of the dict sees it.
+    With no save at path, a JSON save under the old name is loaded; the
+    next save writes path.
+    """
+    if state is None:
+        state = game_state
+    if path is None:
+        return "Loading is not available in this session."
+    if not os.path.exists(path):
+        path = legacy_save_path(path)
+    if os.path.exists(path):
         try:
-            with open(SAVE_FILE, "r") as f:
-                game_state = json.load(f)
+            save_journal(path).load(state)
             return "Game loaded successfully!"
         except Exception as e:
             return f"Failed to load game: {e}"
     else:
         return "No save file found."
 
+############################
+# Save Slots
+############################
+
+# Named slots live in SAVE_DIR, one save (snapshot + journal) per slot, with
+# an index of per-slot metadata beside them so the load menu never has to
+# open a save. The index is append-only JSON lines, one record per save or
+# deletion, the newest record for a slot winning. Readers keep the parsed
+# index and only read records appended since (by other processes too); once
+# stale records outnumber live ones the index is rewritten and renamed into
+# place. A missing index is rebuilt from the save headers.
+SAVE_DIR = "pirate_latitudes_saves"
+SLOT_INDEX = "index.jsonl"
+SLOT_SUFFIX = SAVE_SUFFIX
+
+class SaveSlots:
+    """The named save slots in one directory, and their index."""
+
+    def __init__(self, save_dir=SAVE_DIR):
+        self.save_dir = save_dir
+        self.index_path = os.path.join(save_dir, SLOT_INDEX)
+        self.entries = {}   # slot -> metadata, as of the last read
+        self.records = 0    # records in the index file, live or stale
+        self.offset = 0     # bytes of the index file already read
+        self._lock = threading.Lock()  # the autosave thread may save too
+
+    def path(self, slot):
+        """The save file for slot: a readable stem plus a hash, so any name is safe."""
+        stem = re.sub(r"[^A-Za-z0-9_-]+", "_", slot)[:40] or "slot"
+        return os.path.join(self.save_dir, f"{stem}-{zlib.crc32(slot.encode('utf-8')):08x}{SLOT_SUFFIX}")
+
+    def file(self, slot):
+        """The save file the index has for slot, or where a new one would go."""
+        with self._lock:
+            self.refresh()
+            entry = self.entries.get(slot)
+        return os.path.join(self.save_dir, entry["file"]) if entry else self.path(slot)
+
+    def save(self, state, slot):
+        # The write goes through save_game, so metrics time slot saves too.
+        try:
+            os.makedirs(self.save_dir, exist_ok=True)
+            path = self.file(slot)  # (indexes the directory first if it has no index yet)
+        except Exception as e:
+            return f"Failed to save game: {e}"
+        message = save_game(state, path)
+        if message != SAVED:
+            return message
+        try:
+            self._append(slot_entry(slot, path, state, time.time()))
+        except Exception as e:
+            return f"Failed to save game: {e}"
+        return message
+
+    def load(self, state, slot):
+        return load_game(state, self.file(slot))
+
+    def delete(self, slot):
+        path = self.file(slot)
+        for name in (path, path + ".journal"):
+            if os.path.exists(name):
+                os.remove(name)
+        _save_journals.pop(os.path.abspath(path), None)
+        self._append({"slot": slot, "deleted": True})
+
+    def list(self):
+        """Metadata of every slot, newest first, read from the index alone."""
+        with self._lock:
+            self.refresh()
+            return sorted(self.entries.values(), key=lambda entry: entry["time"], reverse=True)
+
+    def refresh(self):
+        """Read the records appended to the index since the last read."""
+        try:
+            size = os.path.getsize(self.index_path)
+        except OSError:
+            if os.path.isdir(self.save_dir):
+                self.rebuild()
+            return
+        if size < self.offset:  # rewritten by someone else: start over
+            self.entries, self.records, self.offset = {}, 0, 0
+        if size == self.offset:
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # leave a torn last line for later
+        lines = data[:end].splitlines()
+        try:
+            records = json.loads(b"[" + b",".join(lines) + b"]")  # one parse for the lot
+        except ValueError:
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass
+        for record in records:
+            try:
+                slot = record["slot"]
+            except (KeyError, TypeError):
+                continue
+            if record.get("deleted"):
+                self.entries.pop(slot, None)
+            else:
+                self.entries[slot] = record
+            self.records += 1
+        self.offset += end
+
+    def rebuild(self):
+        """Recreate the index from the headers of the saves in the directory."""
+        entries = {}
+        for filename in os.listdir(self.save_dir):
+            if not filename.endswith(SLOT_SUFFIX):
+                continue
+            path = os.path.join(self.save_dir, filename)
+            try:
+                fields = read_save_header(path)
+            except (OSError, ValueError, struct.error):
+                continue
+            # Slots are normally named after their captain; otherwise fall back on the file name.
+            slot = fields["name"] if self.path(fields["name"]) == path else filename[:-len(SLOT_SUFFIX)]
+            entries[slot] = slot_entry(slot, path, fields, os.path.getmtime(path))
+        self._rewrite(entries)
+
+    def _append(self, record):
+        with self._lock:
+            self.refresh()
+            if self.records >= COMPACT_EVERY and self.records > 2 * len(self.entries):
+                self._rewrite(self.entries)
+            with open(self.index_path, "ab") as f:
+                line = (json.dumps(record) + "\n").encode("utf-8")
+                f.write(line)
+            self.offset += len(line)
+            self.records += 1
+            if record.get("deleted"):
+                self.entries.pop(record["slot"], None)
+            else:
+                self.entries[record["slot"]] = record
+
+    def _rewrite(self, entries):
+        tmp_path = self.index_path + ".tmp"
+        data = b"".join((json.dumps(entry) + "\n").encode("utf-8") for entry in entries.values())
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.index_path)
+        self.entries, self.records, self.offset = dict(entries), len(entries), len(data)
+
+def slot_entry(slot, path, state, saved_at):
+    """The index record describing the save of state at path."""
+    size = sum(os.path.getsize(p) for p in (path, path + ".journal") if os.path.exists(p))
+    return {"slot": slot, "file": os.path.basename(path), "name": state["name"],
+            "scene": state["current_scene"], "health": state["health"],
+            "reputation": state["reputation"], "time": saved_at, "size": size}
+
+############################
+# Autosave
+############################
+
+# Autosaves go to a save of their own, so they never race the player's manual
+# saves. The game thread only notes what changed since the previous note (a
+# few fields plus the new story events, copied on the spot, so the live state
+# can keep changing); a writer thread folds those deltas into a private
+# replica of the state and saves that through a SaveJournal. Notes that
+# arrive while a write is pending merge into it, and a write happens once the
+# changes pause for AUTOSAVE_QUIET seconds, or AUTOSAVE_MAX_DELAY after the
+# first unsaved change at the latest, which bounds what a crash can lose.
+AUTOSAVE_FILE = "pirate_latitudes_autosave" + SAVE_SUFFIX
+AUTOSAVE_QUIET = 0.5
+AUTOSAVE_MAX_DELAY = 5.0
+
+class EventList(list):
+    """A plain list story_log with its own JournalIndex, as kept by the autosave writer."""
+
+    def __init__(self, events=()):
+        super().__init__()
+        self.search_index = JournalIndex()
+        self.cuts = []
+        self.extend(events)
+
+    def extend(self, events, scenes=None):
+        events = list(events)
+        super().extend(events)
+        self.search_index.extend(events, scenes)
+
+    def __delitem__(self, index):
+        """Truncation only (del log[n:]), remembered in cuts as by a StoryLog."""
+        super().__delitem__(index)
+        self.cuts.append(len(self))
+        self.search_index.truncate(len(self))
+
+class Autosaver:
+    """Background autosave of one session's state to path."""
+
+    def __init__(self, path=AUTOSAVE_FILE, quiet=AUTOSAVE_QUIET, max_delay=AUTOSAVE_MAX_DELAY):
+        self.path = path
+        self.quiet = quiet
+        self.max_delay = max_delay
+        self.journal = SaveJournal(path)
+        self.replica = None     # the writer thread's copy of the state
+        self.writes = 0         # saves made, for tests and benchmarks
+        self.error = None       # the last save failure, if any
+        self._log = None        # the story log noted last, its length then and its cuts seen
+        self._log_len = 0
+        self._cuts_seen = 0
+        self._fields = {}       # every other field as of the last note
+        self._pending = None    # merged delta awaiting the writer
+        self._first = self._last = 0.0  # when the pending delta began and last grew
+        self._writing = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def note(self, state):
+        """Queue what changed in state since the last note; return False if nothing did."""
+        log = state.story_log
+        reset = log is not self._log  # a new game or a load
+        start = 0 if reset else first_change(log, self._log_len, self._cuts_seen)
+        changed = {key: copy.deepcopy(value) for key, value in state.items()
+                   if key != "story_log" and (reset or self._fields.get(key, self) != value)}
+        if not changed and len(log) == start == self._log_len:
+            return False
+        events = list(log[start:])
+        scenes = event_scenes(log, start) or [None] * len(events)
+        self._fields = changed if reset else dict(self._fields, **changed)
+        self._log, self._log_len = log, len(log)
+        self._cuts_seen = len(getattr(log, "cuts", ()))
+        now = time.monotonic()
+        with self._cond:
+            if self._pending is None or reset:
+                if self._pending is None:
+                    self._first = now
+                self._pending = {"reset": reset or bool(self._pending and self._pending["reset"]),
+                                 "set": {}, "at": start, "events": [], "scenes": []}
+            pending = self._pending
+            if start < pending["at"]:  # rewound past everything pending
+                pending["at"] = start
+            del pending["events"][start - pending["at"]:]
+            del pending["scenes"][start - pending["at"]:]
+            pending["set"].update(changed)
+            pending["events"].extend(events)
+            pending["scenes"].extend(scenes)
+            self._last = now
+            self._cond.notify_all()
+        return True
+
+    def flush(self):
+        """Write anything pending now and wait until it is on disk."""
+        with self._cond:
+            self._last = self._first = -self.max_delay
+            self._cond.notify_all()
+            while self._pending is not None or self._writing:
+                self._cond.wait()
+
+    def stop(self):
+        """Flush and end the writer thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._pending is None:
+                    if self._stopping:
+                        return
+                    self._cond.wait()
+                    continue
+                due = min(self._last + self.quiet, self._first + self.max_delay)
+                if not self._stopping and time.monotonic() < due:
+                    self._cond.wait(due - time.monotonic())
+                    continue
+                delta, self._pending = self._pending, None
+                self._writing = True
+            try:
+                self._write(delta)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, delta):
+        if delta["reset"] or self.replica is None:
+            # A plain list log: the writer must not touch the shared EventTable.
+            self.replica = GameState(story_log=EventList())
+        for key, value in delta["set"].items():
+            self.replica[key] = value
+        log = self.replica.story_log
+        if delta["at"] < len(log):
+            del log[delta["at"]:]
+        log.extend(delta["events"], delta["scenes"])
+        try:
+            self.journal.save(self.replica)
+            self.writes += 1
+        except Exception as e:  # a full disk must not take the game down with it
+            self.error = e
+
 ############################
 # Updated Command Parser with Natural Language Support
 ############################
 
+# Ordered list: higher priority commands come first.
+ORDERED_COMMANDS = [
+    ("map", ["map", "show map"]),
+    ("journal", ["journal", "codex"]),
+    ("look", ["look", "examine", "view"]),
+    ("sail", ["sail", "navigate", "set course"]),
+    ("board", ["board", "enter"]),
+    ("search", ["search", "investigate", "read"]),
+    ("fight", ["fight", "attack", "duel"]),
+    ("negotiate", ["negotiate", "talk", "parley"]),
+    ("unlock", ["unlock", "open"]),
+    ("help", ["help", "commands"]),
+    ("quit", ["quit", "exit"]),
+    ("save", ["save"]),
+    ("load", ["load"]),
+    ("rewind", ["rewind", "undo"])
+]
+
+def _build_command_matcher(ordered_commands):
+    """
+    Compile the synonym table into a single word-bounded alternation plus a
+    lookup of matched text -> (priority, command).
+
+    One finditer pass over the input replaces a re.search per synonym. The
+    "read/take map" special case is folded in as a priority-0 alternative and
+    listed first, so it wins over a bare "read" starting at the same position.
+    Longer synonyms are tried first so "show map" is not cut short by "show".
+    """
+    lookup = {}
+    for priority, (command, synonyms) in enumerate(ordered_commands):
+        for synonym in synonyms:
+            lookup.setdefault(synonym, (priority, command))
+    alternatives = sorted(lookup, key=len, reverse=True)
+    pattern = (r'\b(?:(?P<special>(?:read|take)\s+map)|'
+               + "|".join(re.escape(s) for s in alternatives) + r')\b')
+    return re.compile(pattern), lookup
+
+_COMMAND_RE, _COMMAND_LOOKUP = _build_command_matcher(ORDERED_COMMANDS)
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance between a and b (insertions,
+    deletions, substitutions and swaps of adjacent letters each count one),
+    or limit + 1 as soon as it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+def _deletions(word, depth):
+    """word and every string left by deleting up to depth of its characters."""
+    found = frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found = found | frontier
+    return found
+
+class FuzzyIndex:
+    """
+    Deletion-neighbourhood index over a vocabulary. Two words within edit
+    distance d share a string reachable from both by at most d deletions,
+    so a lookup only generates the query's deletions, collects the words
+    filed under them and checks those few with edit_distance. Its cost
+    depends on the query's length, not the vocabulary's size.
+    """
+
+    def __init__(self, words, max_distance=2):
+        self.max_distance = max_distance
+        self.deletes = {}  # deletion variant -> vocabulary words it came from
+        for word in words:
+            for variant in _deletions(word, max_distance):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def lookup(self, word, max_distance=None):
+        """Return (distance, vocabulary word) pairs within max_distance of word, nearest first."""
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        candidates = set()
+        for variant in _deletions(word, limit):
+            candidates.update(self.deletes.get(variant, ()))
+        found = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, limit)
+            if distance <= limit:
+                found.append((distance, candidate))
+        return sorted(found)
+
+def typo_limit(word):
+    """
+    Edits forgiven in a word: none in short ones, where a typo is usually
+    another word, and in four-letter ones only a swap of two neighbouring
+    letters ("sial", but not "sale" or "loot"; see _near_synonyms).
+    """
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+_COMMAND_FUZZY = FuzzyIndex(_COMMAND_LOOKUP)
+_COMMAND_NAMES = frozenset(command for command, _ in ORDERED_COMMANDS)
+_WORD_PUNCTUATION = ".,;:!?'\""
+
+def _near_synonyms(phrase, limit):
+    for distance, synonym in _COMMAND_FUZZY.lookup(phrase, limit):
+        if len(phrase) > 4 or sorted(phrase) == sorted(synonym):  # four letters: swaps only
+            yield distance, synonym, phrase
+
+def _is_swap(typed, synonym):
+    """Whether typed is synonym with two neighbouring letters swapped ("sial" for "sail")."""
+    diffs = [i for i, (a, b) in enumerate(zip(typed, synonym)) if a != b]
+    return (len(typed) == len(synonym) and len(diffs) == 2 and diffs[1] == diffs[0] + 1
+            and typed[diffs[0]] == synonym[diffs[1]] and typed[diffs[1]] == synonym[diffs[0]])
+
+def suggest_command(user_input):
+    """
+    The synonym that input matching no command was probably meant to hold:
+    the one nearest any of its words, or any two neighbouring words for
+    phrases like "set course". Returns (command, synonym, sure), or None
+    when nothing is close or the nearest synonyms belong to different
+    commands. sure is set when every nearest word is a swap of two
+    neighbouring letters, or a single slip in a word of five letters or
+    more: close enough to carry out rather than only suggest.
+    """
+    words = [word for word in (w.strip(_WORD_PUNCTUATION) for w in user_input.lower().split()) if word]
+    found = []
+    for i, word in enumerate(words):
+        found.extend(_near_synonyms(word, typo_limit(word)))
+        if i + 1 < len(words):
+            phrase = word + " " + words[i + 1]
+            found.extend(_near_synonyms(phrase, min(1, typo_limit(phrase))))  # one slip per phrase
+    if not found:
+        return None
+    nearest = min(distance for distance, _, _ in found)
+    found = [(synonym, phrase) for distance, synonym, phrase in found if distance == nearest]
+    synonyms = sorted({synonym for synonym, _ in found})
+    if len({_COMMAND_LOOKUP[synonym][1] for synonym in synonyms}) > 1:
+        return None
+    sure = nearest == 0 or all(_is_swap(phrase, synonym) or (nearest == 1 and len(phrase) >= 5)
+                               for synonym, phrase in found)
+    return _COMMAND_LOOKUP[synonyms[0]][1], synonyms[0], sure
+
 def parse_command(user_input):
     """
     Parse a natural language command by checking for command synonyms anywhere in the input.
-    Special cases ("read map", "take map") are handled first.
+    Special cases ("read map", "take map") are handled first. Input no
+    synonym matches returns its first word, which no scene handles; typos
+    are left to read_command (see suggest_command).
     """
     user_input = user_input.lower().strip()
     if not user_input:
         return ""
-    
-    # Special multi-word commands for map.
-    if re.search(r'\b(read|take)\s+map\b', user_input):
-        return "map"
-    
-    # Ordered list: higher priority commands come first.
-    ordered_commands = [
-        ("map", ["map", "show map"]),
-        ("journal", ["journal", "codex"]),
-        ("look", ["look", "examine", "view"]),
-        ("sail", ["sail", "navigate", "set course"]),
-        ("board", ["board", "enter"]),
-        ("search", ["search", "investigate", "read"]),
-        ("fight", ["fight", "attack", "duel"]),
-        ("negotiate", ["negotiate", "talk", "parley"]),
-        ("unlock", ["unlock", "open"]),
-        ("help", ["help", "commands"]),
-        ("quit", ["quit", "exit"]),
-        ("save", ["save"]),
-        ("load", ["load"])
-    ]
-    for command, synonyms in ordered_commands:
-        for synonym in synonyms:
-            pattern = r'\b' + re.escape(synonym) + r'\b'
-            if re.search(pattern, user_input):
-                return command
-    # Fallback: return the first word.
+
+    best = None
+    for match in _COMMAND_RE.finditer(user_input):
+        if match.group("special"):
+            return "map"
+        priority, command = _COMMAND_LOOKUP[match.group()]
+        if priority == 0:
+            return command
+        if best is None or priority < best[0]:
+            best = (priority, command)
+    if best is not None:
+        return best[1]
+    # Fallback: return the first word if no command is recognized
     parts = user_input.split()
     return parts[0] if parts else ""
 
@@ -344,254 +2317,725 @@ def parse_command(user_input):
 # In-Game Journal Functions
 ############################
 
-def add_event(event):
-    game_state["story_log"].append(event)
+JOURNAL_PAGE = 20  # events shown by the plain-text journal
+# Words that only ask for the journal ("open the journal", "check codex entries").
+JOURNAL_OPENERS = frozenset(["journal", "codex", "entries", "open", "check", "view", "read", "see", "show"])
 
-def display_journal(main_win):
-    main_win.clear()
-    main_win.addstr("=== In-Game Journal ===\n", curses.A_BOLD)
-    if game_state["story_log"]:
-        for event in game_state["story_log"]:
-            main_win.addstr(f" * {event}\n")
-    else:
-        main_win.addstr("No events logged yet.\n")
-    main_win.addstr("\nPress any key to continue...")
+def add_event(event, *params, state=None):
+    """
+    Log event in state (game_state if not given); with params, event is a
+    str.format template (see StoryLog.append). The journal index files it
+    under the current scene.
+    """
+    if state is None:
+        state = game_state
+    state.story_log.append(event, *params, scene=state.current_scene)
+
+class JournalQuery:
+    """A parsed 'journal ...' command: search terms plus 'in:'/'scene:' scene filters."""
+
+    def __init__(self, terms, scenes, text):
+        self.terms = terms
+        self.scenes = scenes
+        self.text = text
+
+def journal_query(text):
+    """
+    Parse the words typed with a journal command, e.g. 'journal secret
+    island in:storm'; None if there is nothing to search for. Opening
+    words before the search terms, and the journal's own names, are skipped.
+    """
+    words = text.lower().split()
+    while words and (words[0] in JOURNAL_OPENERS or words[0] in JOURNAL_STOPWORDS):
+        del words[0]
+    terms, scenes, shown = [], [], []
+    for word in words:
+        if word in ("journal", "codex"):
+            continue
+        prefix, _, scene = word.partition(":")
+        if scene and prefix in ("in", "scene"):
+            scenes.append(scene)
+            shown.append(word)
+            continue
+        found = [term for term in _JOURNAL_WORD.findall(word)
+                 if len(term) > 1 and term not in JOURNAL_STOPWORDS]
+        terms.extend(found)
+        shown.extend(found)
+    if not terms and not scenes:
+        return None
+    return JournalQuery(terms, scenes, " ".join(shown))
+
+class JournalMatches:
+    """
+    The story_log events a journal search found, oldest first, paged like a
+    StoryLog. Matches stay in the index's position arrays; a page merges
+    only as much of them as it has to, from whichever end is nearer.
+    """
+
+    def __init__(self, log, groups):
+        self.log = log
+        self.groups = groups  # [(scene id, positions)] from JournalIndex.search
+        self.total = sum(len(positions) for _, positions in groups)
+
+    def __len__(self):
+        return self.total
+
+    def page(self, start, count):
+        start = max(start, 0)
+        stop = min(self.total, start + max(count, 0))
+        if start >= stop:
+            return []
+        if stop <= self.total - start:
+            merged = sorted((position, scene) for scene, positions in self.groups
+                            for position in positions[:stop])[start:stop]
+        else:
+            tail = self.total - start
+            merged = sorted((position, scene) for scene, positions in self.groups
+                            for position in positions[-tail:])[-tail:][:stop - start]
+        return [f"{self.log.page(position, 1)[0]} [{scene}]" if scene else self.log.page(position, 1)[0]
+                for position, scene in merged]
+
+def search_journal(log, query):
+    """Answer a JournalQuery from the log's index; return the JournalMatches."""
+    index = log.indexed()
+    scenes = None
+    if query.scenes:
+        scenes = {code for name in query.scenes for code in index.matching_scenes(name)}
+    return JournalMatches(log, index.search(query.terms, scenes))
+
+def journal_page_start(total, top, page_size):
+    """Clamp the index of the first event shown so the page stays within the log."""
+    return max(0, min(top, total - page_size))
+
+def journal_title(query=None):
+    return "=== In-Game Journal ===" if query is None else f"=== Journal: {query.text} ==="
+
+def journal_empty_message(query=None):
+    return "No events logged yet." if query is None else "No journal entries match."
+
+def display_journal(main_win, keys, events=None, query=None):
+    """
+    Page through the journal (or the matches of query) in a pad one screen
+    tall, starting at the most recent events. Only the visible page is
+    fetched and drawn, so opening the journal costs the same however long
+    the log is. Keys are read through keys, the InputLoop, so a command
+    typed to leave the journal is kept.
+    """
+    if events is None:
+        events = game_state.story_log
+    height, width = main_win.getmaxyx()
+    begin_y, begin_x = main_win.getbegyx()
+    page_size = max(height - 3, 1)
+    pad = curses.newpad(page_size + 1, width)
+    top = journal_page_start(len(events), len(events), page_size)
+    while True:
+        main_win.erase()
+        main_win.addnstr(0, 0, journal_title(query), width - 1, curses.A_BOLD)
+        if events:
+            last = min(top + page_size, len(events))
+            footer = f"Events {top + 1}-{last} of {len(events)}  PgUp/PgDn to scroll, any other key to continue"
+        else:
+            footer = journal_empty_message(query) + "  Press any key to continue..."
+        main_win.addnstr(height - 1, 0, footer, width - 1)
+        main_win.noutrefresh()
+        pad.erase()
+        for row, event in enumerate(events.page(top, page_size) if events else []):
+            pad.addnstr(row, 0, f" * {event}", width - 1)
+        pad.noutrefresh(0, 0, begin_y + 1, begin_x, begin_y + page_size, begin_x + width - 1)
+        curses.doupdate()
+        key = keys.read_key()
+        if key in (curses.KEY_PPAGE, curses.KEY_UP):
+            step = page_size if key == curses.KEY_PPAGE else 1
+            top = journal_page_start(len(events), top - step, page_size)
+        elif key in (curses.KEY_NPAGE, curses.KEY_DOWN):
+            step = page_size if key == curses.KEY_NPAGE else 1
+            top = journal_page_start(len(events), top + step, page_size)
+        else:
+            break
+    main_win.erase()
     main_win.refresh()
-    main_win.getch()
+
+############################
+# Checkpoints
+############################
+
+CHECKPOINT_LIMIT = 500  # checkpoints kept per session; the oldest are dropped
+
+def _copied(value):
+    """A copy of a state field's value that does not share anything mutable with it."""
+    return value if isinstance(value, (int, float, str, type(None))) else copy.deepcopy(value)
+
+class Checkpoint:
+    """The state as a scene was entered: every field but story_log, frozen, and the log's length."""
+
+    __slots__ = ("scene", "log_len", "keys", "values")
+
+    def __init__(self, scene, log_len, keys, values):
+        self.scene = scene
+        self.log_len = log_len
+        self.keys = keys
+        self.values = values
+
+class Checkpoints:
+    """
+    A session's checkpoints, one per scene entered, newest last. They share
+    structure: the story_log is append-only, so a checkpoint keeps only its
+    length and rewinding truncates the log back to it; the other fields are
+    copied once and each copy is reused by later checkpoints for as long as
+    the field keeps that value, so a checkpoint is mostly a tuple of
+    references. Checkpoints are never changed, and restoring one copies
+    only those few small fields back.
+    """
+
+    def __init__(self, limit=CHECKPOINT_LIMIT):
+        self.items = deque(maxlen=limit)
+        self.log = None  # the story_log the checkpoints are positions in
+
+    def __len__(self):
+        return len(self.items)
+
+    def take(self, state, scene_id):
+        """Checkpoint state on entering scene_id."""
+        log = state.story_log
+        if log is not self.log:  # a new game or a load: the old checkpoints are of another log
+            self.items.clear()
+            self.log = log
+        keys = tuple(key for key in state.keys() if key != "story_log")
+        last = self.items[-1] if self.items else None
+        if last is not None and last.keys == keys:
+            values = tuple(old if old == value else _copied(value)
+                           for old, value in zip(last.values, map(state.__getitem__, keys)))
+            keys = last.keys
+        else:
+            values = tuple(_copied(state[key]) for key in keys)
+        self.items.append(Checkpoint(scene_id, len(log), keys, values))
+
+    def restore(self, state, n=1):
+        """
+        Put state back as it was on entering the scene n checkpoints ago
+        (1 is the current scene's) and drop that checkpoint and every later
+        one; the scene takes it again when it is re-entered. Return the
+        scene id, or None if there are not n checkpoints of this game.
+        """
+        if state.story_log is not self.log or not 0 < n <= len(self.items):
+            return None
+        for _ in range(n - 1):
+            self.items.pop()
+        checkpoint = self.items.pop()
+        for key in [key for key in state.keys() if key not in checkpoint.keys and key != "story_log"]:
+            del state.extra[key]
+        for key, value in zip(checkpoint.keys, checkpoint.values):
+            state[key] = _copied(value)
+        del state.story_log[checkpoint.log_len:]
+        state.current_scene = checkpoint.scene
+        return checkpoint.scene
+
+############################
+# Sessions
+############################
+
+class Session:
+    """
+    One player's game: the I/O backend it talks through, its own state dict,
+    the random source for skill checks, where saves go and the Autosaver,
+    if any, to note the state to before every prompt. Saves go to the slot
+    named after the captain when slots (a SaveSlots) is given, else to
+    save_file (None disables saving). The scene flow checkpoints the state
+    on every scene entry for rewind. The local player uses the
+    module-level game_state.
+    """
+
+    def __init__(self, io, state=None, rng=None, save_file=SAVE_FILE, autosave=None, slots=None):
+        self.io = io
+        self.state = game_state if state is None else state
+        self.rng = rng or random
+        self.save_file = save_file
+        self.autosave = autosave
+        self.slots = slots
+        self.checkpoints = Checkpoints()
+
+    def save(self):
+        if self.slots is not None:
+            return self.slots.save(self.state, self.state.name)
+        return save_game(self.state, self.save_file)
+
+    def load(self):
+        if self.slots is not None:
+            return self.slots.load(self.state, self.state.name)
+        return load_game(self.state, self.save_file)
+
+    def rewind(self, text=""):
+        """
+        Rewind to a checkpoint ('rewind' for the current scene's entry,
+        'rewind 3' for three scenes back); return the scene to re-enter,
+        or None if there is no such checkpoint.
+        """
+        steps = re.search(r"\d+", text)
+        n = int(steps.group()) if steps else 1
+        scene_id = self.checkpoints.restore(self.state, n)
+        if scene_id is None:
+            self.io.slow_print(story_text("rewind.none", available=len(self.checkpoints)))
+        else:
+            self.io.slow_print(story_text("rewind.done"))
+        return scene_id
+
+    def show_journal(self, text=""):
+        """Show the journal, or just the events matching what was typed after 'journal'."""
+        log = self.state.story_log
+        query = journal_query(text)
+        self.io.show_journal(log if query is None else search_journal(log, query), query)
+
+    def unknown_command(self, cmd, key="scene.unknown"):
+        """
+        Say the command was not recognized, and which one a typo in it
+        might have meant (read_command carries out the ones it is sure of).
+        A real command this scene has no use for is not a typo, and
+        neither is empty input.
+        """
+        self.io.slow_print(story_text(key))
+        suggestion = suggest_command(cmd.text) if cmd and cmd not in _COMMAND_NAMES else None
+        if suggestion is not None:
+            self.io.slow_print(story_text("scene.did_you_mean", synonym=suggestion[1]))
+
+class Command(str):
+    """A parsed command that keeps the line it was parsed from (for 'journal <terms>')."""
+
+    def __new__(cls, command, text=""):
+        self = super().__new__(cls, command)
+        self.text = text
+        return self
+
+def read_command(prompt=">> ", rng=random, io=None):
+    """
+    Yield a prompt to whoever drives the scene and parse the line sent back.
+    Empty input becomes an empty command carrying a random pirate phrase
+    (drawn from rng, normally the session's) and exhausted input (None)
+    becomes "quit". A line holding no command but a typo suggest_command
+    is sure of is read as that command, telling io (if given) so.
+    """
+    user_input = yield prompt
+    if user_input is None:
+        return Command("quit")
+    if not user_input:  # nothing to parse, or to suggest a command for
+        return Command("", rng.choice(PIRATE_EMPTY_MESSAGES))
+    command = parse_command(user_input)
+    if command not in _COMMAND_NAMES:
+        suggestion = suggest_command(user_input)
+        if suggestion is not None and suggestion[2]:
+            command = suggestion[0]
+            if io is not None:
+                io.slow_print(story_text("scene.taking_as", synonym=suggestion[1]))
+    return Command(command, user_input)
 
 ############################
 # Sample Scene Functions
 ############################
 
-def scene_ship_deck(header_win, main_win, sidebar_win, input_win, footer_win):
-    game_state["current_scene"] = "ship_deck"
-    add_event("Arrived at the Ship's Deck.")
-    main_win.clear()
-    curses_slow_print(main_win, f"{game_state['name']}, you stand on the weather-beaten deck of 'The Black Meridian'.")
-    curses_slow_print(main_win, "A tattered map and a captain's log hint at secrets of a hidden island fortress.")
-    update_sidebar(sidebar_win)
-    update_header(header_win)
-    update_footer(footer_win)
+# The storm's combat check: combat plus a roll of 0..STORM_ROLL must beat
+# STORM_DIFFICULTY, or the storm costs STORM_DAMAGE health. balance.py
+# simulates the check with these same numbers.
+STORM_DIFFICULTY = 6
+STORM_ROLL = 3
+STORM_DAMAGE = 15
+
+def scene_ship_deck(session):
+    io, state = session.io, session.state
+    state.current_scene = "ship_deck"
+    add_event("Arrived at the Ship's Deck.", state=state)
+    io.clear()
+    io.slow_print(story_text("ship_deck.enter", name=state.name))
+    io.slow_print(story_text("ship_deck.hint"))
+    io.update_panels()
     
     while True:
-        user_input = curses_get_input(input_win)
-        cmd = parse_command(user_input)
+        cmd = yield from read_command(rng=session.rng, io=io)
         if cmd == "look":
-            curses_slow_print(main_win, "You see a bustling deck with crew members and a mysterious map.")
+            io.slow_print(story_text("ship_deck.look"))
         elif cmd == "sail":
-            curses_slow_print(main_win, "You command the helmsman to set sail into the deep blue.")
-            scene_open_sea(header_win, main_win, sidebar_win, input_win, footer_win)
-            break
+            io.slow_print(story_text("ship_deck.sail"))
+            return "open_sea"
         elif cmd == "board":
-            curses_slow_print(main_win, "You venture below deck, where whispered secrets abound.")
-            scene_below_deck(header_win, main_win, sidebar_win, input_win, footer_win)
-            break
+            io.slow_print(story_text("ship_deck.board"))
+            return "below_deck"
         elif cmd == "map":
-            update_sidebar(sidebar_win)
+            io.show_map()
         elif cmd == "save":
-            msg = save_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.save())
         elif cmd == "load":
-            msg = load_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.load())
+        elif cmd == "rewind":
+            scene_id = session.rewind(cmd.text)
+            if scene_id is not None:
+                return scene_id
         elif cmd == "journal":
-            display_journal(main_win)
+            session.show_journal(cmd.text)
         elif cmd == "quit":
-            curses_slow_print(main_win, "The tides recede as you exit the adventure. Farewell!")
-            exit(0)
+            io.slow_print(story_text("ship_deck.quit"))
+            return None
         elif cmd == "help":
-            display_help_menu(main_win, input_win)
+            io.show_help()
         else:
-            curses_slow_print(main_win, "Command not recognized. Try 'help'.")
-
-def scene_below_deck(header_win, main_win, sidebar_win, input_win, footer_win):
-    game_state["current_scene"] = "below_deck"
-    add_event("Exploring Below Deck.")
-    main_win.clear()
-    curses_slow_print(main_win, "In the cramped corridors beneath the ship, dim lanterns reveal a weathered journal.")
-    update_sidebar(sidebar_win)
-    update_header(header_win)
-    update_footer(footer_win)
+            session.unknown_command(cmd)
+
+def scene_below_deck(session):
+    io, state = session.io, session.state
+    state.current_scene = "below_deck"
+    add_event("Exploring Below Deck.", state=state)
+    io.clear()
+    io.slow_print(story_text("below_deck.enter"))
+    io.update_panels()
     
     while True:
-        user_input = curses_get_input(input_win)
-        cmd = parse_command(user_input)
+        cmd = yield from read_command(rng=session.rng, io=io)
         if cmd == "look":
-            curses_slow_print(main_win, "The journal details hidden coves and mysterious symbols.")
+            io.slow_print(story_text("below_deck.look"))
         elif cmd == "search":
-            curses_slow_print(main_win, "Decoding the entries, you learn of an island fortress with untold treasures.")
-            add_event("Learned about secret island.")
-            scene_ship_deck(header_win, main_win, sidebar_win, input_win, footer_win)
-            break
+            io.slow_print(story_text("below_deck.search"))
+            add_event("Learned about secret island.", state=state)
+            return "ship_deck"
         elif cmd == "sail":
-            curses_slow_print(main_win, "Believing the clues suffice, you return to the deck to set sail.")
-            scene_ship_deck(header_win, main_win, sidebar_win, input_win, footer_win)
-            break
+            io.slow_print(story_text("below_deck.sail"))
+            return "ship_deck"
         elif cmd == "map":
-            update_sidebar(sidebar_win)
+            io.show_map()
         elif cmd == "save":
-            msg = save_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.save())
         elif cmd == "load":
-            msg = load_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.load())
+        elif cmd == "rewind":
+            scene_id = session.rewind(cmd.text)
+            if scene_id is not None:
+                return scene_id
         elif cmd == "journal":
-            display_journal(main_win)
+            session.show_journal(cmd.text)
         elif cmd == "quit":
-            curses_slow_print(main_win, "Retreating from below deck, you end your adventure. Farewell!")
-            exit(0)
+            io.slow_print(story_text("below_deck.quit"))
+            return None
         elif cmd == "help":
-            display_help_menu(main_win, input_win)
+            io.show_help()
         else:
-            curses_slow_print(main_win, "Command not recognized. Try 'help'.")
-
-def scene_open_sea(header_win, main_win, sidebar_win, input_win, footer_win):
-    game_state["current_scene"] = "open_sea"
-    add_event("Sailing on the Open Sea.")
-    main_win.clear()
-    curses_slow_print(main_win, "The ship cuts through restless waves as dark clouds gather overhead.")
-    update_sidebar(sidebar_win)
-    update_header(header_win)
-    update_footer(footer_win)
+            session.unknown_command(cmd)
+
+def scene_open_sea(session):
+    io, state = session.io, session.state
+    state.current_scene = "open_sea"
+    add_event("Sailing on the Open Sea.", state=state)
+    io.clear()
+    io.slow_print(story_text("open_sea.enter"))
+    io.update_panels()
     
     while True:
-        user_input = curses_get_input(input_win)
-        cmd = parse_command(user_input)
+        cmd = yield from read_command(rng=session.rng, io=io)
         if cmd == "look":
-            curses_slow_print(main_win, "Turbulent waves and flashes of lightning mirror your inner turmoil.")
+            io.slow_print(story_text("open_sea.look"))
         elif cmd == "sail":
-            curses_slow_print(main_win, "You steer the ship into the heart of the storm. The winds howl!")
-            scene_storm_at_sea(header_win, main_win, sidebar_win, input_win, footer_win)
-            break
+            io.slow_print(story_text("open_sea.sail"))
+            return "storm_at_sea"
         elif cmd == "map":
-            update_sidebar(sidebar_win)
+            io.show_map()
         elif cmd == "save":
-            msg = save_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.save())
         elif cmd == "load":
-            msg = load_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.load())
+        elif cmd == "rewind":
+            scene_id = session.rewind(cmd.text)
+            if scene_id is not None:
+                return scene_id
         elif cmd == "journal":
-            display_journal(main_win)
+            session.show_journal(cmd.text)
         elif cmd == "quit":
-            curses_slow_print(main_win, "Unable to face the storm, you abandon your quest. Farewell!")
-            exit(0)
+            io.slow_print(story_text("open_sea.quit"))
+            return None
         elif cmd == "help":
-            display_help_menu(main_win, input_win)
+            io.show_help()
         else:
-            curses_slow_print(main_win, "Command not recognized. Try 'help'.")
-
-def scene_storm_at_sea(header_win, main_win, sidebar_win, input_win, footer_win):
-    game_state["current_scene"] = "storm_at_sea"
-    add_event("Endured the Storm at Sea.")
-    main_win.clear()
-    curses_slow_print(main_win, "Rain lashes the deck and thunder shakes the ship. The storm is fierce!")
-    update_sidebar(sidebar_win)
-    update_header(header_win)
-    update_footer(footer_win)
+            session.unknown_command(cmd)
+
+def scene_storm_at_sea(session):
+    io, state = session.io, session.state
+    state.current_scene = "storm_at_sea"
+    add_event("Endured the Storm at Sea.", state=state)
+    io.clear()
+    io.slow_print(story_text("storm_at_sea.enter"))
+    io.update_panels()
     
     while True:
-        user_input = curses_get_input(input_win)
-        cmd = parse_command(user_input)
+        cmd = yield from read_command(rng=session.rng, io=io)
         if cmd == "look":
-            curses_slow_print(main_win, "The deck is slippery and the crew scrambles in the tempest.")
+            io.slow_print(story_text("storm_at_sea.look"))
         elif cmd == "fight":
-            curses_slow_print(main_win, "You rally your crew to secure the ship.")
-            if game_state["skills"]["combat"] + random.randint(0, 3) > 6:
-                curses_slow_print(main_win, "Your skill prevails! The storm begins to subside.")
-                add_event("Conquered the storm.")
-                scene_island_approach(header_win, main_win, sidebar_win, input_win, footer_win)
-                break
+            io.slow_print(story_text("storm_at_sea.fight"))
+            if state.skills["combat"] + session.rng.randint(0, STORM_ROLL) > STORM_DIFFICULTY:
+                io.slow_print(story_text("storm_at_sea.fight_won"))
+                add_event("Conquered the storm.", state=state)
+                return "island_approach"
             else:
-                curses_slow_print(main_win, "The storm takes its toll. You lose 15 health.")
-                game_state["health"] -= 15
-                if game_state["health"] <= 0:
-                    curses_slow_print(main_win, "You have succumbed to the storm...")
-                    exit(0)
-                scene_island_approach(header_win, main_win, sidebar_win, input_win, footer_win)
-                break
+                io.slow_print(story_text("storm_at_sea.fight_lost", damage=STORM_DAMAGE))
+                state.health -= STORM_DAMAGE
+                if state.health <= 0:
+                    io.slow_print(story_text("storm_at_sea.succumbed"))
+                    return None
+                return "island_approach"
         elif cmd == "negotiate":
-            curses_slow_print(main_win, "You shout orders and inspire your crew with a rousing shanty. The tempest abates.")
-            scene_island_approach(header_win, main_win, sidebar_win, input_win, footer_win)
-            break
+            io.slow_print(story_text("storm_at_sea.negotiate"))
+            return "island_approach"
         elif cmd == "map":
-            update_sidebar(sidebar_win)
+            io.show_map()
         elif cmd == "save":
-            msg = save_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.save())
         elif cmd == "load":
-            msg = load_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.load())
+        elif cmd == "rewind":
+            scene_id = session.rewind(cmd.text)
+            if scene_id is not None:
+                return scene_id
         elif cmd == "quit":
-            curses_slow_print(main_win, "The storm overwhelms you, and you abandon ship. Farewell!")
-            exit(0)
+            io.slow_print(story_text("storm_at_sea.quit"))
+            return None
         elif cmd == "help":
-            display_help_menu(main_win, input_win)
+            io.show_help()
         else:
-            curses_slow_print(main_win, "Command not recognized. Act swiftly!")
-
-def scene_island_approach(header_win, main_win, sidebar_win, input_win, footer_win):
-    game_state["current_scene"] = "island_approach"
-    add_event("Approaching the Secret Island.")
-    main_win.clear()
-    curses_slow_print(main_win, "After the storm, a blood‑red sunset reveals a rugged island with hidden fortifications.")
-    update_sidebar(sidebar_win)
-    update_header(header_win)
-    update_footer(footer_win)
+            session.unknown_command(cmd, "storm_at_sea.unknown")
+
+def scene_island_approach(session):
+    io, state = session.io, session.state
+    state.current_scene = "island_approach"
+    add_event("Approaching the Secret Island.", state=state)
+    io.clear()
+    io.slow_print(story_text("island_approach.enter"))
+    io.update_panels()
     
     while True:
-        user_input = curses_get_input(input_win)
-        cmd = parse_command(user_input)
+        cmd = yield from read_command(rng=session.rng, io=io)
         if cmd == "look":
-            curses_slow_print(main_win, "From the deck, you see cannons, watchtowers, and secret coves carved into the rocks.")
+            io.slow_print(story_text("island_approach.look"))
         elif cmd == "board":
-            curses_slow_print(main_win, "You lower the boats and prepare a landing party.")
-            scene_ship_deck(header_win, main_win, sidebar_win, input_win, footer_win)
-            break
+            io.slow_print(story_text("island_approach.board"))
+            return "ship_deck"
         elif cmd == "map":
-            update_sidebar(sidebar_win)
+            io.show_map()
         elif cmd == "save":
-            msg = save_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.save())
         elif cmd == "load":
-            msg = load_game()
-            curses_slow_print(main_win, msg)
+            io.slow_print(session.load())
+        elif cmd == "rewind":
+            scene_id = session.rewind(cmd.text)
+            if scene_id is not None:
+                return scene_id
         elif cmd == "quit":
-            curses_slow_print(main_win, "Fearing the island's perils, you retreat. Farewell!")
-            exit(0)
+            io.slow_print(story_text("island_approach.quit"))
+            return None
         elif cmd == "help":
-            display_help_menu(main_win, input_win)
+            io.show_help()
         else:
-            curses_slow_print(main_win, "Command not recognized. Try 'help'.")
+            session.unknown_command(cmd)
+
+def scene_perished(session):
+    """
+    Not a place but what follows the captain's death: rather than end the
+    adventure, offer to rewind to a checkpoint. Returns the scene to
+    re-enter, or None once the player quits.
+    """
+    io = session.io
+    if not session.checkpoints:
+        return None
+    io.slow_print(story_text("perished.enter"))
+    while True:
+        cmd = yield from read_command(rng=session.rng, io=io)
+        if cmd == "rewind":
+            scene_id = session.rewind(cmd.text)
+            if scene_id is not None:
+                return scene_id
+        elif cmd == "quit":
+            return None
+        elif cmd == "help":
+            io.show_help()
+        else:
+            io.slow_print(story_text("perished.enter"))
+
+############################
+# Scene Dispatcher
+############################
+
+# Each scene is a generator: it yields a prompt whenever it needs a line of
+# input and returns the id of the next scene, or None when the adventure is
+# over. Because scenes never read input themselves, the same flow runs under
+# the blocking drivers below and the asyncio server.
+SCENES = {
+    "ship_deck": scene_ship_deck,
+    "below_deck": scene_below_deck,
+    "open_sea": scene_open_sea,
+    "storm_at_sea": scene_storm_at_sea,
+    "island_approach": scene_island_approach,
+}
+
+def scene_flow(session, scene_id=None):
+    """
+    Run scenes one after another in a single loop, so the stack stays flat
+    however many transitions a session makes. Starts from the scene recorded
+    in the session state (e.g. after loading) or the ship's deck. Every
+    scene entered is checkpointed first, and a death leads to
+    scene_perished, where the player can rewind.
+    """
+    if scene_id is None:
+        scene_id = session.state.current_scene
+    if scene_id not in SCENES:
+        scene_id = "ship_deck"
+    while scene_id is not None:
+        session.checkpoints.take(session.state, scene_id)
+        scene_id = yield from SCENES[scene_id](session)
+        if scene_id is None and session.state.health <= 0:
+            scene_id = yield from scene_perished(session)
+
+def drive(session, flow):
+    """
+    Feed a flow lines from the session's (blocking) backend until it
+    finishes. Before each prompt, whatever the last command changed (scene,
+    health, story events) is noted for autosave.
+    """
+    autosave = session.autosave
+    try:
+        prompt = next(flow)
+        while True:
+            if autosave is not None:
+                autosave.note(session.state)
+            prompt = flow.send(session.io.read_line(prompt))
+    except StopIteration as stop:
+        return stop.value
+
+def run_scenes(session, scene_id=None):
+    drive(session, scene_flow(session, scene_id))
 
 ############################
 # Help Menu Display
 ############################
 
-def display_help_menu(main_win, input_win):
-    help_text = (
-        "Help / Commands:\n"
-        "  look/examine/view      - Observe your surroundings\n"
-        "  sail/navigate/set course - Set sail to a new destination\n"
-        "  board/enter             - Board a ship or enter a location\n"
-        "  search/read/investigate - Look for clues or treasure\n"
-        "  fight/attack/duel       - Engage in battle\n"
-        "  negotiate/talk/parley   - Parley with others\n"
-        "  unlock/open             - Open a locked door\n"
-        "  map/show map            - Display the ASCII map\n"
-        "  journal/codex           - Show your in-game journal\n"
-        "  save                    - Save your progress\n"
-        "  load                    - Load your progress\n"
-        "  help/commands           - Show this help menu\n"
-        "  quit/exit               - Exit the adventure\n\n"
-        "Press any key to return..."
-    )
-    main_win.clear()
-    curses_slow_print(main_win, help_text, delay=0.02)
-    input_win.clear()
-    input_win.addstr(0, 0, "Press any key to continue...")
-    input_win.refresh()
-    input_win.getch()
+def display_help_menu(main_win, keys):
+    main_win.erase()
+    curses_slow_print(main_win, help_screen_text(), delay=0.02, keys=keys)
+    keys.wait_key()
+
+############################
+# I/O Backends
+############################
+
+class GameIO:
+    """
+    Everything the scenes need from the outside world. Scenes only talk to
+    this interface, so the same game logic runs under curses, on plain
+    stdin/stdout, or against scripted input in memory.
+    """
+
+    def clear(self):
+        """Clear the main text area."""
+        raise NotImplementedError
+
+    def slow_print(self, text, delay=0.05):
+        """Show a line of narration (animated where the backend supports it)."""
+        raise NotImplementedError
+
+    def read_line(self, prompt=">> "):
+        """Return one raw line of player input, or None when input is exhausted."""
+        raise NotImplementedError
+
+    def update_panels(self):
+        """Redraw the status panels around the main text area."""
+
+    def show_map(self):
+        self.slow_print(story_text("map.sidebar") + "\n")
+
+    def show_journal(self, events, query=None):
+        """Show the newest events, or the newest matches of a journal_query."""
+        self.clear()
+        self.slow_print(journal_title(query))
+        if events:
+            start = max(len(events) - JOURNAL_PAGE, 0)
+            for event in events.page(start, JOURNAL_PAGE):
+                self.slow_print(f" * {event}")
+            if start:
+                self.slow_print(f"({len(events) - start} most recent of {len(events)} events)")
+        else:
+            self.slow_print(journal_empty_message(query))
+
+    def show_help(self):
+        self.clear()
+        self.slow_print(story_text("help.commands") + "\n")
+
+class CursesIO(GameIO):
+    """Backend for the multi-panel curses UI, drawn through a PanelRenderer."""
+
+    def __init__(self, stdscr, state=None, track_resize=True):
+        self.panels = PanelRenderer(stdscr, state, track_resize)
+        self.keys = InputLoop(lambda: self.input_win)
+
+    @property
+    def main_win(self):
+        return self.panels.windows[1]
+
+    @property
+    def input_win(self):
+        return self.panels.windows[3]
+
+    def clear(self):
+        self.main_win.erase()
+
+    def slow_print(self, text, delay=0.05):
+        curses_slow_print(self.main_win, text, delay, keys=self.keys)
+
+    def read_line(self, prompt=">> "):
+        self.panels.render()
+        return self.keys.read_line(prompt)
+
+    def update_panels(self):
+        self.panels.render()
+
+    def show_map(self):
+        # The map lives in the sidebar; it is only redrawn if something dirtied it.
+        self.panels.render()
+
+    def show_journal(self, events, query=None):
+        display_journal(self.main_win, self.keys, events, query)
+
+    def show_help(self):
+        display_help_menu(self.main_win, self.keys)
+
+class StreamIO(GameIO):
+    """Plain-text backend over file objects (stdin/stdout by default), no sleeps."""
+
+    def __init__(self, infile=None, outfile=None):
+        self.infile = infile or sys.stdin
+        self.outfile = outfile or sys.stdout
+
+    def clear(self):
+        pass
+
+    def slow_print(self, text, delay=0.05):
+        self.outfile.write(text + "\n")
+
+    def read_line(self, prompt=">> "):
+        self.outfile.write(prompt)
+        self.outfile.flush()
+        line = self.infile.readline()
+        if not line:
+            return None
+        return line.strip()
+
+class MemoryIO(GameIO):
+    """Scripted backend: reads from a list of lines and collects output in memory."""
+
+    def __init__(self, inputs=()):
+        self.inputs = iter(inputs)
+        self.output = []
+
+    def clear(self):
+        pass
+
+    def slow_print(self, text, delay=0.05):
+        self.output.append(text)
+
+    def read_line(self, prompt=">> "):
+        line = next(self.inputs, None)
+        return None if line is None else line.strip()
 
 ############################
 # Character Customization
@@ -601,31 +3045,31 @@ def character_customization(stdscr):
     stdscr.clear()
     curses.curs_set(1)
     curses.echo()
-    stdscr.addstr(2, 2, "Enter your pirate name: ")
+    stdscr.addstr(2, 2, story_text("creation.name"))
     name = stdscr.getstr().decode("utf-8").strip()
     if name:
-        game_state["name"] = name
+        game_state.name = name
     else:
-        game_state["name"] = "Captain Anonymous"
-    stdscr.addstr(4, 2, f"Welcome, {game_state['name']}!")
-    stdscr.addstr(6, 2, "Allocate 10 skill points among Combat, Negotiation, and Puzzle skills (e.g., 4 3 3): ")
+        game_state.name = "Captain Anonymous"
+    stdscr.addstr(4, 2, story_text("creation.welcome", name=game_state.name))
+    stdscr.addstr(6, 2, story_text("creation.skills"))
     while True:
         try:
             points = stdscr.getstr().decode("utf-8").strip().split()
             points = list(map(int, points))
             if len(points) != 3 or sum(points) != 10:
-                stdscr.addstr(8, 2, "Please allocate exactly 10 points. Try again: ")
+                stdscr.addstr(8, 2, story_text("creation.not_ten"))
                 stdscr.clrtoeol()
                 continue
-            game_state["skills"]["combat"] = points[0]
-            game_state["skills"]["negotiation"] = points[1]
-            game_state["skills"]["puzzle"] = points[2]
+            game_state.skills["combat"] = points[0]
+            game_state.skills["negotiation"] = points[1]
+            game_state.skills["puzzle"] = points[2]
             break
         except Exception:
-            stdscr.addstr(8, 2, "Invalid input. Try again: ")
+            stdscr.addstr(8, 2, story_text("creation.invalid"))
             stdscr.clrtoeol()
     curses.noecho()
-    add_event(f"Character created: {game_state['name']} with skills {game_state['skills']}")
+    add_event("Character created: {} with skills {}", game_state.name, str(game_state.skills))
     stdscr.addstr(10, 2, "Press any key to continue...")
     stdscr.getch()
 
@@ -633,26 +3077,19 @@ def character_customization(stdscr):
 # Main Curses Function
 ############################
 
-def curses_main(stdscr):
-    curses.curs_set(0)
-    stdscr.clear()
-    
-    # Show ASCII Intro Movie
-    ascii_intro_movie(stdscr)
-    
-    # Full-screen main menu using stdscr
-    stdscr.clear()
+MENU_ITEMS = ["New Game", "Load Game", "Help", "Quit"]
+
+def main_menu(stdscr, selection=0):
+    """Let the player pick a menu item with the arrow keys and Enter; return its index."""
     height, width = stdscr.getmaxyx()
-    menu_items = ["New Game", "Load Game", "Help", "Quit"]
-    current_selection = 0
+    title = "Pirate Latitudes: Ultimate Epic Adventure"
     while True:
-        stdscr.clear()
-        title = "Pirate Latitudes: Ultimate Epic Adventure"
+        stdscr.erase()
         stdscr.addstr(2, (width - len(title)) // 2, title, curses.A_BOLD)
-        for idx, item in enumerate(menu_items):
+        for idx, item in enumerate(MENU_ITEMS):
             x = (width - len(item)) // 2
             y = 4 + idx
-            if idx == current_selection:
+            if idx == selection:
                 stdscr.attron(curses.A_REVERSE)
                 stdscr.addstr(y, x, item)
                 stdscr.attroff(curses.A_REVERSE)
@@ -661,135 +3098,929 @@ def curses_main(stdscr):
         stdscr.refresh()
         key = stdscr.getch()
         if key == curses.KEY_UP:
-            current_selection = (current_selection - 1) % len(menu_items)
+            selection = (selection - 1) % len(MENU_ITEMS)
         elif key == curses.KEY_DOWN:
-            current_selection = (current_selection + 1) % len(menu_items)
+            selection = (selection + 1) % len(MENU_ITEMS)
         elif key in [10, 13]:
-            break
+            return selection
 
-    choice = menu_items[current_selection]
-    if choice == "New Game":
-        character_customization(stdscr)
-    elif choice == "Load Game":
-        msg = load_game()
-        stdscr.clear()
-        stdscr.addstr(2, 2, msg)
-        stdscr.addstr(4, 2, "Press any key to continue...")
-        stdscr.refresh()
-        stdscr.getch()
-    elif choice == "Help":
-        help_text = (
-            "Help / Commands:\n"
-            "  look/examine/view      - Observe your surroundings\n"
-            "  sail/navigate/set course - Set sail to a new destination\n"
-            "  board/enter             - Board a ship or enter a location\n"
-            "  search/read/investigate - Look for clues or treasure\n"
-            "  fight/attack/duel       - Engage in battle\n"
-            "  negotiate/talk/parley   - Parley with others\n"
-            "  unlock/open             - Open a locked door\n"
-            "  map/show map            - Display the ASCII map\n"
-            "  journal/codex           - Show your in-game journal\n"
-            "  save                    - Save your progress\n"
-            "  load                    - Load your progress\n"
-            "  help/commands           - Show this help menu\n"
-            "  quit/exit               - Exit the adventure\n\n"
-            "Press any key to return..."
-        )
+def slot_label(entry, width):
+    """One load menu row: slot, scene, health, reputation, when and size."""
+    saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["time"]))
+    text = (f"{entry['slot'][:24]:<24} {entry['scene']:<16} {entry['health']:>4} hp  "
+            f"rep {entry['reputation']:>3}  {saved}  {entry['size'] / 1024:7.1f} KB")
+    return text[:width]
+
+def load_menu_entries(slots, loose=()):
+    """
+    Rows for the load menu: the (label, path) saves outside the slots that
+    exist (the autosave, an old single save) under their name or the one
+    older versions used, then every slot, newest first. Slots come from the
+    index alone; only the loose saves' headers are read.
+    """
+    entries = []
+    for label, path in loose:
+        if not os.path.exists(path):
+            path = legacy_save_path(path)
+            if not os.path.exists(path):
+                continue
+        try:
+            fields = read_save_header(path)
+        except (OSError, ValueError, struct.error):  # e.g. a JSON save from older versions
+            fields = {"name": "", "current_scene": "(older format)", "health": "", "reputation": ""}
+        entries.append(dict(slot_entry(label, path, fields, os.path.getmtime(path)), path=path))
+    return entries + slots.list()
+
+def choose_save(stdscr, entries):
+    """
+    Scroll through load menu entries (arrows, PgUp/PgDn, Home/End) and
+    return the one picked with Enter, or None on Esc or q. Only the visible
+    page is drawn, so thousands of slots cost no more than a handful.
+    """
+    height, width = stdscr.getmaxyx()
+    if not entries:
         stdscr.clear()
-        stdscr.addstr(2, 2, help_text)
+        stdscr.addstr(2, 2, "No saves found. Press any key to return...")
         stdscr.refresh()
         stdscr.getch()
-        curses_main(stdscr)
-        return
-    elif choice == "Quit":
-        stdscr.clear()
-        stdscr.addstr(height//2, (width - 20) // 2, "Farewell, brave pirate!")
+        return None
+    page = max(height - 5, 1)
+    selection = top = 0
+    while True:
+        top = min(max(top, selection - page + 1), selection)
+        stdscr.erase()
+        title = f"Load Game: {len(entries)} saves (Enter to load, Esc to go back)"
+        stdscr.addstr(1, 2, title[:width - 3], curses.A_BOLD)
+        for row, entry in enumerate(entries[top:top + page]):
+            attr = curses.A_REVERSE if top + row == selection else curses.A_NORMAL
+            stdscr.addstr(3 + row, 2, slot_label(entry, width - 3), attr)
         stdscr.refresh()
-        time.sleep(2)
-        return
+        key = stdscr.getch()
+        if key == curses.KEY_UP:
+            selection = max(selection - 1, 0)
+        elif key == curses.KEY_DOWN:
+            selection = min(selection + 1, len(entries) - 1)
+        elif key == curses.KEY_PPAGE:
+            selection = max(selection - page, 0)
+        elif key == curses.KEY_NPAGE:
+            selection = min(selection + page, len(entries) - 1)
+        elif key == curses.KEY_HOME:
+            selection = 0
+        elif key == curses.KEY_END:
+            selection = len(entries) - 1
+        elif key in [10, 13]:
+            return entries[selection]
+        elif key in [27, ord("q")]:
+            return None
+
+def curses_main(stdscr, intro="auto", autosave=AUTOSAVE_FILE, save_dir=SAVE_DIR):
+    """
+    Play the intro (as ascii_intro_movie decides), then run the main menu
+    until the player starts a game or quits. Help returns to the menu
+    without replaying the intro. The game saves to slots in save_dir and
+    autosaves to the autosave path unless it is None.
+    """
+    slots = SaveSlots(save_dir)
+    curses.curs_set(0)
+    stdscr.clear()
+    ascii_intro_movie(stdscr, intro, save_dir)
+
+    height, width = stdscr.getmaxyx()
+    selection = 0
+    while True:
+        selection = main_menu(stdscr, selection)
+        choice = MENU_ITEMS[selection]
+        if choice == "New Game":
+            character_customization(stdscr)
+            break
+        elif choice == "Load Game":
+            loose = [("(autosave)", autosave), ("(single save)", SAVE_FILE)] if autosave \
+                else [("(single save)", SAVE_FILE)]
+            entry = choose_save(stdscr, load_menu_entries(slots, loose))
+            if entry is None:
+                continue
+            msg = load_game(path=entry.get("path") or os.path.join(slots.save_dir, entry["file"]))
+            stdscr.clear()
+            stdscr.addstr(2, 2, msg)
+            stdscr.addstr(4, 2, "Press any key to continue...")
+            stdscr.refresh()
+            stdscr.getch()
+            break
+        elif choice == "Help":
+            stdscr.clear()
+            stdscr.addstr(2, 2, help_screen_text())
+            stdscr.refresh()
+            stdscr.getch()
+        elif choice == "Quit":
+            stdscr.clear()
+            stdscr.addstr(height//2, (width - 20) // 2, story_text("game.farewell"))
+            stdscr.refresh()
+            time.sleep(2)
+            return
 
     # After main menu, initialize game panels.
-    header_win, main_win, sidebar_win, input_win, footer_win = init_windows(stdscr)
+    io = CursesIO(stdscr)
     
-    # Start the game at the ship deck.
-    scene_ship_deck(header_win, main_win, sidebar_win, input_win, footer_win)
-    
-    # (Game loop would continue through scenes...)
+    # Start at the ship deck (or the loaded scene) and run until the game ends.
+    autosaver = Autosaver(autosave) if autosave else None
+    try:
+        run_scenes(Session(io, autosave=autosaver, slots=slots))
+    finally:
+        if autosaver is not None:
+            autosaver.stop()
     
     # When game ends, show the ASCII Ending Movie.
-    ascii_ending_movie(stdscr)
+    ascii_ending_movie(stdscr, io.keys)
 
 ############################
-# Unit Tests
+# Headless Mode
 ############################
 
-class TestCommandParser(unittest.TestCase):
-    def test_empty_input(self):
-        self.assertEqual(parse_command(""), "")
-    
-    def test_look_commands(self):
-        self.assertEqual(parse_command("look around"), "look")
-        self.assertEqual(parse_command("examine the map"), "look")
-        self.assertEqual(parse_command("view"), "look")
-    
-    def test_sail_commands(self):
-        self.assertEqual(parse_command("sail north"), "sail")
-        self.assertEqual(parse_command("navigate quickly"), "sail")
-    
-    def test_board_commands(self):
-        self.assertEqual(parse_command("board the ship"), "board")
-        self.assertEqual(parse_command("enter cabin"), "board")
-    
-    def test_search_commands(self):
-        self.assertEqual(parse_command("search for clues"), "search")
-        self.assertEqual(parse_command("read journal"), "search")
-    
-    def test_fight_commands(self):
-        self.assertEqual(parse_command("fight them"), "fight")
-        self.assertEqual(parse_command("attack enemy"), "fight")
-    
-    def test_negotiate_commands(self):
-        self.assertEqual(parse_command("negotiate peace"), "negotiate")
-        self.assertEqual(parse_command("talk to captain"), "negotiate")
-    
-    def test_unlock_commands(self):
-        self.assertEqual(parse_command("unlock door"), "unlock")
-        self.assertEqual(parse_command("open chest"), "unlock")
-    
-    def test_map_commands(self):
-        self.assertEqual(parse_command("map"), "map")
-        self.assertEqual(parse_command("show map please"), "map")
-        self.assertEqual(parse_command("read map"), "map")
-        self.assertEqual(parse_command("take map"), "map")
-        self.assertEqual(parse_command("I want to see the map"), "map")
-    
-    def test_journal_commands(self):
-        self.assertEqual(parse_command("journal"), "journal")
-        self.assertEqual(parse_command("codex entries"), "journal")
-    
-    def test_help_commands(self):
-        self.assertEqual(parse_command("help"), "help")
-        self.assertEqual(parse_command("commands"), "help")
-    
-    def test_quit_commands(self):
-        self.assertEqual(parse_command("quit"), "quit")
-        self.assertEqual(parse_command("exit now"), "quit")
-    
-    def test_save_commands(self):
-        self.assertEqual(parse_command("save game"), "save")
-    
-    def test_load_commands(self):
-        self.assertEqual(parse_command("load game"), "load")
-    
-    def test_unknown_command(self):
-        self.assertEqual(parse_command("foobar test"), "foobar")
+def character_creation(session):
+    """Character creation as a flow (see scene_flow); exhausted input keeps the defaults."""
+    io, state = session.io, session.state
+    name = yield story_text("creation.name")
+    state.name = name or "Captain Anonymous"
+    io.slow_print(story_text("creation.welcome", name=state.name))
+    prompt = story_text("creation.skills")
+    while True:
+        text = yield prompt
+        if text is None:
+            break
+        try:
+            points = list(map(int, text.split()))
+        except ValueError:
+            prompt = story_text("creation.invalid")
+            continue
+        if len(points) != 3 or sum(points) != 10:
+            prompt = story_text("creation.not_ten")
+            continue
+        state.skills["combat"] = points[0]
+        state.skills["negotiation"] = points[1]
+        state.skills["puzzle"] = points[2]
+        break
+    add_event("Character created: {} with skills {}", state.name, str(state.skills), state=state)
+
+def new_game_flow(session):
+    """A whole new game: character creation, then the scenes from the ship's deck."""
+    yield from character_creation(session)
+    yield from scene_flow(session, "ship_deck")
+
+def headless_main(io=None, record=None, autosave=None, slots=None):
+    """
+    Play a full game without a terminal: character creation, then the
+    scenes. With record set to a path, the typed lines and the random seed
+    are written there as a recording for replay(); with autosave set to a
+    path, the game autosaves there; with slots (a SaveSlots), saves go to
+    the captain's slot.
+    """
+    io = io or StreamIO()
+    autosaver = Autosaver(autosave) if autosave else None
+    if record is None:
+        session = Session(io, autosave=autosaver, slots=slots)
+    else:
+        seed = int.from_bytes(os.urandom(4), "little")
+        io = RecordingIO(io)
+        session = Session(io, rng=random.Random(seed), autosave=autosaver, slots=slots)
+    try:
+        drive(session, new_game_flow(session))
+        session.io.slow_print(story_text("game.thanks"))
+    finally:
+        if autosaver is not None:
+            autosaver.stop()
+        if record is not None:
+            save_recording(record, seed, io.inputs)
+
+############################
+# Multi-Session Server
+############################
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8081
+FRAME_TIME = 0.05
+
+def clean_line(data):
+    """Decode a line from a telnet-style client, dropping negotiation bytes and control characters."""
+    text = data.decode("utf-8", "ignore")
+    return "".join(ch for ch in text if ch.isprintable()).strip()
+
+class AsyncStreamIO(GameIO):
+    """
+    Backend for one telnet-style connection. Scenes only queue output here;
+    serve_session animates it onto the socket with asyncio sleeps, so a slow
+    print only ever delays its own player.
+    """
+
+    def __init__(self, reader, writer, animate=True):
+        self.reader = reader
+        self.writer = writer
+        self.animate = animate
+        self.pending = []
+
+    def clear(self):
+        pass
+
+    def slow_print(self, text, delay=0.05):
+        self.pending.append((text.replace("\n", "\r\n") + "\r\n", delay))
+
+    def read_line(self, prompt=">> "):
+        raise RuntimeError("AsyncStreamIO sessions are driven by serve_session")
+
+    async def flush(self, interrupt=None):
+        """
+        Write the queued output, a few characters per frame. If interrupt (a
+        pending read) completes, the player has typed ahead and the rest is
+        written at once.
+        """
+        import asyncio
+        pending, self.pending = self.pending, []
+        for text, delay in pending:
+            if not self.animate or delay <= 0 or (interrupt is not None and interrupt.done()):
+                self.writer.write(text.encode())
+                continue
+            step = max(1, round(FRAME_TIME / delay))
+            for i in range(0, len(text), step):
+                if interrupt is not None and interrupt.done():
+                    self.writer.write(text[i:].encode())
+                    break
+                self.writer.write(text[i:i + step].encode())
+                await self.writer.drain()
+                await asyncio.sleep(step * delay)
+        await self.writer.drain()
+
+    async def show_prompt(self, prompt):
+        self.writer.write(prompt.encode())
+        await self.writer.drain()
+
+# Lines that may save or load a slot: serve_session plays them on a worker
+# thread, as they write and fsync the slot files.
+_SLOT_COMMAND = re.compile(r"\b(?:%s)\b" % "|".join(
+    synonym for command, synonyms in ORDERED_COMMANDS if command in ("save", "load")
+    for synonym in synonyms), re.IGNORECASE)
+_FLOW_DONE = object()
+
+def _send(flow, line):
+    """flow.send(line), returning _FLOW_DONE at the end (a future cannot hold StopIteration)."""
+    try:
+        return flow.send(line)
+    except StopIteration:
+        return _FLOW_DONE
+
+async def serve_session(reader, writer, animate=True, slots=None, screen=None, executor=None):
+    """
+    Play one connection's game with its own state and random source. With
+    slots (a SaveSlots shared by every session), players can save and load
+    the slot named after their captain; otherwise saving is off. Those
+    commands run on executor (the loop's default if None), so the disk
+    never stalls the other sessions. With screen set to (rows, columns),
+    the player gets the full-screen layout through a ScreenIO instead of
+    a plain text stream.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    state = new_game_state()
+    if screen:
+        io = ScreenIO(writer, state, animate, size=screen)
+    else:
+        io = AsyncStreamIO(reader, writer, animate)
+    session = Session(io, state, random.Random(), save_file=None, slots=slots)
+    flow = new_game_flow(session)
+    line_task = None
+    try:
+        prompt = next(flow)
+        while True:
+            # Start reading before animating so type-ahead can skip the animation.
+            line_task = asyncio.ensure_future(reader.readline())
+            await io.flush(line_task)
+            await io.show_prompt(prompt)
+            data = await line_task
+            line = clean_line(data) if data else None
+            if slots is not None and line and _SLOT_COMMAND.search(line):
+                prompt = await loop.run_in_executor(executor, _send, flow, line)
+                if prompt is _FLOW_DONE:
+                    raise StopIteration
+            else:
+                prompt = flow.send(line)
+    except StopIteration:
+        io.slow_print(story_text("game.thanks"))
+        await io.flush()
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        if line_task is not None and not line_task.done():
+            line_task.cancel()
+        writer.close()
+
+async def serve(host=SERVER_HOST, port=SERVER_PORT, animate=True, save_dir=None, screen=None):
+    """
+    Host any number of concurrent sessions on one event loop, saving to
+    save_dir if set and streaming screens of the given size if screen is set.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    slots = SaveSlots(save_dir) if save_dir else None
+    # One worker, so saves to a slot two sessions share never interleave.
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="saves")
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_session(reader, writer, animate, slots, screen, executor),
+        host, port)
+    print(f"Pirate Latitudes server listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown()
+
+############################
+# Record and Replay
+############################
+
+RECORDING_FORMAT = "pirates-recording"
+RECORDING_VERSION = 1
+
+class RecordingIO:
+    """Wraps another backend and keeps every line the player types."""
+
+    def __init__(self, io):
+        self.io = io
+        self.inputs = []
+
+    def read_line(self, prompt=">> "):
+        line = self.io.read_line(prompt)
+        if line is not None:
+            self.inputs.append(line)
+        return line
+
+    def __getattr__(self, name):
+        return getattr(self.io, name)
+
+def save_recording(path, seed, inputs):
+    with open(path, "w") as f:
+        json.dump({"format": RECORDING_FORMAT, "version": RECORDING_VERSION,
+                   "seed": seed, "inputs": list(inputs)}, f, indent=1)
+
+def load_recording(path):
+    with open(path, "r") as f:
+        recording = json.load(f)
+    if recording.get("format") != RECORDING_FORMAT or recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"{path} is not a version {RECORDING_VERSION} recording")
+    return recording
+
+class VirtualWindow:
+    """
+    Just enough of a curses window, held in memory, to run the curses UI
+    without a terminal. Text lands in a grid of rows (scrolling if scrollok
+    is on) and there is never a key waiting. Its constructor matches
+    curses.newwin and curses.newpad; see virtual_curses().
+    """
+
+    def __init__(self, nlines, ncols, begin_y=0, begin_x=0):
+        self.height, self.width = nlines, ncols
+        self.begin = (begin_y, begin_x)
+        self.scroll = False
+        self.erase()
+
+    def erase(self):
+        self.rows = [[" "] * self.width for _ in range(self.height)]
+        self.y = self.x = 0
+
+    clear = erase
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def getbegyx(self):
+        return self.begin
+
+    def scrollok(self, flag):
+        self.scroll = flag
+
+    def addstr(self, *args):
+        if isinstance(args[0], int):
+            self.y, self.x = args[0], args[1]
+            args = args[2:]
+        for ch in args[0]:
+            if ch == "\n":
+                self._newline()
+                continue
+            self.rows[self.y][self.x] = ch
+            self.x += 1
+            if self.x == self.width:
+                self._newline()
+
+    def addnstr(self, y, x, text, n, *attr):
+        self.addstr(y, x, text[:max(n, 0)])
+
+    def _newline(self):
+        self.x = 0
+        if self.y + 1 < self.height:
+            self.y += 1
+        elif self.scroll:
+            del self.rows[0]
+            self.rows.append([" "] * self.width)
+        else:
+            raise curses.error("addstr past the end of the window")
+
+    def hline(self, y, x, ch, n):
+        self.rows[y][x:x + n] = ["-"] * min(n, self.width - x)
+
+    def box(self, *args):
+        for row in self.rows[1:-1]:
+            row[0] = row[-1] = "|"
+        self.rows[0] = self.rows[-1] = ["+"] + ["-"] * (self.width - 2) + ["+"]
+
+    def getch(self):
+        return -1
+
+    def get_wch(self):
+        raise curses.error("no input")
+
+    def text(self):
+        return "\n".join("".join(row).rstrip() for row in self.rows).rstrip()
+
+    def _no_op(self, *args):
+        pass
+
+    refresh = noutrefresh = nodelay = keypad = timeout = attron = attroff = _no_op
+
+@contextlib.contextmanager
+def virtual_curses():
+    """Route the curses calls the UI makes to VirtualWindows instead of a terminal."""
+    from unittest import mock
+    with mock.patch.object(curses, "newwin", VirtualWindow), \
+            mock.patch.object(curses, "newpad", VirtualWindow), \
+            mock.patch.object(curses, "doupdate", lambda: None), \
+            mock.patch.object(curses, "ACS_HLINE", ord("-"), create=True):
+        yield
+
+class ReplayIO(CursesIO):
+    """
+    The curses backend on VirtualWindows (use it inside virtual_curses()),
+    answering prompts from a recording. Narration still animates frame by
+    frame, but against a virtual clock, so nothing sleeps. Each input is
+    timed until the game asks for the next one; see .timings.
+    """
+
+    def __init__(self, inputs, state, rows=30, cols=100):
+        super().__init__(VirtualWindow(rows, cols), state, track_resize=False)
+        self.state = state
+        self.inputs = iter(inputs)
+        self.clock = 0.0
+        self.timings = []  # (command, scene before, scene after, seconds)
+        self.pending = None
+
+    def _sleep(self, seconds):
+        self.clock += seconds
+
+    def slow_print(self, text, delay=0.05):
+        animator = TextAnimator(clock=lambda: self.clock, sleep=self._sleep)
+        animator.add(self.main_win, text + "\n", delay)
+        animator.run()
+
+    def show_help(self):
+        # display_help_menu, minus its real-time animation and key wait.
+        self.main_win.erase()
+        self.slow_print(help_screen_text(), delay=0.02)
+
+    def show_journal(self, events, query=None):
+        display_journal(self.main_win, self, events, query)
+
+    def read_key(self):
+        """Close the journal pad after its first page: a replay has no keys to page with."""
+        return "\n"
+
+    def finish(self):
+        """Close the timing of the last input (call once the flow has ended)."""
+        if self.pending is not None:
+            command, scene, started = self.pending
+            self.timings.append((command, scene, self.state.current_scene,
+                                 time.perf_counter() - started))
+            self.pending = None
+
+    def read_line(self, prompt=">> "):
+        self.finish()
+        self.panels.render()
+        line = next(self.inputs, None)
+        if line is not None:
+            command = (parse_command(line) or "(empty)") if prompt == ">> " else "(character creation)"
+            self.pending = (command, self.state.current_scene, time.perf_counter())
+        return line
+
+def replay(recording, rows=30, cols=100):
+    """
+    Play a recording from a new game through ReplayIO and return the io.
+    Saving and loading are disabled, so a replay never touches save files.
+    """
+    state = new_game_state()
+    with virtual_curses():
+        io = ReplayIO(recording["inputs"], state, rows, cols)
+        session = Session(io, state, random.Random(recording["seed"]), save_file=None)
+        drive(session, new_game_flow(session))
+        io.finish()
+    return io
+
+############################
+# Screen Streaming
+############################
+
+# Remote players on a plain ANSI terminal get the curses layout (header,
+# main, sidebar, input and footer, from init_windows) with no curses at
+# either end. The layout is drawn into a Screen: a grid of cells in memory,
+# filled by ScreenWindows, that also remembers what the player's terminal
+# shows. A frame is whatever differs between the two, sent in a single write
+# as cursor moves, SGR attribute changes and text, with blank line ends and
+# longer blank runs erased (EL, ECH) rather than written out. Since a frame
+# is a difference and not a list of drawing operations, a frame that is
+# never sent costs nothing: its changes go out with the next one.
+SCREEN_SIZE = (24, 80)  # rows, columns
+STREAM_HIGH_WATER = 16384  # unsent bytes beyond which animation frames are skipped
+ERASE_RUN = 8  # blank runs longer than this are erased in place rather than written
+_SGR_CODES = ((curses.A_BOLD, "1"), (curses.A_DIM, "2"), (curses.A_UNDERLINE, "4"),
+              (curses.A_REVERSE, "7"))
+
+def sgr(attr):
+    """The escape sequence that sets the terminal's attributes to attr (curses A_* bits)."""
+    if not attr:
+        return "\x1b[m"
+    return "\x1b[0;" + ";".join(code for bit, code in _SGR_CODES if attr & bit) + "m"
+
+class ScreenWindow(VirtualWindow):
+    """
+    A VirtualWindow with attributes, belonging to a Screen. As with a curses
+    window, drawing only changes the window's own cells; noutrefresh (or
+    refresh) copies the spans of each row touched since into the screen.
+    """
 
-class TestJournalFunctions(unittest.TestCase):
-    def test_add_event(self):
-        initial_len = len(game_state["story_log"])
-        add_event("Test Event")
-        self.assertEqual(len(game_state["story_log"]), initial_len + 1)
-        self.assertEqual(game_state["story_log"][-1], "Test Event")
+    def __init__(self, screen, nlines, ncols, begin_y=0, begin_x=0):
+        self.screen = screen
+        self.attr = curses.A_NORMAL
+        super().__init__(nlines, ncols, begin_y, begin_x)
+
+    def erase(self):
+        super().erase()
+        self.attrs = [[0] * self.width for _ in range(self.height)]
+        self._touch_all()
+
+    clear = erase
+
+    def _touch(self, y, lo, hi):
+        if hi <= lo:
+            return
+        span = self.touched.get(y)
+        if span is None:
+            self.touched[y] = [lo, hi]
+        else:
+            span[0], span[1] = min(span[0], lo), max(span[1], hi)
+
+    def _touch_all(self):
+        self.touched = {y: [0, self.width] for y in range(self.height)}  # row -> [first, end) column
+
+    def addstr(self, *args):
+        if isinstance(args[0], int):
+            self.y, self.x = args[0], args[1]
+            args = args[2:]
+        attr = self.attr | (args[1] if len(args) > 1 else 0)
+        start = self.x
+        for ch in args[0]:
+            if ch == "\n":
+                self._touch(self.y, start, self.x)
+                self._newline()
+                start = 0
+                continue
+            self.rows[self.y][self.x] = ch
+            self.attrs[self.y][self.x] = attr
+            self.x += 1
+            if self.x == self.width:
+                self._touch(self.y, start, self.width)
+                self._newline()
+                start = 0
+        self._touch(self.y, start, self.x)
+
+    def addnstr(self, y, x, text, n, *attr):
+        self.addstr(y, x, text[:max(n, 0)], *attr)
+
+    def _newline(self):
+        if self.y + 1 == self.height and self.scroll:
+            del self.attrs[0]
+            self.attrs.append([0] * self.width)
+            self._touch_all()
+        super()._newline()
+
+    def hline(self, y, x, ch, n):
+        super().hline(y, x, ch, n)
+        n = min(n, self.width - x)
+        self.attrs[y][x:x + n] = [0] * n
+        self._touch(y, x, x + n)
+
+    def box(self, *args):
+        super().box(*args)
+        for row in self.attrs:
+            row[0] = row[-1] = 0
+        self.attrs[0] = [0] * self.width
+        self.attrs[-1] = [0] * self.width
+        self._touch_all()
+
+    def attron(self, attr):
+        self.attr |= attr
+
+    def attroff(self, attr):
+        self.attr &= ~attr
+
+    def attrset(self, attr):
+        self.attr = attr
+
+    def noutrefresh(self):
+        begin_y, begin_x = self.begin
+        for y, (lo, hi) in self.touched.items():
+            self.screen.put(begin_y + y, begin_x + lo, self.rows[y][lo:hi], self.attrs[y][lo:hi])
+        self.touched.clear()
+
+    refresh = noutrefresh
+
+class Screen:
+    """
+    The cells of a rows x columns terminal, what the player's terminal is
+    known to show, and where its cursor rests between frames. Pass it to
+    init_windows as stdscr (its windows come from newwin) and call frame()
+    for the bytes that bring the terminal up to date.
+    """
+
+    def __init__(self, rows, cols):
+        self.height, self.width = rows, cols
+        self.chars = [[" "] * cols for _ in range(rows)]
+        self.attrs = [[0] * cols for _ in range(rows)]
+        self.shown = None  # (chars, attrs) on the terminal; None until the first frame clears it
+        self.dirty = {}  # row -> [first, end) span of columns that may differ from the terminal
+        self.cursor = None  # (row, column) to show the cursor at after each frame, None to hide it
+        self._at = None  # where the terminal's cursor is, if known
+        self._attr = 0  # the terminal's current attributes
+        self._visible = None  # whether the terminal shows its cursor, if known
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def newwin(self, nlines, ncols, begin_y=0, begin_x=0):
+        return ScreenWindow(self, nlines, ncols, begin_y, begin_x)
+
+    def put(self, y, x, chars, attrs):
+        """Copy a run of window cells to row y from column x."""
+        end = x + len(chars)
+        if self.chars[y][x:end] != chars or self.attrs[y][x:end] != attrs:
+            self.chars[y][x:end] = chars
+            self.attrs[y][x:end] = attrs
+            span = self.dirty.get(y)
+            if span is None:
+                self.dirty[y] = [x, end]
+            else:
+                span[0], span[1] = min(span[0], x), max(span[1], end)
+
+    def forget(self, rows):
+        """Stop trusting what the terminal shows on rows (it has echoed input there, say)."""
+        if self.shown is not None:
+            for y in rows:
+                self.shown[0][y] = [None] * self.width
+                self.dirty[y] = [0, self.width]
+        self._at = None
+
+    def text(self):
+        return "\n".join("".join(row).rstrip() for row in self.chars).rstrip()
+
+    def frame(self):
+        """Return the bytes that make the terminal show the screen; b"" if it already does."""
+        out = []
+        if self.shown is None:
+            out.append("\x1b[m\x1b[H\x1b[2J")
+            self.shown = ([[" "] * self.width for _ in range(self.height)],
+                          [[0] * self.width for _ in range(self.height)])
+            self.dirty = {y: [0, self.width] for y in range(self.height)}
+            self._at, self._attr = (0, 0), 0
+        if self.cursor is None and self._visible is not False:
+            out.append("\x1b[?25l")
+            self._visible = False
+        for y in sorted(self.dirty):
+            self._send_row(out, y, *self.dirty[y])
+        self.dirty.clear()
+        if self.cursor is not None and (out or self._at != self.cursor or not self._visible):
+            self._plain(out)
+            self._move(out, *self.cursor)
+            if not self._visible:
+                out.append("\x1b[?25h")
+                self._visible = True
+        return "".join(out).encode()
+
+    def _send_row(self, out, y, x, end):
+        chars, attrs = self.chars[y], self.attrs[y]
+        shown_chars, shown_attrs = self.shown[0][y], self.shown[1][y]
+        if shown_chars[0] is None:  # forgotten: erase the line and draw it from scratch
+            self._move(out, y, 0)
+            self._plain(out)
+            out.append("\x1b[2K")
+            shown_chars[:] = [" "] * self.width
+            shown_attrs[:] = [0] * self.width
+            x, end = 0, self.width
+        blank_from = None  # the row is blank from this column on
+        while x < end:
+            if chars[x] == shown_chars[x] and attrs[x] == shown_attrs[x]:
+                x += 1
+                continue
+            self._move(out, y, x)
+            if chars[x] == " " and not attrs[x]:
+                if blank_from is None:
+                    blank_from = self.width
+                    while blank_from and chars[blank_from - 1] == " " and not attrs[blank_from - 1]:
+                        blank_from -= 1
+                if x >= blank_from:
+                    self._plain(out)
+                    out.append("\x1b[K")
+                    shown_chars[x:] = chars[x:]
+                    shown_attrs[x:] = attrs[x:]
+                    return
+                blanks = x + 1
+                while blanks < end and chars[blanks] == " " and not attrs[blanks]:
+                    blanks += 1
+                if blanks - x > ERASE_RUN:
+                    # Erase the run in place (ECH); the cursor stays put.
+                    self._plain(out)
+                    out.append(f"\x1b[{blanks - x}X")
+                    shown_chars[x:blanks] = chars[x:blanks]
+                    shown_attrs[x:blanks] = attrs[x:blanks]
+                    x = blanks
+                    continue
+            if attrs[x] != self._attr:
+                out.append(sgr(attrs[x]))
+                self._attr = attrs[x]
+            out.append(chars[x])
+            shown_chars[x], shown_attrs[x] = chars[x], attrs[x]
+            x += 1
+            # Past the last column the cursor waits to wrap, and terminals disagree on where it is.
+            self._at = (y, x) if x < self.width else None
+
+    def _plain(self, out):
+        """Reset the terminal's attributes, so erasing leaves plain blanks."""
+        if self._attr:
+            out.append("\x1b[m")
+            self._attr = 0
+
+    def _move(self, out, y, x):
+        """Append the shortest cursor movement from where the terminal's cursor is to (y, x)."""
+        at = self._at
+        if at == (y, x):
+            return
+        if at is not None and at[0] == y and 0 < x - at[1] <= 3 and \
+                None not in self.shown[0][y][at[1]:x] and \
+                all(attr == self._attr for attr in self.shown[1][y][at[1]:x]):
+            out.append("".join(self.shown[0][y][at[1]:x]))  # rewriting what is there is shortest
+        elif at is not None and at[0] == y and x > at[1]:
+            out.append(f"\x1b[{x - at[1]}C")
+        elif at is not None and x == 0 and at[0] == y:
+            out.append("\r")
+        elif at is not None and x == 0 and at[0] == y - 1:
+            out.append("\r\n")
+        else:
+            out.append(f"\x1b[{y + 1};{x + 1}H")
+        self._at = (y, x)
+
+class ScreenPanels(PanelRenderer):
+    """A PanelRenderer on a Screen; what it stages goes out with ScreenIO's next frame."""
+
+    def __init__(self, screen, state):
+        super().__init__(screen, state, track_resize=False)
+
+    def flush(self):
+        pass
+
+class ScreenIO(GameIO):
+    """
+    Backend for one remote player on a plain ANSI terminal, reached through
+    an asyncio StreamWriter on a socket or a pipe. The game is drawn into a
+    Screen and each frame sends only the changed cells. Narration animates
+    a few characters a frame as with AsyncStreamIO, but while more than
+    high_water bytes are waiting to be sent the animation frames are
+    skipped rather than queued, so a slow link loses smoothness, never
+    falls behind; prompts always go out. The player's terminal echoes what
+    they type, so the input rows are repainted at each prompt.
+    """
+
+    def __init__(self, writer, state, animate=True, size=SCREEN_SIZE, high_water=STREAM_HIGH_WATER):
+        self.writer = writer
+        self.animate = animate
+        self.high_water = high_water
+        self.screen = Screen(*size)
+        self.panels = ScreenPanels(self.screen, state)
+        self.pending = []
+        self.frames = self.skipped = self.bytes_sent = 0
+
+    @property
+    def main_win(self):
+        return self.panels.windows[1]
+
+    @property
+    def input_win(self):
+        return self.panels.windows[3]
+
+    def clear(self):
+        self.pending.append((None, 0))  # in turn with the narration queued before it
+
+    def slow_print(self, text, delay=0.05):
+        self.pending.append((text + "\n", delay))
+
+    def read_line(self, prompt=">> "):
+        raise RuntimeError("ScreenIO sessions are driven by serve_session")
+
+    def update_panels(self):
+        self.panels.render()
+
+    def show_map(self):
+        # The map is always in the sidebar.
+        self.panels.render()
+
+    def animation(self, interrupted=None):
+        """
+        Draw the queued narration into the main window, yielding after each
+        animation frame the seconds it stays up. The cursor is hidden and
+        left where the text ends, as curses would. Once interrupted() is
+        true (the player has typed ahead), the rest is drawn at once and,
+        as the typing was echoed wherever the cursor was, the whole screen
+        is repainted.
+        """
+        pending, self.pending = self.pending, []
+        typed_ahead = False
+
+        def skip():
+            nonlocal typed_ahead
+            if not typed_ahead and interrupted is not None and interrupted():
+                typed_ahead = True
+                self.screen.forget(range(self.screen.height))
+            return typed_ahead
+
+        if pending:
+            self.screen.cursor = None
+        for text, delay in pending:
+            if text is None:  # clear()
+                self.main_win.erase()
+                continue
+            if not self.animate or delay <= 0 or skip():
+                _add_text(self.main_win, text)
+                continue
+            step = max(1, round(FRAME_TIME / delay))
+            for i in range(0, len(text), step):
+                if skip():
+                    _add_text(self.main_win, text[i:])
+                    break
+                _add_text(self.main_win, text[i:i + step])
+                yield step * delay
+
+    def send_frame(self, force=False):
+        """Write the changes as one frame, unless the link is backed up and force is off; True if sent."""
+        transport = self.writer.transport
+        if not force and transport is not None and transport.get_write_buffer_size() > self.high_water:
+            self.skipped += 1
+            return False
+        self.panels.render()
+        for win in self.panels.windows:
+            win.noutrefresh()
+        data = self.screen.frame()
+        if data:
+            self.writer.write(data)
+            self.frames += 1
+            self.bytes_sent += len(data)
+        return True
+
+    def draw_prompt(self, prompt):
+        """Put prompt on the input line, with the cursor after it, and send it."""
+        win = self.input_win
+        begin_y, begin_x = win.getbegyx()
+        if self.screen.cursor is not None:
+            # The player's last line was echoed after the old prompt, and Enter took the cursor down a row.
+            echo_row = self.screen.cursor[0]
+            self.screen.forget(range(echo_row, min(echo_row + 2, self.screen.height)))
+        win.erase()
+        _add_text(win, prompt)
+        self.screen.cursor = (begin_y + win.y, begin_x + win.x)
+        self.send_frame(force=True)
+
+    async def flush(self, interrupt=None):
+        """Animate the queued narration (see animation), then send everything that is left."""
+        import asyncio
+        for seconds in self.animation(interrupt.done if interrupt is not None else None):
+            self.send_frame()
+            await asyncio.sleep(seconds)
+        self.send_frame(force=True)
+        await self.writer.drain()
+
+    async def show_prompt(self, prompt):
+        self.draw_prompt(prompt)
+        await self.writer.drain()
+
+async def serve_stdio(animate=True, save_dir=None, screen=SCREEN_SIZE):
+    """Play one streamed-screen session over stdin and stdout, e.g. 'ssh host pirates.py --screen'."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    await serve_session(reader, writer, animate, SaveSlots(save_dir) if save_dir else None, screen)
 
 ############################
 # Main Entry Point
@@ -798,7 +4029,84 @@ class TestJournalFunctions(unittest.TestCase):
 if __name__ == "__main__":
     # If "test" is passed as an argument, run the unit tests.
     if len(sys.argv) > 1 and sys.argv[1] == "test":
+        # The tests live in test_pirates.py so the game never loads them.
+        import unittest
+        import test_pirates
         sys.argv.pop(1)
-        unittest.main()
+        unittest.main(module=test_pirates)
     else:
-        curses.wrapper(curses_main)
+        import argparse
+        parser = argparse.ArgumentParser(description="Pirate Latitudes")
+        parser.add_argument("--headless", action="store_true", help="play on plain stdin/stdout")
+        parser.add_argument("--server", action="store_true", help="host telnet-style sessions")
+        parser.add_argument("--host", default=SERVER_HOST)
+        parser.add_argument("--port", type=int, default=SERVER_PORT)
+        parser.add_argument("--fast", action="store_true", help="server, --screen: send text without animation")
+        parser.add_argument("--screen", action="store_true",
+                            help="stream the full-screen layout as ANSI cell deltas: to each --server "
+                                 "connection, or else over stdin/stdout")
+        parser.add_argument("--screen-size", default="x".join(map(str, SCREEN_SIZE)), metavar="ROWSxCOLS",
+                            help="size of the streamed screen (default %(default)s)")
+        parser.add_argument("--convert-save", metavar="PATH", help="convert a JSON save to a binary .sav beside it")
+        parser.add_argument("--compile-movie", nargs=2, metavar=("SOURCE", "OUT"),
+                            help="compile a movie source into a .plm file")
+        parser.add_argument("--compile-text", nargs="+", metavar="PATH",
+                            help="compile text/<language>.txt sources into a catalog (the last PATH)")
+        parser.add_argument("--lang", default=DEFAULT_LANGUAGE, help="language of the story text")
+        parser.add_argument("--text-speed", type=float, default=TEXT_SPEED,
+                            help="text animation delay multiplier (0 prints instantly)")
+        parser.add_argument("--metrics", metavar="PATH",
+                            help="time hot paths; write them to PATH (.json, else Prometheus text) "
+                                 "at exit and on SIGUSR1")
+        parser.add_argument("--record", metavar="PATH",
+                            help="headless: save the typed lines and random seed for replay")
+        parser.add_argument("--save-dir", metavar="DIR",
+                            help=f"where save slots go (default {SAVE_DIR}; the server saves only if set)")
+        parser.add_argument("--no-autosave", action="store_true",
+                            help=f"do not autosave to {AUTOSAVE_FILE}")
+        parser.add_argument("--intro", choices=["auto", "always", "never"], default="auto",
+                            help="play the intro movie on the first run only (default), always or never")
+        args = parser.parse_args()
+        TEXT_SPEED = args.text_speed
+        screen = None
+        if args.screen:
+            try:
+                screen = tuple(int(n) for n in args.screen_size.lower().split("x"))
+            except ValueError:
+                screen = ()
+            if len(screen) != 2 or screen[0] < 12 or screen[1] < 60:
+                parser.error("--screen-size must be ROWSxCOLS, at least 12x60")
+        if args.lang != DEFAULT_LANGUAGE:
+            try:
+                CATALOG.set_language(args.lang)
+            except (OSError, ValueError) as e:
+                parser.error(str(e))
+        if args.metrics:
+            start_metrics(args.metrics)
+        if args.convert_save:
+            print(convert_save(args.convert_save))
+        elif args.compile_movie:
+            print(compile_movie(*args.compile_movie))
+        elif args.compile_text:
+            if len(args.compile_text) < 2:
+                parser.error("--compile-text needs at least one source and the output path")
+            print(compile_text(*args.compile_text))
+        elif args.headless:
+            headless_main(record=args.record, autosave=None if args.no_autosave else AUTOSAVE_FILE,
+                          slots=SaveSlots(args.save_dir or SAVE_DIR))
+        elif args.server:
+            import asyncio
+            try:
+                asyncio.run(serve(args.host, args.port, animate=not args.fast, save_dir=args.save_dir,
+                                  screen=screen))
+            except KeyboardInterrupt:
+                pass
+        elif args.screen:
+            import asyncio
+            try:
+                asyncio.run(serve_stdio(animate=not args.fast, save_dir=args.save_dir, screen=screen))
+            except KeyboardInterrupt:
+                pass
+        else:
+            curses.wrapper(curses_main, args.intro, None if args.no_autosave else AUTOSAVE_FILE,
+                           args.save_dir or SAVE_DIR)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Scripted-agent playthrough runner for Pirate Latitudes.
+
+Plays huge numbers of games without curses: random-walk agents and
+scripted strategies send commands straight into the scene flow from the
+ship's deck. Runs are split into shards, each with its own seed (so the
+totals do not depend on the number of workers), and played on a process
+pool. Every shard folds its games into a fixed-size Tally as it goes and
+the main process merges tallies as shards finish, so memory stays flat
+however many games are played. Reports scene visits, deaths, commands
+needed to reach the island and inputs the scenes do not handle.
+
+Usage:
+    python3 playthroughs.py                          # 100,000 games, random agent, every core
+    python3 playthroughs.py --runs 1000000 --agent mix --workers 8
+    python3 playthroughs.py --agent direct --max-commands 50 --seed 7
+    python3 playthroughs.py --runs 20000 --scaling   # throughput with 1..workers processes
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import pirates
+
+ISLAND = "island_approach"
+STORM = "storm_at_sea"
+# Everything a random walker may say: each command (quitting aside, so walks
+# end by dying or running out of commands, and the save/load/rewind time
+# travel), plus input no scene expects.
+WALK_COMMANDS = [command for command, _ in pirates.ORDERED_COMMANDS
+                 if command not in ("quit", "save", "load", "rewind")]
+WALK_NOISE = ["", "xyzzy", "sing a shanty", "sial north", "climb the rigging"]
+# Scripted strategies: the commands each scene is sent, in turn, cycling.
+STRATEGIES = {
+    "direct": {"ship_deck": ["sail"], "open_sea": ["sail"], STORM: ["fight"], ISLAND: ["quit"]},
+    "parley": {"ship_deck": ["sail"], "open_sea": ["sail"], STORM: ["negotiate"], ISLAND: ["quit"]},
+    "curious": {"ship_deck": ["look", "board", "map", "sail"], "below_deck": ["look", "search"],
+                "open_sea": ["look", "journal", "sail"], STORM: ["look", "fight"],
+                ISLAND: ["look", "board"]},
+}
+AGENTS = ["random", *STRATEGIES]
+
+def random_agent():
+    def next_command(scene_id, rng):
+        if rng.random() < 0.1:
+            return rng.choice(WALK_NOISE)
+        return rng.choice(WALK_COMMANDS)
+    return next_command
+
+def scripted_agent(strategy):
+    sent = Counter()  # commands sent per scene so far in this game
+
+    def next_command(scene_id, rng):
+        commands = strategy.get(scene_id, ["quit"])
+        sent[scene_id] += 1
+        return commands[(sent[scene_id] - 1) % len(commands)]
+    return next_command
+
+def make_agent(name):
+    return random_agent() if name == "random" else scripted_agent(STRATEGIES[name])
+
+class AgentIO(pirates.GameIO):
+    """Throws the narration away, noting only whether a command went unrecognized."""
+
+    def __init__(self, unrecognized):
+        self.unrecognized_texts = unrecognized
+        self.unrecognized = False
+
+    def clear(self):
+        pass
+
+    def slow_print(self, text, delay=0.05):
+        if text in self.unrecognized_texts:
+            self.unrecognized = True
+
+class Tally:
+    """Totals over any number of games, in memory that does not grow with them."""
+
+    def __init__(self):
+        self.games = 0
+        self.commands = 0
+        self.visits = Counter()      # scene id -> times entered
+        self.endings = Counter()     # "died", "quit" or "out of commands"
+        self.deaths = Counter()      # scene id -> games that ended in death there
+        self.reached_island = 0
+        self.commands_to_island = 0  # summed over the games that got there
+        self.unhandled = Counter()   # (scene id, parsed command) -> times
+        self.seconds = 0.0           # worker time spent playing
+
+    def merge(self, other):
+        self.games += other.games
+        self.commands += other.commands
+        self.visits.update(other.visits)
+        self.endings.update(other.endings)
+        self.deaths.update(other.deaths)
+        self.reached_island += other.reached_island
+        self.commands_to_island += other.commands_to_island
+        self.unhandled.update(other.unhandled)
+        self.seconds += other.seconds
+        return self
+
+def play(agent, rng, max_commands, tally, unrecognized):
+    """Play one game from the ship's deck, adding what happened to tally."""
+    state = pirates.new_game_state()
+    io = AgentIO(unrecognized)
+    flow = pirates.scene_flow(pirates.Session(io, state, rng=rng, save_file=None), "ship_deck")
+    next(flow)
+    scene_id = state.current_scene
+    tally.visits[scene_id] += 1
+    reached_island = False
+    ending, sent = "out of commands", max_commands
+    for n in range(1, max_commands + 1):
+        command = agent(scene_id, rng)
+        io.unrecognized = False
+        try:
+            flow.send(command)
+        except StopIteration:
+            ending, sent = ("died" if state.health <= 0 else "quit"), n
+            if ending == "died":
+                tally.deaths[scene_id] += 1
+            break
+        if state.health <= 0:  # the game offers a rewind; a playthrough ends at the death
+            ending, sent = "died", n
+            tally.deaths[scene_id] += 1
+            flow.close()
+            break
+        if io.unrecognized:
+            tally.unhandled[(scene_id, pirates.parse_command(command) or "(empty)")] += 1
+        if state.current_scene != scene_id:
+            scene_id = state.current_scene
+            tally.visits[scene_id] += 1
+            if scene_id == ISLAND and not reached_island:
+                reached_island = True
+                tally.reached_island += 1
+                tally.commands_to_island += n
+    else:
+        flow.close()
+    tally.commands += sent
+    tally.endings[ending] += 1
+    tally.games += 1
+
+def play_shard(job):
+    """Worker entry point: play one shard's games with its own seed; return their Tally."""
+    agent_name, seed, shard, games, max_commands = job
+    start = time.perf_counter()
+    rng = random.Random(f"{seed}:{shard}")
+    unrecognized = {pirates.story_text("scene.unknown"), pirates.story_text("storm_at_sea.unknown")}
+    agents = AGENTS if agent_name == "mix" else [agent_name]
+    tally = Tally()
+    for n in range(games):
+        play(make_agent(agents[n % len(agents)]), rng, max_commands, tally, unrecognized)
+    tally.seconds = time.perf_counter() - start
+    return tally
+
+def shards(runs, shard_size, agent, seed, max_commands):
+    for shard, start in enumerate(range(0, runs, shard_size)):
+        yield agent, seed, shard, min(shard_size, runs - start), max_commands
+
+def run(runs, workers, shard_size=1000, agent="random", seed=0, max_commands=200):
+    """Play runs games on workers processes; return (merged Tally, wall seconds)."""
+    total = Tally()
+    start = time.perf_counter()
+    jobs = shards(runs, shard_size, agent, seed, max_commands)
+    if workers == 1:
+        for job in jobs:
+            total.merge(play_shard(job))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for tally in pool.imap_unordered(play_shard, jobs):
+                total.merge(tally)
+    return total, time.perf_counter() - start
+
+def report(tally, elapsed, workers):
+    print(f"{tally.games:,} games, {tally.commands:,} commands in {elapsed:.2f}s on {workers} "
+          f"worker(s): {tally.games / elapsed:,.0f} games/s")
+    print("endings: " + ", ".join(f"{ending} {count / tally.games:.1%}"
+                                   for ending, count in tally.endings.most_common()))
+    print("scene visits per game:")
+    for scene_id in pirates.SCENES:
+        print(f"  {scene_id:<16} {tally.visits[scene_id] / tally.games:8.3f}")
+    for scene_id, deaths in tally.deaths.most_common():
+        print(f"deaths in {scene_id}: {deaths:,} ({deaths / tally.games:.2%} of games)")
+    if tally.reached_island:
+        print(f"reached the island in {tally.reached_island / tally.games:.1%} of games, after "
+              f"{tally.commands_to_island / tally.reached_island:.1f} commands on average")
+    else:
+        print("no game reached the island")
+    print("most common unhandled inputs (scene, command):")
+    for (scene_id, command), count in tally.unhandled.most_common(10):
+        print(f"  {scene_id:<16} {command:<12} {count:,}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=100_000, help="games to play")
+    parser.add_argument("--agent", choices=AGENTS + ["mix"], default="random",
+                        help="who plays; mix rotates through every agent")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard", type=int, default=1000, help="games per shard")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-commands", type=int, default=200, help="commands before a game is cut off")
+    parser.add_argument("--scaling", action="store_true",
+                        help="time the same games on 1, 2, ... up to --workers processes")
+    args = parser.parse_args(argv)
+    if min(args.runs, args.workers, args.shard, args.max_commands) < 1:
+        parser.error("--runs, --workers, --shard and --max-commands must be positive")
+
+    settings = dict(shard_size=args.shard, agent=args.agent, seed=args.seed,
+                    max_commands=args.max_commands)
+    if args.scaling:
+        base = None
+        for workers in range(1, args.workers + 1):
+            tally, elapsed = run(args.runs, workers, **settings)
+            rate = tally.games / elapsed
+            base = base or rate
+            print(f"{workers:>3} worker(s): {rate:10,.0f} games/s  "
+                  f"speedup {rate / base:5.2f}x  efficiency {rate / base / workers:6.1%}")
+        if args.workers > (os.cpu_count() or 1):
+            print(f"(only {os.cpu_count()} core(s) here, so extra workers cannot speed things up)")
+        return 0
+    tally, elapsed = run(args.runs, args.workers, **settings)
+    report(tally, elapsed, args.workers)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for Pirate Latitudes.
+
+Measures time-to-interactive: from spawning 'python3 pirates.py' on a
+pseudo-terminal until the main menu has been drawn, with the intro skipped
+(as it is on every run after the first). Also times a bare interpreter and
+a plain 'import pirates' for comparison. Exits non-zero when the median
+time-to-interactive is over budget.
+
+Usage:
+    python3 startup.py                  # 20 runs, 100 ms budget
+    python3 startup.py --runs 50 --budget 80
+    python3 startup.py --intro          # include the first-run intro (not budgeted)
+"""
+
+import argparse
+import os
+import pty
+import select
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAME = os.path.join(HERE, "pirates.py")
+MENU_DRAWN = b"Quit"  # the last menu item drawn
+TIMEOUT = 30.0
+
+def time_to_menu(args, cwd):
+    """Spawn the game on a pty; return seconds until the menu is on screen."""
+    env = dict(os.environ, TERM=os.environ.get("TERM", "xterm"), LINES="24", COLUMNS="80")
+    start = time.perf_counter()
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.chdir(cwd)
+        os.execve(sys.executable, [sys.executable, GAME, *args], env)
+    seen = b""
+    try:
+        while MENU_DRAWN not in seen:
+            if time.perf_counter() - start > TIMEOUT:
+                raise RuntimeError("the menu never appeared")
+            ready, _, _ = select.select([fd], [], [], 0.5)
+            if ready:
+                try:
+                    chunk = os.read(fd, 65536)
+                except OSError:
+                    chunk = b""
+                if not chunk:
+                    raise RuntimeError("the game exited before showing the menu")
+                seen = seen[-len(MENU_DRAWN):] + chunk
+        return time.perf_counter() - start
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        os.close(fd)
+
+def time_command(argv, cwd):
+    start = time.perf_counter()
+    subprocess.run(argv, cwd=cwd, check=True)
+    return time.perf_counter() - start
+
+def summarize(label, samples):
+    samples = sorted(samples)
+    print(f"{label:<28} median {statistics.median(samples) * 1000:7.1f} ms  "
+          f"min {samples[0] * 1000:7.1f} ms  max {samples[-1] * 1000:7.1f} ms")
+    return statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=100.0,
+                        help="median time-to-interactive allowed, in ms")
+    parser.add_argument("--intro", action="store_true",
+                        help="also time a first run, intro movie included")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as cwd:  # no save or intro marker of our own
+        interpreter = [time_command([sys.executable, "-c", "pass"], cwd) for _ in range(args.runs)]
+        imports = [time_command([sys.executable, "-c", f"import sys; sys.path.insert(0, {HERE!r}); "
+                                 "import pirates"], cwd) for _ in range(args.runs)]
+        menu = [time_to_menu(["--intro", "never"], cwd) for _ in range(args.runs)]
+        summarize("python3 -c pass", interpreter)
+        summarize("import pirates", imports)
+        median = summarize("time to menu (intro skipped)", menu)
+        if args.intro:
+            summarize("time to menu (first run)", [time_to_menu(["--intro", "always"], cwd)])
+    verdict = "within" if median * 1000 <= args.budget else "over"
+    print(f"time-to-interactive {median * 1000:.1f} ms is {verdict} the {args.budget:.0f} ms budget")
+    return 0 if verdict == "within" else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1257 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Pirate Latitudes.
+
+Usage:
+    python3 pirates.py test
+    python3 -m unittest test_pirates
+"""
+
+import asyncio
+import copy
+import curses
+import json
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+from array import array
+from unittest import mock
+
+import pirates
+from pirates import *  # the tests exercise the module's names directly
+from pirates import _save_journals
+
+class TestCommandParser(unittest.TestCase):
+    def test_empty_input(self):
+        self.assertEqual(parse_command(""), "")
+    
+    def test_look_commands(self):
+        self.assertEqual(parse_command("look around"), "look")
+        self.assertEqual(parse_command("examine the map"), "look")
+        self.assertEqual(parse_command("view"), "look")
+    
+    def test_sail_commands(self):
+        self.assertEqual(parse_command("sail north"), "sail")
+        self.assertEqual(parse_command("navigate quickly"), "sail")
+    
+    def test_board_commands(self):
+        self.assertEqual(parse_command("board the ship"), "board")
+        self.assertEqual(parse_command("enter cabin"), "board")
+    
+    def test_search_commands(self):
+        self.assertEqual(parse_command("search for clues"), "search")
+        self.assertEqual(parse_command("read journal"), "search")
+    
+    def test_fight_commands(self):
+        self.assertEqual(parse_command("fight them"), "fight")
+        self.assertEqual(parse_command("attack enemy"), "fight")
+    
+    def test_negotiate_commands(self):
+        self.assertEqual(parse_command("negotiate peace"), "negotiate")
+        self.assertEqual(parse_command("talk to captain"), "negotiate")
+    
+    def test_unlock_commands(self):
+        self.assertEqual(parse_command("unlock door"), "unlock")
+        self.assertEqual(parse_command("open chest"), "unlock")
+    
+    def test_map_commands(self):
+        self.assertEqual(parse_command("map"), "map")
+        self.assertEqual(parse_command("show map please"), "map")
+        self.assertEqual(parse_command("read map"), "map")
+        self.assertEqual(parse_command("take map"), "map")
+        self.assertEqual(parse_command("I want to see the map"), "map")
+    
+    def test_journal_commands(self):
+        self.assertEqual(parse_command("journal"), "journal")
+        self.assertEqual(parse_command("codex entries"), "journal")
+    
+    def test_help_commands(self):
+        self.assertEqual(parse_command("help"), "help")
+        self.assertEqual(parse_command("commands"), "help")
+    
+    def test_quit_commands(self):
+        self.assertEqual(parse_command("quit"), "quit")
+        self.assertEqual(parse_command("exit now"), "quit")
+    
+    def test_save_commands(self):
+        self.assertEqual(parse_command("save game"), "save")
+    
+    def test_load_commands(self):
+        self.assertEqual(parse_command("load game"), "load")
+    
+    def test_unknown_command(self):
+        self.assertEqual(parse_command("foobar test"), "foobar")
+
+    def test_priority_order(self):
+        self.assertEqual(parse_command("parley then attack"), "fight")
+        self.assertEqual(parse_command("set course and board"), "sail")
+        self.assertEqual(parse_command("open the journal"), "journal")
+        self.assertEqual(parse_command("mapmaker's talk"), "negotiate")
+
+    def test_typos(self):
+        self.assertEqual(parse_command("sial north"), "sial")  # parse_command only matches synonyms
+        self.assertEqual(suggest_command("please sial north"), ("sail", "sail", True))
+        self.assertEqual(suggest_command("negotate"), ("negotiate", "negotiate", True))
+        self.assertEqual(suggest_command("set corse for the isle"), ("sail", "set course", True))
+        self.assertEqual(suggest_command("quti!"), ("quit", "quit", True))
+        self.assertEqual(suggest_command("nagotiatte"), ("negotiate", "negotiate", False))  # two slips
+        self.assertIsNone(suggest_command("lok"))  # too short to guess at
+        for word in ("boat", "loot", "sale", "maps"):  # real words, not typos
+            self.assertEqual(parse_command(word), word)
+            self.assertIsNone(suggest_command(word))
+        self.assertEqual(parse_command("sial and board"), "board")  # exact matches come first
+
+    def test_ambiguous_typos_are_not_suggested(self):
+        self.assertIsNone(suggest_command("sial then atack"))
+        self.assertEqual(suggest_command("sial then sail"), ("sail", "sail", True))
+
+    def test_sure_typos_are_carried_out(self):
+        session = Session(MemoryIO(["sial north"]), new_game_state(), save_file=None)
+        self.assertEqual(drive(session, scene_ship_deck(session)), "open_sea")
+        self.assertIn("(Taking that as 'sail'.)", session.io.output)
+        self.assertIn(story_text("ship_deck.sail"), session.io.output)
+        session = Session(MemoryIO(["negotate"]), new_game_state(), save_file=None)
+        self.assertEqual(drive(session, scene_storm_at_sea(session)), "island_approach")
+        self.assertIn(story_text("storm_at_sea.negotiate"), session.io.output)
+
+    def test_unsure_typos_are_suggested(self):
+        session = Session(MemoryIO(["nagotiatte", "", "quit"]), new_game_state(), save_file=None)
+        drive(session, scene_ship_deck(session))
+        unknown = story_text("scene.unknown")
+        self.assertEqual(session.state.current_scene, "ship_deck")
+        self.assertEqual(session.io.output[-4:-1], [unknown, "Did you mean 'negotiate'?", unknown])
+
+    def test_fuzzy_index_finds_what_brute_force_does(self):
+        rng = random.Random(81)
+        words = {"".join(rng.choice("abcde") for _ in range(rng.randint(3, 8))) for _ in range(300)}
+        index = FuzzyIndex(words)
+        for _ in range(200):
+            query = "".join(rng.choice("abcde") for _ in range(rng.randint(3, 8)))
+            expected = sorted((edit_distance(query, word, 2), word) for word in words
+                              if edit_distance(query, word, 2) <= 2)
+            self.assertEqual(index.lookup(query), expected)
+        self.assertEqual(edit_distance("sial", "sail", 2), 1)
+
+class TestSceneDispatcher(unittest.TestCase):
+    def test_scene_table(self):
+        for scene_id, scene in SCENES.items():
+            self.assertEqual(scene.__name__, "scene_" + scene_id)
+
+    def test_transitions_do_not_nest(self):
+        depths = []
+        def fake_scene(session):
+            yield from ()
+            frame, depth = sys._getframe(), 0
+            while frame is not None:
+                frame, depth = frame.f_back, depth + 1
+            depths.append(depth)
+            return "below_deck" if len(depths) < 500 else None
+        saved = dict(SCENES)
+        try:
+            SCENES.update(ship_deck=fake_scene, below_deck=fake_scene)
+            run_scenes(Session(MemoryIO()), "ship_deck")
+        finally:
+            SCENES.update(saved)
+        self.assertEqual(len(depths), 500)
+        self.assertEqual(min(depths), max(depths))
+
+class TestHeadlessIO(unittest.TestCase):
+    def setUp(self):
+        self.saved_state = dict(game_state)
+        game_state.clear()
+        game_state.update(new_game_state())
+
+    def tearDown(self):
+        game_state.clear()
+        game_state.update(self.saved_state)
+
+    def test_record_and_replay(self):
+        inputs = ["Anne", "5 3 2", "look", "", "journal", "sail", "sail", "fight", "board", "quit"]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "session.json")
+            headless_main(MemoryIO(inputs), record=path)
+            recording = load_recording(path)
+        self.assertEqual(recording["inputs"], inputs)
+        replayed = replay(recording)
+        self.assertEqual(replayed.state["health"], game_state["health"])
+        self.assertEqual(list(replayed.state["story_log"]), list(game_state["story_log"]))
+        self.assertEqual(len(replayed.timings), len(inputs))
+        self.assertEqual(replayed.timings[5][1:3], ("ship_deck", "open_sea"))
+        self.assertIn("Farewell", replayed.main_win.text())
+
+    def test_scripted_playthrough(self):
+        io = MemoryIO(["Anne", "4 3 3", "look", "sail", "sail", "negotiate", "quit"])
+        headless_main(io)
+        self.assertEqual(game_state["name"], "Anne")
+        self.assertEqual(game_state["current_scene"], "island_approach")
+        self.assertIn("Approaching the Secret Island.", game_state["story_log"])
+        self.assertEqual(io.output[-1], "Thank you for playing!")
+
+    def test_exhausted_input_quits(self):
+        session = Session(MemoryIO([]))
+        self.assertIsNone(drive(session, scene_ship_deck(session)))
+        self.assertEqual(session.io.output[-1], "The tides recede as you exit the adventure. Farewell!")
+
+    def test_stream_io(self):
+        import io as stdio
+        out = stdio.StringIO()
+        stream = StreamIO(stdio.StringIO("look\n"), out)
+        self.assertEqual(stream.read_line(), "look")
+        stream.slow_print("Ahoy")
+        self.assertEqual(out.getvalue(), ">> Ahoy\n")
+
+class TestServer(unittest.TestCase):
+    def test_sessions_are_isolated(self):
+        before = dict(game_state)
+        before_events = len(game_state["story_log"])
+
+        async def client(port, name):
+            reader, writer = await asyncio.open_connection(SERVER_HOST, port)
+            writer.write(f"{name}\n4 3 3\nboard\nsearch\nquit\n".encode())
+            data = await reader.read()
+            writer.close()
+            return data.decode()
+
+        async def run():
+            server = await asyncio.start_server(
+                lambda r, w: serve_session(r, w, animate=False), SERVER_HOST, 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await asyncio.gather(client(port, "Anne"), client(port, "Mary"))
+
+        anne, mary = asyncio.run(run())
+        self.assertIn("Anne, you stand on the weather-beaten deck", anne)
+        self.assertIn("Mary, you stand on the weather-beaten deck", mary)
+        self.assertNotIn("Mary", anne)
+        self.assertTrue(anne.endswith("Thank you for playing!\r\n"))
+        self.assertEqual(game_state, before)
+        self.assertEqual(len(game_state["story_log"]), before_events)
+
+    def test_saves_run_off_the_event_loop(self):
+        threads = []
+
+        class Slots(SaveSlots):
+            def save(self, state, slot):
+                threads.append(threading.get_ident())
+                return super().save(state, slot)
+
+        async def run(slots):
+            server = await asyncio.start_server(
+                lambda r, w: serve_session(r, w, animate=False, slots=slots), SERVER_HOST, 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection(SERVER_HOST, port)
+                writer.write(b"Anne\n4 3 3\nsave\nquit\n")
+                data = await reader.read()
+                writer.close()
+                return data.decode()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            slots = Slots(tmpdir)
+            output = asyncio.run(run(slots))
+            _save_journals.clear()
+            self.assertIn("Game saved successfully!", output)
+            self.assertTrue(output.endswith("Thank you for playing!\r\n"))
+            self.assertTrue(os.path.exists(slots.path("Anne")))
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+class TestSaveJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "save.sav")
+        _save_journals.clear()
+
+    def tearDown(self):
+        _save_journals.clear()
+        self.tmpdir.cleanup()
+
+    def reload(self):
+        _save_journals.clear()  # forget the baseline, as a new process would
+        loaded = new_game_state()
+        self.assertEqual(load_game(loaded, self.path), "Game loaded successfully!")
+        return loaded
+
+    def test_saves_append_deltas(self):
+        state = new_game_state()
+        save_game(state, self.path)
+        add_event("Found a doubloon.", state=state)
+        state["health"] = 85
+        save_game(state, self.path)
+        save_game(state, self.path)
+        with open(self.path + ".journal") as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["set"], {"health": 85})
+        self.assertEqual(records[0]["events"], ["Found a doubloon."])
+        self.assertEqual(self.reload(), state)
+
+    def test_torn_tail_and_stale_records_are_ignored(self):
+        state = new_game_state()
+        save_game(state, self.path)
+        state["reputation"] = 3
+        save_game(state, self.path)
+        with open(self.path + ".journal", "a") as f:
+            f.write(json.dumps({"gen": "stale", "set": {"health": 1}}) + "\n")
+            f.write('{"gen": "torn", "se')
+        self.assertEqual(self.reload(), state)
+
+    def test_compaction(self):
+        state = new_game_state()
+        for i in range(COMPACT_EVERY + 1):
+            add_event(f"Event {i}", state=state)
+            save_game(state, self.path)
+        self.assertLess(os.path.getsize(self.path + ".journal"), 200)
+        self.assertEqual(self.reload(), state)
+
+    def test_binary_snapshot_is_lazy(self):
+        state = new_game_state()
+        state["name"] = "Anne Bonny"
+        state["inventory"] = ["cutlass"]
+        state["story_log"] = StoryLog(f"Event {i}" for i in range(100))
+        save_game(state, self.path)
+        with open(self.path, "rb") as f:
+            self.assertTrue(f.read().startswith(SAVE_MAGIC))
+        header = read_save_header(self.path)
+        self.assertEqual(header["name"], "Anne Bonny")
+        self.assertEqual(header["inventory"], ["cutlass"])
+        self.assertNotIn("story_log", header)
+        loaded = self.reload()
+        self.assertIsNotNone(loaded["story_log"].encoded())
+        self.assertEqual(len(loaded["story_log"]), 100)
+        add_event("Event 100", state=loaded)
+        self.assertEqual(loaded["story_log"][100:], ["Event 100"])
+        self.assertEqual(loaded["story_log"][-1], "Event 100")
+        self.assertEqual(loaded["story_log"], list(state["story_log"]) + ["Event 100"])
+
+    def test_corrupt_snapshot_is_rejected(self):
+        save_game(new_game_state(), self.path)
+        with open(self.path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"\x00")
+        _save_journals.clear()
+        self.assertIn("corrupt", load_game({}, self.path))
+
+    def test_journal_past_the_log_is_rejected(self):
+        state = new_game_state()
+        save_game(state, self.path)
+        add_event("Found a doubloon.", state=state)
+        save_game(state, self.path)
+        with open(self.path + ".journal") as f:
+            record = json.loads(f.readline())
+        record["at"] += 5  # as if the snapshot had lost events
+        with open(self.path + ".journal", "w") as f:
+            f.write(json.dumps(record) + "\n")
+        _save_journals.clear()
+        loaded = new_game_state()
+        self.assertIn("corrupt", load_game(loaded, self.path))
+        self.assertEqual(loaded, new_game_state())  # left as it was
+
+    def test_convert_json_save(self):
+        state = new_game_state()
+        state["story_log"] = ["Arrived at the Ship's Deck."]
+        legacy = legacy_save_path(self.path)
+        with open(legacy, "w") as f:
+            json.dump(dict(state), f)
+        state["story_log"] = StoryLog(state["story_log"])
+        convert_save(legacy)
+        with open(self.path, "rb") as f:
+            self.assertTrue(f.read().startswith(SAVE_MAGIC))
+        with open(legacy) as f:
+            self.assertEqual(json.load(f)["story_log"], ["Arrived at the Ship's Deck."])  # left as it was
+        self.assertEqual(self.reload(), state)
+
+    def test_plain_json_save(self):
+        state = new_game_state()
+        state["name"] = "Old Salt"
+        state["story_log"] = []
+        with open(self.path, "w") as f:
+            json.dump(dict(state), f)
+        self.assertEqual(self.reload(), state)
+
+    def test_json_save_under_the_old_name(self):
+        self.assertTrue(SAVE_FILE.endswith(".sav") and AUTOSAVE_FILE.endswith(".sav"))
+        state = new_game_state()
+        state["name"] = "Old Salt"
+        state["story_log"] = []
+        with open(legacy_save_path(self.path), "w") as f:
+            json.dump(dict(state), f)
+        self.assertEqual(self.reload(), state)  # loaded from save.json
+        save_game(state, self.path)
+        with open(self.path, "rb") as f:
+            self.assertTrue(f.read().startswith(SAVE_MAGIC))
+
+class TestSaveSlots(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.slots = SaveSlots(self.tmpdir.name)
+        _save_journals.clear()
+
+    def tearDown(self):
+        _save_journals.clear()
+        self.tmpdir.cleanup()
+
+    def captain(self, name, health=100):
+        state = new_game_state()
+        state.name, state.health, state.current_scene = name, health, "open_sea"
+        add_event(f"{name} set sail.", state=state)
+        return state
+
+    def test_save_list_and_load(self):
+        anne = self.captain("Anne", 85)
+        self.assertEqual(self.slots.save(anne, "Anne"), "Game saved successfully!")
+        self.assertEqual(self.slots.save(self.captain("Mary"), "Mary"), "Game saved successfully!")
+        entries = self.slots.list()
+        self.assertEqual([entry["slot"] for entry in entries], ["Mary", "Anne"])
+        self.assertEqual((entries[1]["health"], entries[1]["scene"]), (85, "open_sea"))
+        self.assertGreater(entries[1]["size"], 0)
+        _save_journals.clear()
+        loaded = new_game_state()
+        self.assertEqual(self.slots.load(loaded, "Anne"), "Game loaded successfully!")
+        self.assertEqual(loaded, anne)
+
+    def test_slot_saves_are_timed(self):
+        metrics = Metrics()
+        metrics.enable()
+        try:
+            self.slots.save(self.captain("Anne"), "Anne")
+            self.slots.load(new_game_state(), "Anne")
+        finally:
+            metrics.disable()
+        self.assertEqual(sum(metrics.histograms["save_game"].counts), 1)
+        self.assertEqual(sum(metrics.histograms["load_game"].counts), 1)
+
+    def test_listing_reads_only_the_index(self):
+        self.slots.save(self.captain("Anne"), "Anne")
+        other = SaveSlots(self.tmpdir.name)  # another process sharing the directory
+        self.assertEqual(len(other.list()), 1)
+        self.slots.save(self.captain("Mary"), "Mary")
+        self.slots.delete("Anne")
+        with mock.patch("pirates.read_save_header", side_effect=AssertionError), \
+                mock.patch("pirates.load_game", side_effect=AssertionError):
+            self.assertEqual([entry["slot"] for entry in other.list()], ["Mary"])
+
+    def test_index_is_compacted(self):
+        state = self.captain("Anne")
+        for n in range(3 * COMPACT_EVERY):
+            state.health = n
+            self.slots.save(state, "Anne")
+        with open(self.slots.index_path) as f:
+            self.assertLessEqual(len(f.readlines()), COMPACT_EVERY + 1)
+        self.assertEqual(SaveSlots(self.tmpdir.name).list()[0]["health"], 3 * COMPACT_EVERY - 1)
+
+    def test_missing_index_is_rebuilt_from_the_saves(self):
+        self.slots.save(self.captain("Anne"), "Anne")
+        self.slots.save(self.captain("Mary"), "Second voyage")
+        os.remove(self.slots.index_path)
+        slots = SaveSlots(self.tmpdir.name)
+        entries = {entry["slot"]: entry for entry in slots.list()}
+        self.assertEqual(entries["Anne"]["name"], "Anne")
+        [stem] = [slot for slot in entries if slot != "Anne"]
+        loaded = new_game_state()
+        self.assertEqual(slots.load(loaded, stem), "Game loaded successfully!")
+        self.assertEqual(loaded.name, "Mary")
+
+    def test_any_slot_name_gets_its_own_file(self):
+        paths = {self.slots.path(name) for name in ("Anne", "anne", "../Anne", "Ánne", "")}
+        self.assertEqual(len(paths), 5)
+        for path in paths:
+            self.assertEqual(os.path.dirname(path), self.tmpdir.name)
+
+class TestAutosave(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "autosave.sav")
+        _save_journals.clear()
+
+    def tearDown(self):
+        _save_journals.clear()
+        self.tmpdir.cleanup()
+
+    def reload(self):
+        _save_journals.clear()
+        loaded = new_game_state()
+        self.assertEqual(load_game(loaded, self.path), "Game loaded successfully!")
+        return loaded
+
+    def test_bursts_coalesce_into_one_write(self):
+        autosaver = Autosaver(self.path, quiet=60, max_delay=60)
+        state = new_game_state()
+        for n in range(5):
+            add_event(f"Event {n}", state=state)
+            state.health -= 1
+            self.assertTrue(autosaver.note(state))
+        self.assertFalse(autosaver.note(state))
+        autosaver.stop()
+        self.assertEqual(autosaver.writes, 1)
+        self.assertEqual(self.reload(), state)
+
+    def test_saves_the_noted_state_not_later_changes(self):
+        autosaver = Autosaver(self.path, quiet=60, max_delay=60)
+        state = new_game_state()
+        state.inventory.append("compass")
+        autosaver.note(state)
+        expected = copy.deepcopy(dict(state))
+        state.inventory.append("cutlass")
+        add_event("Unsaved event", state=state)
+        autosaver.stop()
+        loaded = self.reload()
+        self.assertEqual(loaded.inventory, ["compass"])
+        self.assertEqual(list(loaded.story_log), list(expected["story_log"]))
+
+    def test_deltas_are_journaled_and_max_delay_bounds_the_wait(self):
+        autosaver = Autosaver(self.path, quiet=60, max_delay=0.01)
+        state = new_game_state()
+        autosaver.note(state)
+        autosaver.flush()
+        for n in range(3):
+            add_event(f"Event {n}", state=state)
+            autosaver.note(state)
+            autosaver.flush()
+        state.health = 40
+        autosaver.note(state)
+        deadline = time.monotonic() + 5
+        while autosaver.writes < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        autosaver.stop()
+        self.assertEqual(autosaver.writes, 5)
+        with open(self.path + ".journal") as f:
+            self.assertEqual(len(f.readlines()), 4)
+        self.assertEqual(self.reload(), state)
+
+    def test_sessions_autosave_before_each_prompt(self):
+        autosaver = Autosaver(self.path)
+        session = Session(MemoryIO(["look", "sail", "quit"]), new_game_state(),
+                          save_file=None, autosave=autosaver)
+        run_scenes(session, "ship_deck")
+        autosaver.stop()
+        self.assertIsNone(autosaver.error)
+        self.assertEqual(self.reload().current_scene, "open_sea")
+
+class TestStoryLog(unittest.TestCase):
+    def test_spills_beyond_recent_window(self):
+        log = StoryLog()
+        events = [f"Event {i}" for i in range(5 * RECENT_EVENTS)]
+        log.extend(events)
+        self.assertLess(len(log._recent), 2 * RECENT_EVENTS)
+        self.assertEqual(len(log), len(events))
+        self.assertEqual(log[0], "Event 0")
+        self.assertEqual(log[-1], events[-1])
+        self.assertEqual(log[RECENT_EVENTS - 2:RECENT_EVENTS + 700], events[RECENT_EVENTS - 2:RECENT_EVENTS + 700])
+        self.assertEqual(log.page(len(events) - 5, 20), events[-5:])
+        self.assertEqual(log, events)
+
+    def test_truncate(self):
+        events = [f"Event {i}" for i in range(3 * RECENT_EVENTS)]
+        log = StoryLog(events)
+        del log[len(events) - 3:]
+        self.assertEqual(log, events[:-3])
+        log.truncate(10)
+        log.append("After rewind")
+        self.assertEqual(log, events[:10] + ["After rewind"])
+
+    def test_blob_stays_compressed_until_read(self):
+        events = ["Arrived at the Ship's Deck.", "Exploring Below Deck."]
+        log = StoryLog(blob=zlib.compress(json.dumps(events).encode()), count=2)
+        log.append("Sailing on the Open Sea.")
+        self.assertEqual(log[2:], ["Sailing on the Open Sea."])
+        self.assertIsNotNone(log._blob)
+        self.assertEqual(log[0], events[0])
+        self.assertIsNone(log._blob)
+
+    def test_events_are_interned(self):
+        log = StoryLog(["Exploring Below Deck."] * 3)
+        log.append("Character created: {} with skills {}", "Anne", "{'combat': 5}")
+        self.assertEqual(len(set(log._recent[:3])), 1)
+        self.assertEqual(log[3], "Character created: Anne with skills {'combat': 5}")
+        with mock.patch.object(EVENTS, "limit", len(EVENTS.texts)):
+            log.append("A text the full table has never seen")
+        self.assertEqual(log._recent[-1], RAW_EVENT)
+        self.assertEqual(log[-1], "A text the full table has never seen")
+        log.truncate(3)
+        self.assertEqual((len(log), log._params), (3, {}))
+
+    def test_game_state_mapping(self):
+        state = new_game_state()
+        state.health -= 15
+        state["reputation"] = 2
+        state["ship"] = "Black Meridian"  # not a field: kept in extra
+        self.assertEqual((state["health"], state.reputation), (85, 2))
+        self.assertIn("ship", state.keys())
+        with self.assertRaises(AttributeError):
+            state.gold = 10
+        copy_ = GameState(dict(state))
+        self.assertEqual(copy_, state)
+        state.clear()
+        self.assertEqual((state.health, state.extra), (100, {}))
+
+    def test_journal_page_start(self):
+        self.assertEqual(journal_page_start(100, 100, 20), 80)
+        self.assertEqual(journal_page_start(100, -5, 20), 0)
+        self.assertEqual(journal_page_start(5, 5, 20), 0)
+
+class TestJournalSearch(unittest.TestCase):
+    def campaign(self, visits=200):
+        log = StoryLog()
+        for _ in range(visits):
+            log.append("Arrived at the Ship's Deck.", scene="ship_deck")
+            log.append("Exploring Below Deck.", scene="below_deck")
+            log.append("Learned about secret island.", scene="below_deck")
+            log.append("Endured the Storm at Sea.", scene="storm_at_sea")
+        return log
+
+    def search(self, log, text):
+        matches = search_journal(log, journal_query(text))
+        return matches.page(0, len(matches))
+
+    def test_query_parsing(self):
+        self.assertIsNone(journal_query("journal"))
+        self.assertIsNone(journal_query("open the codex"))
+        query = journal_query("check journal Secret island in:storm")
+        self.assertEqual((query.terms, query.scenes), (["secret", "island"], ["storm"]))
+        self.assertEqual(query.text, "secret island in:storm")
+
+    def test_terms_scenes_and_prefixes(self):
+        log = self.campaign(3)
+        self.assertEqual(self.search(log, "journal secret island"),
+                         ["Learned about secret island. [below_deck]"] * 3)
+        self.assertEqual(self.search(log, "journal deck in:ship"),
+                         ["Arrived at the Ship's Deck. [ship_deck]"] * 3)
+        self.assertEqual(len(self.search(log, "journal in:below")), 6)
+        self.assertEqual(len(self.search(log, "journal explor")), 3)
+        self.assertEqual(self.search(log, "journal kraken"), [])
+        self.assertEqual(self.search(log, "journal storm in:deck"), [])
+        # No event has both words: those with the most of them, in order.
+        self.assertEqual(self.search(log, "journal storm arrived")[:2],
+                         ["Arrived at the Ship's Deck. [ship_deck]", "Endured the Storm at Sea. [storm_at_sea]"])
+
+    def test_pages_from_either_end(self):
+        log = self.campaign()
+        matches = search_journal(log, journal_query("journal deck"))
+        self.assertEqual(len(matches), 400)
+        everything = [event for event in log if "Deck" in event]
+        self.assertEqual([event.split(" [")[0] for event in matches.page(390, 20)], everything[390:])
+        self.assertEqual([event.split(" [")[0] for event in matches.page(0, 3)], everything[:3])
+
+    def test_index_follows_truncation(self):
+        log = self.campaign()
+        del log[5:]
+        self.assertEqual(len(log.search_index), 5)
+        self.assertEqual(self.search(log, "journal storm"), ["Endured the Storm at Sea. [storm_at_sea]"])
+        log.append("Endured the Storm at Sea.", scene="storm_at_sea")
+        self.assertEqual(len(self.search(log, "journal storm")), 2)
+
+    def test_unscened_events_are_indexed_on_first_search(self):
+        log = StoryLog(["Exploring Below Deck."] * 3)
+        log.search_index = JournalIndex()  # as from a version 1 save
+        self.assertEqual(self.search(log, "journal below"), ["Exploring Below Deck."] * 3)
+
+    def test_searchable_after_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "save.sav")
+            state = new_game_state()
+            state.story_log = self.campaign(2)
+            save_game(state, path)
+            state.current_scene = "island_approach"
+            add_event("Approaching the Secret Island.", state=state)
+            save_game(state, path)
+            _save_journals.clear()
+            loaded = new_game_state()
+            load_game(loaded, path)
+            _save_journals.clear()
+        self.assertIsNotNone(loaded.story_log.search_index._blob)  # not decoded until searched
+        self.assertEqual(self.search(loaded.story_log, "journal secret in:below"),
+                         ["Learned about secret island. [below_deck]"] * 2)
+        self.assertEqual(self.search(loaded.story_log, "journal secret in:island"),
+                         ["Approaching the Secret Island. [island_approach]"])
+
+    def test_version_1_saves_still_load(self):
+        state = new_game_state()
+        state.story_log = self.campaign(1)
+        data = encode_save(state, "00" * 8)
+        index_section = 12 + len(state.story_log.search_index.encoded()[0])
+        old = data[:4] + (1).to_bytes(2, "little") + data[6:-index_section]  # without the index
+        loaded, _ = decode_save(old)
+        self.assertEqual(list(loaded["story_log"]), list(state.story_log))
+        self.assertEqual(self.search(loaded["story_log"], "journal storm"), ["Endured the Storm at Sea."])
+
+    def test_search_after_load_does_not_read_the_log(self):
+        state = new_game_state()
+        state.story_log = self.campaign(300)
+        state.story_log.append("Sighted a ship at position {}.", 1000, scene="open_sea")
+        loaded, _ = decode_save(encode_save(state, "00" * 8))
+        log = loaded["story_log"]
+        log.append("Endured the Storm at Sea.", scene="storm_at_sea")
+        with mock.patch.object(StoryLog, "page", side_effect=AssertionError("log read")):
+            matches = search_journal(log, journal_query("journal storm"))
+        self.assertEqual(len(matches), 301)
+        self.assertEqual(matches.page(300, 1), ["Endured the Storm at Sea. [storm_at_sea]"])
+        self.assertEqual(log.search_index.encoded()[1], len(log))
+
+    def test_version_3_saves_still_load(self):
+        state = new_game_state()
+        state.story_log = self.campaign(2)
+        data = encode_save(state, "00" * 8)
+        index = state.story_log.search_index
+        index_section = 12 + len(index.encoded()[0])
+        meta = json.dumps(index.scene_names).encode("utf-8")
+        runs = zlib.compress(struct.pack("<II", len(index), len(meta)) + meta + index.runs.tobytes())
+        old = (data[:4] + (3).to_bytes(2, "little") + data[6:-index_section]
+               + struct.pack("<III", len(index), len(runs), zlib.crc32(runs)) + runs)
+        loaded, _ = decode_save(old)
+        self.assertEqual(self.search(loaded["story_log"], "journal secret in:below"),
+                         ["Learned about secret island. [below_deck]"] * 2)
+
+    def test_version_2_saves_still_load(self):
+        state = new_game_state()
+        state.story_log = self.campaign(2)
+        data = encode_save(state, "00" * 8)
+        index = state.story_log.search_index
+        index_section = 12 + len(index.encoded()[0])
+        keys = list(index.postings)  # version 2 saved the postings themselves
+        meta = json.dumps([index.scene_names, keys]).encode("utf-8")
+        postings = zlib.compress(struct.pack("<II", len(index), len(meta)) + meta
+                                 + array("I", (len(index.postings[key]) for key in keys)).tobytes()
+                                 + b"".join(index.postings[key].tobytes() for key in keys))
+        old = (data[:4] + (2).to_bytes(2, "little") + data[6:-index_section]
+               + struct.pack("<III", len(index), len(postings), zlib.crc32(postings)) + postings)
+        loaded, _ = decode_save(old)
+        self.assertEqual(self.search(loaded["story_log"], "journal secret in:below"),
+                         ["Learned about secret island. [below_deck]"] * 2)
+        self.assertEqual(loaded["story_log"].search_index.runs, index.runs)
+
+    def test_scene_command(self):
+        session = Session(MemoryIO(["board", "search", "journal secret in:below", "quit"]),
+                          new_game_state(), save_file=None)
+        drive(session, scene_flow(session, "ship_deck"))
+        output = session.io.output
+        self.assertIn("=== Journal: secret in:below ===", output)
+        self.assertIn(" * Learned about secret island. [below_deck]", output)
+
+class TestCheckpoints(unittest.TestCase):
+    class LowRolls(random.Random):
+        def randint(self, low, high):
+            return low
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "save.sav")
+        _save_journals.clear()
+
+    def tearDown(self):
+        _save_journals.clear()
+        self.tmpdir.cleanup()
+
+    def play(self, inputs, state=None, **session_args):
+        state = state or new_game_state()
+        session = Session(MemoryIO(inputs), state, rng=self.LowRolls(), save_file=self.path, **session_args)
+        run_scenes(session, "ship_deck")
+        return session
+
+    def test_rewind_after_death_in_the_storm(self):
+        state = new_game_state()
+        state.health, state.skills["combat"] = 10, 1
+        session = self.play(["sail", "sail", "fight", "rewind", "negotiate", "quit"], state)
+        self.assertIn(story_text("perished.enter"), session.io.output)
+        self.assertEqual((state.health, state.current_scene), (10, "island_approach"))
+        self.assertEqual(list(state.story_log)[-3:], ["Sailing on the Open Sea.", "Endured the Storm at Sea.",
+                                                      "Approaching the Secret Island."])
+
+    def test_death_without_input_ends_the_game(self):
+        state = new_game_state()
+        state.health, state.skills["combat"] = 10, 1
+        self.play(["sail", "sail", "fight"], state)
+        self.assertEqual(state.health, -5)
+
+    def test_rewind_several_scenes(self):
+        state = new_game_state()
+        session = self.play(["board", "search", "sail", "sail", "rewind 3", "rewind 9", "quit"], state)
+        # Back to the second visit to the deck (checkpointed again as it is re-entered).
+        self.assertEqual(state.current_scene, "ship_deck")
+        self.assertEqual(list(state.story_log), ["Arrived at the Ship's Deck.", "Exploring Below Deck.",
+                                                 "Learned about secret island.", "Arrived at the Ship's Deck."])
+        self.assertIn(story_text("rewind.none", available=3), session.io.output)
+
+    def test_checkpoints_share_unchanged_fields(self):
+        state = new_game_state()
+        state.inventory.append("compass")
+        checkpoints = Checkpoints()
+        checkpoints.take(state, "ship_deck")
+        add_event("Arrived at the Ship's Deck.", state=state)
+        state.health -= 15
+        checkpoints.take(state, "open_sea")
+        first, second = checkpoints.items
+        inventory = first.keys.index("inventory")
+        self.assertIs(first.values[inventory], second.values[inventory])
+        self.assertIsNot(first.values[inventory], state.inventory)
+        state.inventory.append("cutlass")
+        state.extra["parrot"] = "Polly"
+        self.assertEqual(checkpoints.restore(state, 2), "ship_deck")
+        self.assertEqual((state.inventory, state.health, len(state.story_log)), (["compass"], 100, 0))
+        self.assertNotIn("parrot", state)
+        self.assertEqual(len(checkpoints), 0)
+
+    def test_a_loaded_game_starts_new_checkpoints(self):
+        checkpoints = Checkpoints()
+        state = new_game_state()
+        checkpoints.take(state, "ship_deck")
+        state.story_log = StoryLog(["Loaded from a save."])
+        self.assertIsNone(checkpoints.restore(state))
+        self.assertEqual(len(state.story_log), 1)
+
+    def test_rewound_events_are_saved(self):
+        state = new_game_state()
+        self.play(["board", "save", "rewind 2", "sail", "save", "quit"], state)
+        _save_journals.clear()
+        loaded = new_game_state()
+        load_game(loaded, self.path)
+        self.assertEqual(list(loaded.story_log),
+                         ["Arrived at the Ship's Deck.", "Sailing on the Open Sea."])
+        self.assertEqual(loaded, state)
+
+    def test_rewound_events_are_autosaved(self):
+        autosaver = Autosaver(self.path + ".auto", quiet=0, max_delay=0)
+        state = new_game_state()
+        self.play(["board", "search", "rewind 2", "quit"], state, autosave=autosaver)
+        autosaver.stop()
+        self.assertIsNone(autosaver.error)
+        _save_journals.clear()
+        loaded = new_game_state()
+        load_game(loaded, self.path + ".auto")
+        self.assertEqual(list(loaded.story_log), list(state.story_log))
+        self.assertEqual(list(state.story_log), ["Arrived at the Ship's Deck.", "Exploring Below Deck."])
+
+class FakeWindow:
+    """Stands in for a curses window in tests: records every drawing call."""
+
+    def __init__(self, height=24, width=80, keys=()):
+        self.size = (height, width)
+        self.calls = []
+        self.text = ""
+        self.keys = list(keys)
+
+    def getmaxyx(self):
+        return self.size
+
+    def addstr(self, *args):
+        self.calls.append("addstr")
+        self.text += next(arg for arg in args if isinstance(arg, str))
+
+    def getch(self):
+        self.calls.append("getch")
+        return self.keys.pop(0) if self.keys else -1
+
+    def get_wch(self):
+        self.calls.append("get_wch")
+        if not self.keys:
+            raise curses.error("no input")
+        return self.keys.pop(0)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append(name)
+
+class TestPanelRenderer(unittest.TestCase):
+    def test_redraws_only_dirty_panels(self):
+        state = new_game_state()
+        windows = [FakeWindow() for _ in range(5)]
+        with mock.patch("pirates.init_windows", return_value=windows), \
+                mock.patch.object(curses, "doupdate") as doupdate, \
+                mock.patch.object(curses, "ACS_HLINE", ord("-"), create=True), \
+                mock.patch("os.get_terminal_size", side_effect=OSError):
+            panels = PanelRenderer(FakeWindow(), state)
+            self.assertEqual(panels.render(), 3)
+            self.assertEqual(panels.render(), 0)
+            state["health"] -= 15
+            self.assertEqual(panels.render(), 1)
+            self.assertEqual(doupdate.call_count, 2)
+        self.assertNotIn("refresh", windows[0].calls)
+        self.assertEqual(windows[2].calls.count("noutrefresh"), 1)
+
+class AnsiTerminal:
+    """Just enough of an ANSI terminal to play back what a Screen sends."""
+
+    SGR_BITS = {"1": curses.A_BOLD, "2": curses.A_DIM, "4": curses.A_UNDERLINE, "7": curses.A_REVERSE}
+
+    def __init__(self, rows=24, cols=80):
+        self.rows, self.cols = rows, cols
+        self.chars = [[" "] * cols for _ in range(rows)]
+        self.attrs = [[0] * cols for _ in range(rows)]
+        self.y = self.x = self.attr = 0
+        self.cursor_visible = True
+
+    def feed(self, data):
+        for csi, params, final, ch in re.findall(r"(\x1b\[([0-9;?]*)([A-Za-z]))|(.)", data.decode(), re.S):
+            if not csi:
+                self.put(ch)
+                continue
+            if params == "?25":
+                self.cursor_visible = final == "h"
+                continue
+            numbers = [int(n) for n in params.split(";") if n]
+            if final == "H":
+                self.y, self.x = (numbers[0] - 1, numbers[1] - 1) if numbers else (0, 0)
+            elif final == "C":
+                self.x += numbers[0] if numbers else 1
+            elif final == "K":
+                start = 0 if numbers == [2] else self.x
+                self.chars[self.y][start:] = [" "] * (self.cols - start)
+                self.attrs[self.y][start:] = [0] * (self.cols - start)
+            elif final == "X":
+                end = min(self.x + numbers[0], self.cols)
+                self.chars[self.y][self.x:end] = [" "] * (end - self.x)
+                self.attrs[self.y][self.x:end] = [0] * (end - self.x)
+            elif final == "J":
+                self.chars = [[" "] * self.cols for _ in range(self.rows)]
+                self.attrs = [[0] * self.cols for _ in range(self.rows)]
+            elif final == "m":
+                self.attr = 0
+                for n in params.split(";"):
+                    self.attr |= self.SGR_BITS.get(n, 0)
+
+    def put(self, ch):
+        if ch == "\r":
+            self.x = 0
+        elif ch == "\n":
+            assert self.y + 1 < self.rows, "the stream scrolled the terminal"
+            self.y += 1
+        else:
+            if self.x == self.cols:  # wrap pending from the last column
+                self.y, self.x = self.y + 1, 0
+            self.chars[self.y][self.x], self.attrs[self.y][self.x] = ch, self.attr
+            self.x += 1
+
+    def text(self):
+        return "\n".join("".join(row).rstrip() for row in self.chars).rstrip()
+
+class FakeWriter:
+    """A StreamWriter stand-in that keeps what is written, with a settable backlog."""
+
+    def __init__(self):
+        self.data = b""
+        self.backlog = 0
+        self.transport = self
+
+    def write(self, data):
+        self.data += data
+
+    def get_write_buffer_size(self):
+        return self.backlog
+
+class TestScreenStream(unittest.TestCase):
+    def test_frames_bring_the_terminal_up_to_date(self):
+        rng = random.Random(5)
+        screen = Screen(24, 80)
+        windows = init_windows(screen)
+        terminal = AnsiTerminal()
+        for _ in range(300):
+            win = rng.choice(windows)
+            height, width = win.getmaxyx()
+            action = rng.random()
+            if action < 0.1:
+                win.erase()
+            elif action < 0.15:
+                win.box()
+            else:
+                attr = rng.choice([curses.A_NORMAL, curses.A_BOLD, curses.A_REVERSE])
+                text = "".join(rng.choice(["a", "b", " ", " " * 12, "\n"]) for _ in range(rng.randint(1, 30)))
+                try:
+                    win.addstr(rng.randrange(height), rng.randrange(width), text, attr)
+                except curses.error:
+                    pass
+            win.noutrefresh()
+            if rng.random() < 0.2:
+                screen.cursor = rng.choice([None, (rng.randrange(24), rng.randrange(80))])
+            if rng.random() < 0.3:
+                row = rng.randrange(24)
+                screen.forget([row])
+                terminal.chars[row][rng.randrange(80)] = "?"  # echoed input it lost track of
+            terminal.feed(screen.frame())
+            self.assertEqual(terminal.text(), screen.text())
+            self.assertEqual(terminal.attrs, screen.attrs)
+            self.assertEqual(terminal.cursor_visible, screen.cursor is not None)
+            if screen.cursor is not None:
+                self.assertEqual((terminal.y, terminal.x), screen.cursor)
+
+    def test_sends_only_what_changed(self):
+        screen = Screen(24, 80)
+        header_win, main_win = init_windows(screen)[:2]
+        update_header(header_win, new_game_state())
+        first = screen.frame()
+        self.assertEqual(screen.frame(), b"")
+        main_win.addstr(0, 0, "Ahoy")
+        main_win.noutrefresh()
+        self.assertEqual(screen.frame(), b"\x1b[4;1HAhoy")
+        screen.cursor = (20, 3)
+        self.assertEqual(screen.frame(), b"\x1b[21;4H\x1b[?25h")
+        self.assertLess(len(first), 24 * 80)
+
+    def test_backlog_skips_frames_without_losing_changes(self):
+        writer = FakeWriter()
+        io = ScreenIO(writer, new_game_state())
+        io.draw_prompt(">> ")
+        writer.backlog = STREAM_HIGH_WATER + 1
+        io.slow_print("The storm rolls in.")
+        for _ in io.animation():
+            self.assertFalse(io.send_frame())
+        sent = len(writer.data)
+        writer.backlog = 0
+        self.assertTrue(io.send_frame())
+        self.assertGreater(io.skipped, 0)
+        terminal = AnsiTerminal()
+        terminal.feed(writer.data)
+        self.assertIn("The storm rolls in.", terminal.text())
+        self.assertLess(len(writer.data) - sent, 40)
+
+    def test_screen_session(self):
+        async def client(port):
+            reader, writer = await asyncio.open_connection(SERVER_HOST, port)
+            writer.write(b"Anne\n4 3 3\nboard\nsearch\nquit\n")
+            data = await reader.read()
+            writer.close()
+            return data
+
+        async def run():
+            server = await asyncio.start_server(
+                lambda r, w: serve_session(r, w, animate=False, screen=(24, 80)), SERVER_HOST, 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await client(port)
+
+        terminal = AnsiTerminal()
+        terminal.feed(asyncio.run(run()))
+        screen = terminal.text()
+        self.assertIn("Health: 100  Reputation: 0", screen)
+        self.assertIn("SEA OF MYSTERY", screen)
+        self.assertIn("Thank you for playing!", screen)
+
+class TestTextAnimator(unittest.TestCase):
+    def animate(self, *texts, speed=1.0, keys=()):
+        clock = [0.0]
+        def sleep(seconds):
+            clock[0] += max(seconds, 1e-3)
+        windows = [FakeWindow(keys=keys) for _ in texts]
+        animator = TextAnimator(fps=10, speed=speed, clock=lambda: clock[0], sleep=sleep)
+        for win, text in zip(windows, texts):
+            animator.add(win, text, delay=0.05)
+        with mock.patch.object(curses, "doupdate"):
+            frames = animator.run()
+        return frames, windows, clock[0]
+
+    def test_one_write_per_window_per_frame(self):
+        frames, (left, right), elapsed = self.animate("x" * 40, "y" * 20)
+        self.assertEqual((left.text, right.text), ("x" * 40, "y" * 20))
+        self.assertEqual(frames, 21)
+        self.assertAlmostEqual(elapsed, 2.0, places=1)
+        self.assertLessEqual(left.calls.count("addstr"), frames)
+
+    def test_zero_speed_is_instant(self):
+        frames, (win,), elapsed = self.animate("Ahoy there", speed=0)
+        self.assertEqual((frames, win.text, elapsed), (1, "Ahoy there", 0.0))
+
+    def test_keypress_completes_text(self):
+        frames, (win,), _ = self.animate("z" * 100, keys=[-1, -1, ord(" ")])
+        self.assertEqual((frames, win.text), (3, "z" * 100))
+
+class TestMovies(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def compile(self, source):
+        source_path = os.path.join(self.tmpdir.name, "movie.txt")
+        out_path = os.path.join(self.tmpdir.name, "movie.plm")
+        with open(source_path, "w") as f:
+            f.write(source)
+        compile_movie(source_path, out_path)
+        return out_path
+
+    def test_frames_are_deltas(self):
+        path = self.compile("%% 1\n  ~~~~\n ~SHIP~\n%% 0.5\n  ~~~~\n ~SHOP~\n")
+        with open(path) as f:
+            width, height, frames = read_movie(f)
+            frames = list(frames)
+        self.assertEqual((width, height), (7, 2))
+        self.assertEqual(frames[1], (0.5, [(1, 4, "O")]))
+        canvas = [[" "] * width for _ in range(height)]
+        for row, col, text in frames[0][1]:
+            canvas[row][col:col + len(text)] = text
+        self.assertEqual(["".join(row) for row in canvas], ["  ~~~~ ", " ~SHIP~"])
+
+    def play(self, path):
+        win = FakeWindow()
+        with mock.patch("time.sleep"):
+            return play_movie(win, path), win.text
+
+    def test_damaged_movie_plays_its_source(self):
+        path = self.compile("%% 1\n AHOY\n")
+        with open(path, "w") as f:
+            f.write("PLMOVIE one\n")
+        self.assertEqual(self.play(path), (True, "AHOY"))
+
+    def test_truncated_movie_ends_early(self):
+        path = self.compile("%% 1\n AHOY\n%% 1\n LAND\n")
+        with open(path) as f:
+            data = f.read()
+        with open(path, "w") as f:
+            f.write(data[:-4])
+        os.remove(path[:-4] + ".txt")
+        self.assertEqual(self.play(path), (False, "AHOY"))
+
+    def test_intro_marked_seen_in_save_dir(self):
+        save_dir = os.path.join(self.tmpdir.name, "saves")
+        with mock.patch("pirates.play_movie") as play:
+            ascii_intro_movie(FakeWindow(), "auto", save_dir)
+            ascii_intro_movie(FakeWindow(), "auto", save_dir)
+        self.assertEqual(play.call_count, 1)
+        self.assertTrue(os.path.exists(os.path.join(save_dir, INTRO_SEEN_FILE)))
+
+    def test_shipped_movies_are_current(self):
+        for name in ("intro", "ending"):
+            source = os.path.join(MOVIE_DIR, name + ".txt")
+            out_path = os.path.join(self.tmpdir.name, name + ".plm")
+            compile_movie(source, out_path)
+            with open(out_path) as fresh, open(os.path.join(MOVIE_DIR, name + ".plm")) as shipped:
+                self.assertEqual(fresh.read(), shipped.read())
+
+class TestTextCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def compile(self, **languages):
+        paths = []
+        for code, source in languages.items():
+            paths.append(os.path.join(self.tmpdir.name, code + ".txt"))
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                f.write(source)
+        out_path = os.path.join(self.tmpdir.name, "story.plt")
+        compile_text(*paths, out_path)
+        return out_path
+
+    def test_languages_fall_back_and_decode_lazily(self):
+        path = self.compile(
+            en="# comment\n@@ deck.look\nA busy deck.\n\n@@ deck.hail\nAhoy, {name}!\n  Second line.\n",
+            es="@@ deck.look\nUna cubierta ajetreada.\n")
+        catalog = TextCatalog(path, "es")
+        self.assertEqual(catalog.get("deck.look"), "Una cubierta ajetreada.")
+        self.assertEqual(catalog.get("deck.hail"), "Ahoy, {name}!\n  Second line.")
+        self.assertEqual(sorted(catalog._texts), ["deck.hail", "deck.look"])
+        self.assertEqual(catalog.languages(), ["en", "es"])
+        catalog.set_language("en")
+        self.assertEqual(catalog.get("deck.look"), "A busy deck.")
+        with self.assertRaises(KeyError):
+            catalog.get("deck.missing")
+        with self.assertRaises(ValueError):
+            catalog.set_language("fr")
+
+    def test_nothing_is_read_before_first_use(self):
+        catalog = TextCatalog(os.path.join(self.tmpdir.name, "missing.plt"))
+        with self.assertRaises(OSError):
+            catalog.get("deck.look")
+
+    def test_every_key_the_game_uses_exists(self):
+        with open(pirates.__file__, encoding="utf-8") as f:
+            keys = set(re.findall(r'story_text\("([^"]+)"', f.read()))
+        self.assertGreater(len(keys), 30)
+        catalog = TextCatalog(CATALOG_FILE)
+        for key in keys:
+            self.assertTrue(catalog.get(key), key)
+        self.assertIn("Black Meridian", story_text("ship_deck.enter", name="Anne"))
+
+    def test_shipped_catalog_is_current(self):
+        text_dir = os.path.dirname(CATALOG_FILE)
+        sources = sorted(os.path.join(text_dir, name) for name in os.listdir(text_dir)
+                         if name.endswith(".txt"))
+        out_path = os.path.join(self.tmpdir.name, "story.plt")
+        compile_text(*sources, out_path)
+        with open(out_path, "rb") as fresh, open(CATALOG_FILE, "rb") as shipped:
+            self.assertEqual(fresh.read(), shipped.read())
+
+class TestInputLoop(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(curses, "doupdate")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_type_ahead_during_animation(self):
+        input_win = FakeWindow(keys=list("look\nsa\x7f\x7fsail\n"))
+        keys = InputLoop(lambda: input_win)
+        main_win = FakeWindow()
+        animator = TextAnimator(speed=1.0, keys=keys)
+        animator.add(main_win, "x" * 200, delay=0.05)
+        self.assertEqual(animator.run(), 1)
+        self.assertEqual(main_win.text, "x" * 200)
+        animator.add(main_win, "y" * 200, delay=0.05)
+        self.assertEqual(animator.run(), 1)  # queued commands fast-forward later text
+        self.assertEqual(keys.read_line(), "look")
+        self.assertEqual(keys.read_line(), "sail")
+
+    def test_wait_key_does_not_leave_type_ahead(self):
+        input_win = FakeWindow(keys=["q"])
+        keys = InputLoop(lambda: input_win)
+        keys.wait_key()
+        self.assertEqual((keys.buffer, list(keys.lines)), ([], []))
+
+    def test_journal_keeps_what_is_typed_to_leave_it(self):
+        input_win = FakeWindow(keys=[curses.KEY_PPAGE, curses.KEY_NPAGE] + list("sail\n"))
+        keys = InputLoop(lambda: input_win)
+        main_win = FakeWindow()
+        main_win.getbegyx = lambda: (0, 0)
+        with mock.patch.object(curses, "newpad", return_value=FakeWindow()):
+            display_journal(main_win, keys, StoryLog(["Event"] * 100))
+        self.assertEqual(keys.read_line(), "sail")
+        self.assertNotIn("getch", main_win.calls + input_win.calls)
+
+    def test_bare_enter_only_closes_the_journal(self):
+        input_win = FakeWindow(keys=["\n"])
+        keys = InputLoop(lambda: input_win)
+        main_win = FakeWindow()
+        main_win.getbegyx = lambda: (0, 0)
+        with mock.patch.object(curses, "newpad", return_value=FakeWindow()):
+            display_journal(main_win, keys, StoryLog())
+        self.assertEqual((keys.buffer, list(keys.lines)), ([], []))
+
+class TestMetrics(unittest.TestCase):
+    def test_enable_times_calls_and_disable_restores(self):
+        original = parse_command
+        metrics = Metrics()
+        metrics.enable()
+        try:
+            self.assertIsNot(vars(pirates)["parse_command"], original)
+            session = Session(MemoryIO(["look", "look", "quit"]), new_game_state(), save_file=None)
+            run_scenes(session, "ship_deck")
+        finally:
+            metrics.disable()
+        self.assertIs(vars(pirates)["parse_command"], original)
+        self.assertEqual(metrics.commands, {"look": 2, "quit": 1})
+        self.assertEqual(sum(metrics.histograms["parse_command"].counts), 3)
+        text = metrics.to_prometheus()
+        self.assertIn('pirates_call_seconds_bucket{function="parse_command",le="+Inf"} 3', text)
+        self.assertIn('pirates_commands_total{command="look"} 2', text)
+        self.assertEqual(json.loads(metrics.to_json())["functions"]["parse_command"]["count"], 3)
+
+class TestJournalFunctions(unittest.TestCase):
+    def test_add_event(self):
+        initial_len = len(game_state["story_log"])
+        add_event("Test Event")
+        self.assertEqual(len(game_state["story_log"]), initial_len + 1)
+        self.assertEqual(game_state["story_log"][-1], "Test Event")
+
+    def test_add_event_with_params(self):
+        state = new_game_state()
+        add_event("Character created: {} with skills {}", "Anne", {"combat": 5}, state=state)
+        self.assertEqual(state["story_log"][-1], "Character created: Anne with skills {'combat': 5}")
+
+if __name__ == "__main__":
+    unittest.main()